@@ -0,0 +1,350 @@
+"""
+Headless entry point for importing and comparing measurements without the GUI, e.g. on build servers.
+
+Example usage:
+    python cli.py import hil.mf4 sil.mf4 --sample-rate 100 --name-mapping mapping.csv
+    python cli.py import measurements/ --jobs 4
+    python cli.py compare --ref hil.mf4 --eval sil.mf4 --metrics ISO "Euclidean Distance" --output results
+    python cli.py matrix --measurements run1.mf4 run2.mf4 run3.mf4 --metric "Pearson Correlation" --output results
+"""
+import argparse
+from dataclasses import replace
+from logging import getLogger
+import logging
+import multiprocessing as mp
+import os
+import sys
+
+import pandas as pd
+
+from comparison.comparison import Comparison
+from comparison.comparison_checkpoint import ComparisonCheckpoint
+from comparison.comparison_executor import execute_comparison
+from comparison.comparison_matrix import ComparisonMatrix, execute_matrix
+from comparison.comparison_repository import ComparisonRepository
+from comparison.comparison_result import ComparisonResult
+from comparison.comparison_worker_pool import ComparisonWorkerPool, PairLimits
+from comparison.metrics.metric_registry import MetricRegistry
+from comparison.sync_block import SyncBlock
+from comparison.sync_processor import SyncProcessor
+from measurement.import_queue import DEFAULT_CONCURRENT_IMPORTS
+from measurement.measurement import Measurement
+from measurement.measurement_import import MeasurementImportInfo, MeasurementImporter
+from measurement.measurement_registry import MeasurementRegistry
+
+
+logger = getLogger("cli")
+
+
+def read_name_mapping(filename: str | None) -> dict[str, str]:
+    """
+    Reads a name mapping file with the columns `Channel` and `Mapped Channel`, see the Name Mapping Guide.
+    """
+    if filename is None:
+        return {}
+    logger.info(f"Reading name mapping from {filename}")
+    data = pd.read_csv(filename)
+    return dict(zip(data["Channel"], data["Mapped Channel"]))
+
+
+def import_measurement(filename: str, args: argparse.Namespace) -> Measurement:
+    """
+    Imports a measurement file and adds it to the MeasurementRegistry.
+    """
+    info = MeasurementImportInfo(filename, args.remove_constant, args.merge,
+                                 read_name_mapping(args.name_mapping), args.sample_rate, not args.reimport, args.link)
+    importer = MeasurementImporter(info)
+    measurement = importer.import_measurement()
+    if measurement is None:
+        logger.info(f"{filename} was already imported")
+        return MeasurementRegistry().get(importer.duplicate_of)
+    MeasurementRegistry().add_measurement(measurement)
+    logger.info(
+        f"Imported {measurement.name} ({len(measurement.channels)} channels) with id {measurement.id}")
+    return measurement
+
+
+def find_measurement(reference: str, args: argparse.Namespace) -> Measurement | None:
+    """
+    Finds a measurement by its id or name. If the reference is a file that is not imported yet, it is imported.
+    """
+    registry = MeasurementRegistry()
+    if registry.has(reference):
+        return registry.get(reference)
+    if registry.has_by_name(os.path.basename(reference)) and not args.reimport:
+        return registry.get_by_name(os.path.basename(reference))
+    if os.path.isfile(reference):
+        return import_measurement(reference, args)
+    logger.error(f"Could not find measurement {reference}")
+    return None
+
+
+def create_comparison(ref_measurement: Measurement, eval_measurement: Measurement, metric, args: argparse.Namespace) -> Comparison:
+    """
+    Creates a comparison with a single sync block, starting at the given offsets and lasting until the end
+    of the shorter measurement, like the GUI does if no synchronization is selected.
+    """
+    comparison = Comparison(ref_measurement, eval_measurement)
+    comparison.set_metric(metric)
+    ref_sync_end, eval_sync_end = SyncProcessor().find_longest_end_sync_time(
+        args.ref_start, args.eval_start, comparison)
+    comparison.add_sync_block(
+        SyncBlock(args.ref_start, ref_sync_end, args.eval_start, eval_sync_end))
+    return comparison
+
+
+def write_summaries(results: list[tuple[Comparison, ComparisonResult]], output: str) -> None:
+    """
+    Writes a summary.csv with one row per comparison, and a channels.csv with one row per channel pair.
+    """
+    os.makedirs(output, exist_ok=True)
+    comparison_rows = []
+    channel_rows = []
+    for comparison, result in results:
+        comparison_rows.append({
+            "Name": result.name,
+            "Reference": comparison.ref_measurement.name,
+            "Evaluated": comparison.eval_measurement.name,
+            "Metric": str(comparison.metric),
+            "Average": result.result_average if len(result.result) > 0 else None,
+            "Compared Pairs": len(result.channel_results),
+            "Skipped Pairs": len(result.skipped_results)
+        })
+        for summary in result.summaries:
+            channel_rows.append({
+                "Name": result.name,
+                "Reference Channel": summary.ref_name,
+                "Evaluated Channel": summary.eval_name,
+                "Average": summary.mean,
+                "Min": summary.min,
+                "Max": summary.max,
+                "Median": summary.median,
+                "Worst Time": summary.worst_time,
+                "Skipped": None
+            })
+        for ref_channel, eval_channel, reason in result.skipped_results:
+            channel_rows.append({
+                "Name": result.name,
+                "Reference Channel": ref_channel.name,
+                "Evaluated Channel": eval_channel.name,
+                "Average": None,
+                "Min": None,
+                "Max": None,
+                "Median": None,
+                "Worst Time": None,
+                "Skipped": reason
+            })
+
+    pd.DataFrame(comparison_rows).to_csv(f"{output}/summary.csv", index=False)
+    pd.DataFrame(channel_rows).to_csv(f"{output}/channels.csv", index=False)
+    logger.info(f"Wrote summaries to {output}")
+
+
+def write_matrix(matrix: ComparisonMatrix, output: str) -> None:
+    """
+    Writes the overall matrix to matrix.csv, and the matrices of all channels to matrix_channels.csv with one row per entry.
+    """
+    os.makedirs(output, exist_ok=True)
+    matrix.to_dataframe().to_csv(f"{output}/matrix.csv")
+    channel_rows = []
+    for name, channel_matrix in matrix.channel_matrices.items():
+        for row, ref_name in enumerate(matrix.ref_names):
+            for column, eval_name in enumerate(matrix.eval_names):
+                channel_rows.append({
+                    "Channel": name,
+                    "Reference": ref_name,
+                    "Evaluated": eval_name,
+                    "Average": channel_matrix[row, column]
+                })
+    pd.DataFrame(channel_rows).to_csv(
+        f"{output}/matrix_channels.csv", index=False)
+    logger.info(f"Wrote matrix to {output}")
+
+
+def run_import(args: argparse.Namespace) -> int:
+    """
+    Imports the files, and every measurement file of the given folders, with args.jobs imports at the same time.
+    """
+    registry = MeasurementRegistry()
+    registry.import_queue.set_max_concurrent(args.jobs)
+    failed = []
+    registry.import_queue.jobFailed.connect(
+        lambda job, reason: failed.append(job))
+    info = MeasurementImportInfo("", args.remove_constant, args.merge,
+                                 read_name_mapping(args.name_mapping), args.sample_rate, not args.reimport, args.link)
+    for filename in args.files:
+        if os.path.isdir(filename):
+            registry.import_folder(filename, info)
+        else:
+            registry.import_file(replace(info, filename=filename))
+    registry.import_queue.wait()
+    return 1 if len(failed) > 0 else 0
+
+
+def run_compare(args: argparse.Namespace) -> int:
+    metric_registry = MetricRegistry()
+    metrics = []
+    for name in args.metrics:
+        metric = metric_registry.get_metric(name)
+        if metric is None:
+            logger.error(
+                f"Unknown metric {name}, available metrics: {', '.join(metric_registry.available_metrics())}")
+            return 1
+        metrics.append(metric)
+
+    ref_measurement = find_measurement(args.ref, args)
+    if ref_measurement is None:
+        return 1
+
+    comparisons = []
+    failed = 0
+    for eval_reference in args.eval:
+        eval_measurement = find_measurement(eval_reference, args)
+        if eval_measurement is None:
+            failed += 1
+            continue
+        if eval_measurement.sample_rate != ref_measurement.sample_rate:
+            logger.error(
+                f"Sample rates of {ref_measurement.name} and {eval_measurement.name} do not match")
+            failed += 1
+            continue
+        for metric in metrics:
+            comparisons.append(create_comparison(
+                ref_measurement, eval_measurement, metric, args))
+
+    processes = args.workers if args.workers is not None else mp.cpu_count()
+    limits = PairLimits.default(processes)
+    limits.time_limit = args.time_limit
+    repository = ComparisonRepository()
+    results = []
+
+    logger.info(
+        f"Starting {len(comparisons)} comparisons on {processes} workers")
+    with ComparisonWorkerPool(processes, limits) as pool:
+        for comparison in comparisons:
+            checkpoint = ComparisonCheckpoint(comparison)
+            result = execute_comparison(comparison, pool, checkpoint)
+            if result is None:
+                logger.error(
+                    f"Comparison failed: {comparison.ref_measurement.name} - {comparison.eval_measurement.name} ({str(comparison.metric)})")
+                failed += 1
+                continue
+            if not args.no_save:
+                repository.save_comparison(result, sync=True)
+            checkpoint.discard()
+            logger.info(
+                f"Comparison done: {result.name}")
+            results.append((comparison, result))
+
+    write_summaries(results, args.output)
+    return 1 if failed > 0 else 0
+
+
+def run_matrix(args: argparse.Namespace) -> int:
+    metric = MetricRegistry().get_metric(args.metric)
+    if metric is None:
+        logger.error(
+            f"Unknown metric {args.metric}, available metrics: {', '.join(MetricRegistry().available_metrics())}")
+        return 1
+
+    ref_measurements = [find_measurement(reference, args)
+                        for reference in args.measurements]
+    eval_measurements = None
+    if args.eval is not None:
+        eval_measurements = [find_measurement(reference, args)
+                             for reference in args.eval]
+    if None in ref_measurements or (eval_measurements is not None and None in eval_measurements):
+        return 1
+
+    processes = args.workers if args.workers is not None else mp.cpu_count()
+    matrix = execute_matrix(ref_measurements, eval_measurements, metric, processes)
+    if matrix is None:
+        return 1
+    write_matrix(matrix, args.output)
+    return 0
+
+
+def add_import_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sample-rate", type=float, default=100,
+                        help="Sample rate all signals are resampled to (default: 100)")
+    parser.add_argument("--name-mapping",
+                        help="Name mapping csv with the columns Channel and Mapped Channel")
+    parser.add_argument("--remove-constant", action="store_true",
+                        help="Remove constant signals")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge repeated signals")
+    parser.add_argument("--link", action="store_true",
+                        help="Only link the files, signals are read from them when they are first compared")
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Import and compare measurements without the GUI. Arguments can be read from a file with @file.",
+        fromfile_prefix_chars="@")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser(
+        "import", help="Import measurement files")
+    import_parser.add_argument("files", nargs="+",
+                               help="MDF files (.mf4) to import, or folders whose MDF files are imported")
+    import_parser.add_argument("--jobs", type=int, default=DEFAULT_CONCURRENT_IMPORTS,
+                               help=f"Number of files imported at the same time (default: {DEFAULT_CONCURRENT_IMPORTS})")
+    import_parser.add_argument("--reimport", action="store_true",
+                               help="Import files again, even if they were imported with the same options before")
+    add_import_arguments(import_parser)
+    import_parser.set_defaults(handler=run_import)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare measurements with one or more metrics")
+    compare_parser.add_argument("--ref", required=True,
+                                help="Ground truth measurement, given by id, name, or a file that is imported first")
+    compare_parser.add_argument("--eval", required=True, nargs="+",
+                                help="Measurements compared against the ground truth, given by id, name, or file")
+    compare_parser.add_argument("--metrics", required=True, nargs="+",
+                                help="Names of the metrics, as listed in the MetricRegistry")
+    compare_parser.add_argument("--ref-start", type=float, default=0,
+                                help="Time in seconds at which the reference measurement is synchronized")
+    compare_parser.add_argument("--eval-start", type=float, default=0,
+                                help="Time in seconds at which the evaluated measurements are synchronized")
+    compare_parser.add_argument("--workers", type=int,
+                                help="Number of worker processes (default: all cores)")
+    compare_parser.add_argument("--time-limit", type=float, default=PairLimits.time_limit,
+                                help="Time limit in seconds for each channel pair")
+    compare_parser.add_argument("--output", default="summaries",
+                                help="Folder the summary csv files are written to (default: summaries)")
+    compare_parser.add_argument("--no-save", action="store_true",
+                                help="Do not save the comparison results in the comparisons folder")
+    compare_parser.add_argument("--reimport", action="store_true",
+                                help="Import measurement files again, even if a measurement with the same name exists")
+    add_import_arguments(compare_parser)
+    compare_parser.set_defaults(handler=run_compare)
+
+    matrix_parser = subparsers.add_parser(
+        "matrix", help="Compare every measurement with every other measurement with one metric")
+    matrix_parser.add_argument("--measurements", required=True, nargs="+",
+                               help="Measurements used as ground truth, given by id, name, or file")
+    matrix_parser.add_argument("--eval", nargs="+",
+                               help="Measurements compared against them (default: the measurements themselves)")
+    matrix_parser.add_argument("--metric", required=True,
+                               help="Name of the metric, as listed in the MetricRegistry")
+    matrix_parser.add_argument("--workers", type=int,
+                               help="Number of worker processes (default: all cores)")
+    matrix_parser.add_argument("--output", default="summaries",
+                               help="Folder the matrix csv files are written to (default: summaries)")
+    matrix_parser.add_argument("--reimport", action="store_true",
+                               help="Import measurement files again, even if a measurement with the same name exists")
+    add_import_arguments(matrix_parser)
+    matrix_parser.set_defaults(handler=run_matrix)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(levelname)s (%(name)s,%(funcName)s)- %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,8 +31,8 @@ class Comparison():
         self.eval_measurement = eval_measurement
         self.logger = logging.getLogger(__name__)
         self.channel_assignments = {}
-        mes2_channel_names = [
-            channel.name for channel in eval_measurement.channels]
+        mes2_channel_names = {
+            channel.name for channel in eval_measurement.channels}
         for channel in ref_measurement.channels:
             if channel.name in mes2_channel_names:
                 self.channel_assignments[channel.name] = channel.name
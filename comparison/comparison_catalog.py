@@ -0,0 +1,97 @@
+from contextlib import closing
+from dataclasses import dataclass
+from logging import getLogger
+import sqlite3
+
+# Version of the catalog table, a catalog of another version is rebuilt from the saved comparisons.
+CATALOG_VERSION = 1
+
+
+@dataclass
+class CatalogEntry():
+    """
+    Metadata of a saved comparison, such that saved comparisons can be listed without reading their files.
+    Attributes:
+        name (str): Name of the comparison.
+        id (str): Id of the comparison, the hash of its name, which prefixes its files.
+        ref_measurement (str | None): Name of the reference measurement.
+        eval_measurement (str | None): Name of the evaluated measurement.
+        metric (str | None): Name of the metric used.
+        created (float): Time the comparison was saved, as unix timestamp.
+        pairs (int): Number of compared channel pairs.
+        score (float | None): Mean of the total result.
+    """
+    name: str
+    id: str
+    ref_measurement: str | None
+    eval_measurement: str | None
+    metric: str | None
+    created: float
+    pairs: int
+    score: float | None
+
+
+class ComparisonCatalog():
+    """
+    Indexes the saved comparisons in a SQLite database in the comparisons folder, with one row per comparison.
+    Each change is a single transaction, and every call opens its own connection, therefore the catalog can be
+    updated from the save threads of the ComparisonRepository.
+    Args:
+        filename (str): The database file, created if it does not exist.
+    Example usage:
+        catalog = ComparisonCatalog(f"{base_path}/catalog.sqlite")
+        catalog.put(entry)
+        names = [entry.name for entry in catalog.entries()]
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.logger = getLogger(__name__)
+        with closing(self._connect()) as connection, connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != CATALOG_VERSION:
+                self.logger.info(
+                    f"Creating comparison catalog version {CATALOG_VERSION}")
+                connection.execute("DROP TABLE IF EXISTS comparisons")
+                connection.execute(
+                    "CREATE TABLE comparisons (name TEXT PRIMARY KEY, id TEXT UNIQUE NOT NULL, ref_measurement TEXT, "
+                    "eval_measurement TEXT, metric TEXT, created REAL NOT NULL, pairs INTEGER NOT NULL, score REAL)")
+                connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.filename, timeout=30)
+
+    def put(self, entry: CatalogEntry) -> None:
+        """
+        Adds a comparison, or replaces the entry of a comparison with the same name.
+        """
+        self.put_many([entry])
+
+    def put_many(self, entries: list[CatalogEntry]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO comparisons VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(entry.name, entry.id, entry.ref_measurement, entry.eval_measurement, entry.metric,
+                                     entry.created, entry.pairs, entry.score) for entry in entries])
+
+    def remove(self, name: str) -> None:
+        self.remove_many([name])
+
+    def remove_many(self, names: list[str]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("DELETE FROM comparisons WHERE name = ?", [
+                                   (name,) for name in names])
+
+    def get(self, name: str) -> CatalogEntry | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT * FROM comparisons WHERE name = ?", (name,)).fetchone()
+        return CatalogEntry(*row) if row is not None else None
+
+    def entries(self) -> list[CatalogEntry]:
+        """
+        Returns the entries of all comparisons, ordered by name.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT * FROM comparisons ORDER BY name").fetchall()
+        return [CatalogEntry(*row) for row in rows]
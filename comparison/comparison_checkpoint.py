@@ -0,0 +1,233 @@
+import hashlib
+import json
+from logging import getLogger
+import os
+import shutil
+
+import numpy as np
+
+from comparison.comparison import Comparison
+from comparison.comparison_worker_pool import SkippedPair
+from comparison.metrics.metric import Metric
+from comparison.metrics.metric_result import MetricResult
+from comparison.metrics.signal_data import SignalData
+from measurement.channel.channel_data import ChannelData
+from measurement.channel.channel_data_repository import ChannelDataRepository
+
+
+class ComparisonCheckpoint():
+    """
+    Persists the results of a running comparison pair by pair, such that a comparison that was interrupted
+    (e.g. by a crash or a reboot) can be resumed without comparing the finished pairs again.
+    A checkpoint is identified by a hash of the comparison configuration: the measurements, the metric and its
+    parameters, the sync blocks and the channel pairs. Restarting a comparison with the same configuration
+    therefore finds the checkpoint of the previous run, while any change to the configuration starts from scratch.
+    The checkpoint is stored in comparisons/checkpoints/<key>/: config.json is written once, each finished pair
+    is stored in an npz file and then appended as a line to finished.jsonl, such that saving a pair takes the same
+    time regardless of the size of the comparison. Pairs that were skipped (e.g. timeouts or memory limits) are
+    appended to skipped.jsonl instead, and compared again when the comparison is resumed, e.g. with higher limits.
+    The npz files are written to a temporary file first and then renamed, and an incomplete last line of a list
+    is ignored, such that an interruption while writing never leaves a corrupted checkpoint behind.
+    Args:
+        comparison (Comparison): The comparison to checkpoint.
+        base_path (str | None): Folder holding the checkpoints. Defaults to comparisons/checkpoints in the working directory.
+    Example usage:
+        checkpoint = ComparisonCheckpoint(comparison)
+        result = execute_comparison(comparison, pool, checkpoint)
+        checkpoint.discard()
+    """
+
+    def __init__(self, comparison: Comparison, base_path: str | None = None) -> None:
+        self.logger = getLogger(__name__)
+        if base_path is None:
+            base_path = f"{os.getcwd()}/comparisons/checkpoints"
+        self.config = self._config(comparison)
+        self.key = hashlib.sha256(json.dumps(
+            self.config, sort_keys=True).encode()).hexdigest()
+        self.path = f"{base_path}/{self.key}"
+        self.config_filename = f"{self.path}/config.json"
+        self.finished_filename = f"{self.path}/finished.jsonl"
+        self.skipped_filename = f"{self.path}/skipped.jsonl"
+        self.repository = ChannelDataRepository()
+
+    @staticmethod
+    def _config(comparison: Comparison) -> dict:
+        metric = comparison.metric
+        return {
+            "ref_measurement": comparison.ref_measurement.id,
+            "eval_measurement": comparison.eval_measurement.id,
+            "metric": str(metric),
+            "metric_class": type(metric).__name__,
+            "metric_parameters": ComparisonCheckpoint._metric_parameters(metric),
+            "sync_blocks": [[sync_block.ref_start, sync_block.ref_end, sync_block.eval_start, sync_block.eval_end]
+                            for sync_block in comparison.sync_blocks],
+            "channel_id_pairs": [[ref_channel.id, eval_channel.id]
+                                 for ref_channel, eval_channel in comparison.get_channels()]
+        }
+
+    @staticmethod
+    def _metric_parameters(metric: Metric) -> dict:
+        """
+        Returns the attributes of a metric that are JSON primitives, or lists of them. Other attributes, like the
+        logger whose representation contains the current log level, would change the key between runs.
+        """
+        def is_primitive(value) -> bool:
+            if isinstance(value, (list, tuple)):
+                return all(is_primitive(item) for item in value)
+            return value is None or isinstance(value, (bool, int, float, str))
+
+        # converted like the stored config.json, e.g. tuples to lists, such that both compare equal
+        return json.loads(json.dumps({name: value for name, value in vars(metric).items() if is_primitive(value)}))
+
+    def load(self) -> dict[int, tuple[ChannelData, ChannelData, MetricResult]]:
+        """
+        Loads the finished pairs of a previous run with the same configuration. Pairs that were skipped in the
+        previous run are not loaded, such that they are compared again.
+        Returns:
+            dict: The (ref_data, eval_data, result) tuple of each finished pair, keyed by the position of the pair
+                in Comparison.get_channels(). Empty if there is no checkpoint.
+        """
+        if not os.path.exists(self.config_filename):
+            return {}
+
+        try:
+            config = json.load(open(self.config_filename, "r"))
+        except (OSError, json.JSONDecodeError):
+            self.logger.error(
+                f"Could not read checkpoint {self.key}, starting from scratch")
+            return {}
+        if config != self.config:
+            self.logger.error(
+                f"Checkpoint {self.key} belongs to a different configuration, starting from scratch")
+            return {}
+
+        results = {}
+        channel_id_pairs = self.config["channel_id_pairs"]
+        for position in self._read_positions(self.finished_filename):
+            if position in results:
+                continue
+            ref_id, eval_id = channel_id_pairs[position]
+            ref_channel = self.repository.load(ref_id)
+            eval_channel = self.repository.load(eval_id)
+            if ref_channel is None or eval_channel is None:
+                continue
+            result = self._load_result(position)
+            if result is None:
+                continue
+            results[position] = (ref_channel, eval_channel, result)
+
+        skipped = set(self._read_positions(self.skipped_filename)) - set(results)
+        self.logger.info(
+            f"Resuming from checkpoint {self.key} with {len(results)} of {len(channel_id_pairs)} pairs finished, "
+            f"comparing {len(skipped)} previously skipped pairs again")
+        return results
+
+    def _read_positions(self, filename: str) -> list[int]:
+        if not os.path.exists(filename):
+            return []
+        positions = []
+        with open(filename, "r") as file:
+            for line in file:
+                if line.strip() == "":
+                    continue
+                try:
+                    positions.append(int(json.loads(line)["position"]))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    # the last line is incomplete if the run was interrupted while appending it
+                    self.logger.warning(
+                        f"Ignoring an incomplete entry of checkpoint {self.key}")
+        return positions
+
+    def save(self, positions: list[int], results: list[tuple[ChannelData, ChannelData, MetricResult | SkippedPair]]) -> None:
+        """
+        Adds the results of finished pairs to the checkpoint.
+        Args:
+            positions (list[int]): The positions of the pairs in Comparison.get_channels().
+            results (list[tuple]): The (ref_data, eval_data, result) tuple of each pair.
+        """
+        if not os.path.exists(self.config_filename):
+            os.makedirs(self.path, exist_ok=True)
+            temporary_filename = f"{self.config_filename}.tmp"
+            with open(temporary_filename, "w") as file:
+                json.dump(self.config, file)
+            os.replace(temporary_filename, self.config_filename)
+
+        finished = []
+        skipped = []
+        for position, (_, _, result) in zip(positions, results):
+            if isinstance(result, SkippedPair):
+                skipped.append({"position": position, "reason": result.reason})
+                continue
+            # the result is written before it is listed, such that every listed pair can be loaded
+            self._save_result(position, result)
+            finished.append({"position": position})
+
+        for filename, entries in [(self.finished_filename, finished), (self.skipped_filename, skipped)]:
+            if len(entries) == 0:
+                continue
+            lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+            with open(filename, "ab+") as file:
+                # an incomplete line of an interrupted run is terminated, such that it does not corrupt the next one
+                if file.tell() > 0:
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) != b"\n":
+                        lines = "\n" + lines
+                file.write(lines.encode())
+
+    def discard(self) -> None:
+        """
+        Removes the checkpoint, after the comparison is done and its results are available.
+        """
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+            self.logger.info(f"Discarded checkpoint {self.key}")
+
+    def _save_result(self, position: int, result: MetricResult) -> None:
+        arrays = {
+            "reference_input timestamps": result.reference_input.timestamps,
+            "reference_input values": result.reference_input.values,
+            "evaluated_input timestamps": result.evaluated_input.timestamps,
+            "evaluated_input values": result.evaluated_input.values,
+            "result timestamps": result.result.timestamps,
+            "result values": result.result.values
+        }
+        for key, value in result.result_metadata.items():
+            arrays[f"result_metadata {key} timestamps"] = value.timestamps
+            arrays[f"result_metadata {key} values"] = value.values
+        for key, value in result.input_metadata.items():
+            arrays[f"input_metadata {key} timestamps"] = value.timestamps
+            arrays[f"input_metadata {key} values"] = value.values
+
+        filename = f"{self.path}/{position}.npz"
+        temporary_filename = f"{filename}.tmp"
+        with open(temporary_filename, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporary_filename, filename)
+
+    def _load_result(self, position: int) -> MetricResult | None:
+        filename = f"{self.path}/{position}.npz"
+        try:
+            arrays = dict(np.load(filename))
+        except (OSError, ValueError):
+            self.logger.error(
+                f"Could not read result of pair {position} from checkpoint {self.key}, comparing it again")
+            return None
+
+        def signal_data(prefix: str) -> SignalData:
+            return SignalData(arrays[f"{prefix} timestamps"], arrays[f"{prefix} values"])
+
+        result_metadata = {}
+        input_metadata = {}
+        for name in arrays:
+            if not name.endswith(" timestamps"):
+                continue
+            prefix = name[:-len(" timestamps")]
+            if prefix.startswith("result_metadata "):
+                result_metadata[prefix[len("result_metadata "):]] = signal_data(
+                    prefix)
+            elif prefix.startswith("input_metadata "):
+                input_metadata[prefix[len("input_metadata "):]] = signal_data(
+                    prefix)
+
+        return MetricResult(signal_data("reference_input"), signal_data("evaluated_input"),
+                            signal_data("result"), result_metadata, input_metadata)
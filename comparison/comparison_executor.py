@@ -1,8 +1,10 @@
 
+from functools import partial
 from logging import getLogger
+import os
+import time
 
 from PySide6.QtCore import QObject, Signal, QThread
-from more_itertools import chunked, flatten
 
 from .metrics import DataProcessor
 from comparison.metrics.metric_result import MetricResult
@@ -15,12 +17,17 @@ from measurement.channel.channel_data_repository import ChannelDataRepository
 from measurement.channel.channel_processor import ChannelProcessor
 
 from .comparison import Comparison
+from .comparison_checkpoint import ComparisonCheckpoint
 from .comparison_result import ComparisonResult
+from .comparison_scheduler import ComparisonScheduler, WorkUnit
+from .comparison_worker_pool import ComparisonWorkerPool, PairLimits, SkippedPair
+from .pair_summary import PairSummary
 from .metrics.metric import Metric
 
 import numpy as np
 
 import multiprocessing as mp
+from typing import Callable
 
 
 class ComparisonExecutor(QThread):
@@ -57,7 +64,7 @@ class ComparisonExecutor(QThread):
 
 class MultiComparisonExecutor(QThread):
     """
-    A QThread subclass that executes multiple comparisons in parallel using a multiprocessing pool.
+    A QThread subclass that executes multiple comparisons in parallel using a ComparisonWorkerPool.
     This class handles the execution of a list of comparisons, emitting signals for both
     individual comparison completion and overall completion of all comparisons.
     Signals:
@@ -65,6 +72,10 @@ class MultiComparisonExecutor(QThread):
         doneAll (list): Emitted when all comparisons are completed, containing all results.
     Args:
         comparisons (list[Comparison]): A list of Comparison objects to be executed.
+        limits (PairLimits): Time and memory limits for each channel pair. Pairs exceeding them are skipped,
+            and recorded in the ComparisonResult. Defaults to PairLimits.default for the number of workers.
+        resumable (bool): Whether finished pairs are checkpointed, such that restarting the same comparisons after
+            a crash skips the pairs that were already finished. The checkpoints are discarded once all comparisons are done.
     Attributes:
         comparisons (list[Comparison]): The list of comparisons to be executed.
         logger (Logger): Logger instance for this class.
@@ -73,29 +84,41 @@ class MultiComparisonExecutor(QThread):
     donePart = Signal(ComparisonResult)
     doneAll = Signal(list)
 
-    def __init__(self, comparisons: list[Comparison]):
+    def __init__(self, comparisons: list[Comparison], limits: PairLimits | None = None, resumable: bool = True):
         super().__init__()
         self.comparisons = comparisons
+        self.limits = limits
+        self.resumable = resumable
         self.logger = getLogger(__name__)
         self.comparison_results = []
 
     def run(self) -> None:
-        pool = mp.Pool(mp.cpu_count() // 2)
         self.logger.info(f"Starting {len(self.comparisons)} comparisons")
-        for comparison in self.comparisons:
-            comparison_result = execute_comparison(comparison, pool)
-            if comparison_result is not None:
-                self.logger.info(f"Comparison done: {comparison_result.name}")
-                self.comparison_results.append(comparison_result)
-                self.donePart.emit(comparison_result)
-            else:
-                self.logger.warning(
-                    f"Comparison failed: {comparison.ref_measurement.name} - {comparison.eval_measurement.name} ({str(comparison.metric)})")
+        checkpoints = []
+        with ComparisonWorkerPool(max(1, mp.cpu_count() // 2), self.limits) as pool:
+            for comparison in self.comparisons:
+                checkpoint = None
+                if self.resumable and comparison.metric is not None:
+                    checkpoint = ComparisonCheckpoint(comparison)
+                    checkpoints.append(checkpoint)
+                comparison_result = execute_comparison(
+                    comparison, pool, checkpoint)
+                if comparison_result is not None:
+                    self.logger.info(
+                        f"Comparison done: {comparison_result.name}")
+                    self.comparison_results.append(comparison_result)
+                    self.donePart.emit(comparison_result)
+                else:
+                    self.logger.warning(
+                        f"Comparison failed: {comparison.ref_measurement.name} - {comparison.eval_measurement.name} ({str(comparison.metric)})")
         self.logger.info("All comparisons done")
         self.doneAll.emit(self.comparison_results)
+        for checkpoint in checkpoints:
+            checkpoint.discard()
 
 
-def execute_comparison(comparison: Comparison, pool) -> ComparisonResult:
+def execute_comparison(comparison: Comparison, pool: ComparisonWorkerPool | None,
+                       checkpoint: ComparisonCheckpoint | None = None) -> ComparisonResult:
     """Executes a comparison between two measurements using a specified metric.
     This function is used in the comparison tool to perform channel-by-channel comparisons 
     between reference and evaluation measurements. It supports both single-threaded and 
@@ -103,21 +126,29 @@ def execute_comparison(comparison: Comparison, pool) -> ComparisonResult:
     Args:
         comparison (Comparison): Object containing reference measurement, evaluation measurement, 
                                metric and synchronization blocks information.
-        pool: Multiprocessing pool for parallel execution. If None, runs in single thread.
+        pool (ComparisonWorkerPool | None): Worker pool for parallel execution. If None, runs in single thread.
+        checkpoint (ComparisonCheckpoint | None): If given, pairs finished in a previous run are loaded from it
+            instead of being compared again, and each finished work unit is added to it.
     Returns:
         ComparisonResult: Object containing all individual channel comparison results and total metrics.
                          Returns None if no channels to compare or sample rates don't match.
     Notes:
         - Both measurements must have matching sample rates
-        - Channels are processed in chunks for better performance
+        - Channel pairs are split into work units by the ComparisonScheduler, based on their estimated cost.
+          The most expensive units are dispatched first, and idle workers pick up the next unit as soon as they are done.
         - Used in comparison_tool.py when executing measurement comparisons
-        - Handles automatic chunking of channel pairs for parallel processing
+        - The results are added in the original order of the channel pairs, independent of the order they finish in
+        - Pairs exceeding the limits of the pool are added as skipped pairs to the result, with the reason
+        - A PairSummary of each compared pair is computed as soon as its work unit is done
     Example usage:
-        result = execute_comparison(comparison_obj, multiprocessing.Pool())
+        result = execute_comparison(comparison_obj, ComparisonWorkerPool(4))
     """
     logger = getLogger(__name__)
     comparison_result = ComparisonResult(
         f"{comparison.ref_measurement.name} - {comparison.eval_measurement.name} ({str(comparison.metric)})")
+    comparison_result.ref_measurement_name = comparison.ref_measurement.name
+    comparison_result.eval_measurement_name = comparison.eval_measurement.name
+    comparison_result.metric_name = str(comparison.metric)
     channel_pairs = comparison.get_channels()
     metric: Metric = comparison.metric
     ref_measurement = comparison.ref_measurement
@@ -133,59 +164,180 @@ def execute_comparison(comparison: Comparison, pool) -> ComparisonResult:
         logger.error("Sample rates of measurements do not match")
         return None
 
-    chunk_size = 250 if len(
-        channel_pairs) > 500 else max(1, len(channel_pairs) // 4)
-
-    chunks = list(chunked(channel_pairs, chunk_size))
-    logger.info(f"Comparing {len(channel_pairs)} channels in {len(chunks)} chunks")
+    results = [None] * len(channel_pairs)
+    if checkpoint is not None:
+        for position, pair_result in checkpoint.load().items():
+            results[position] = pair_result
+    remaining = [position for position, pair_result in enumerate(results)
+                 if pair_result is None]
+
+    workers = 1 if pool is None else pool.processes
+    scheduler = ComparisonScheduler(
+        metric, comparison.sync_blocks, comparison.sample_rate, workers)
+    units = scheduler.plan([channel_pairs[position]
+                           for position in remaining])
+    for unit in units:
+        unit.positions = [remaining[position] for position in unit.positions]
+    logger.info(
+        f"Comparing {len(remaining)} channels in {len(units)} work units")
+
+    start_time = time.perf_counter()
 
     if pool is None:
         logger.info("Running comparison in single thread")
-        results = [compare_chunk(
-            chunk, metric, comparison.sync_blocks) for chunk in chunks]
+        unit_results = map(partial(compare_work_unit, metric=metric,
+                                   sync_blocks=comparison.sync_blocks), units)
     else:
-        results = pool.starmap(compare_chunk, [(
-            chunk, metric, comparison.sync_blocks) for chunk in chunks])
-
-    for ref_ch, eval_ch, result in flatten(results):
-        comparison_result.add_result(ref_ch, eval_ch, result)
+        unit_results = pool.imap_units(units, partial(
+            compare_chunk, metric=metric, sync_blocks=comparison.sync_blocks, limits=pool.limits))
+
+    summaries: dict[int, PairSummary] = {}
+    for positions, unit_result, worker, busy_time in unit_results:
+        scheduler.record(worker, busy_time)
+        for position, pair_result in zip(positions, unit_result):
+            results[position] = pair_result
+            ref_ch, eval_ch, result = pair_result
+            if not isinstance(result, SkippedPair):
+                summaries[position] = PairSummary.from_result(
+                    ref_ch, eval_ch, result)
+        if checkpoint is not None:
+            checkpoint.save(positions, unit_result)
+
+    scheduler.log_utilization(time.perf_counter() - start_time)
+
+    for position, (ref_ch, eval_ch, result) in enumerate(results):
+        if isinstance(result, SkippedPair):
+            comparison_result.add_skipped(ref_ch, eval_ch, result.reason)
+            continue
+        comparison_result.add_result(
+            ref_ch, eval_ch, result, summaries.get(position))
+
+    if len(comparison_result.skipped_results) > 0:
+        logger.warning(
+            f"Skipped {len(comparison_result.skipped_results)} of {len(channel_pairs)} pairs")
 
     logger.info("Comparison done")
     comparison_result.calculate_total()
     return comparison_result
 
 
-def compare_chunk(chunk: list[tuple[Channel, Channel]], metric: Metric, sync_blocks: list[SyncBlock]) -> list[tuple[ChannelData, ChannelData, MetricResult]]:
+def compare_work_unit(unit: WorkUnit, metric: Metric, sync_blocks: list[SyncBlock]) -> tuple[list[int], list[tuple[ChannelData, ChannelData, MetricResult]], int, float]:
+    """
+    Compares the pairs of a work unit. Runs inside the worker processes.
+    Returns:
+        tuple: The positions of the pairs, their results, the id of the worker process and the time spent on the unit.
+    """
+    start_time = time.perf_counter()
+    results = compare_chunk(unit.pairs, metric, sync_blocks)
+    return unit.positions, results, os.getpid(), time.perf_counter() - start_time
+
+
+def compare_chunk(chunk: list[tuple[Channel, Channel]], metric: Metric, sync_blocks: list[SyncBlock], limits: PairLimits | None = None,
+                  on_pair_start: Callable[[int], None] | None = None) -> list[tuple[ChannelData, ChannelData, MetricResult | SkippedPair]]:
+    """
+    Compares a list of channel pairs with the given metric, after applying the sync blocks.
+    Args:
+        chunk (list[tuple[Channel, Channel]]): The channel pairs to compare.
+        metric (Metric): The metric to compare with.
+        sync_blocks (list[SyncBlock]): The sync blocks applied to each pair.
+        limits (PairLimits | None): If the estimated memory of a pair exceeds the memory limit, it is skipped.
+        on_pair_start (Callable[[int], None] | None): Called with the index of each pair before it is compared.
+    Returns:
+        list: A (ref_data, eval_data, result) tuple per pair, where result is a SkippedPair if the pair was skipped.
+            If the data of a skipped pair could not be loaded, its channels take the place of the data.
+    """
     logger = getLogger("Compare Chunk")
     logger.info(f"Comparing chunk with {len(chunk)} pairs")
     results = []
     repository = ChannelDataRepository()
     processor = DataProcessor()
-    for ref_channel, eval_channel in chunk:
-        ref_chdata = repository.load_from_channel(ref_channel)
-        eval_chdata = repository.load_from_channel(eval_channel)
-        if len(ref_chdata.timestamps()) < 10 or len(eval_chdata.timestamps()) < 10:
-            logger.warning(
-                f"Channel {ref_chdata.name} is very short ({len(ref_chdata.timestamps())} samples, {len(eval_chdata.timestamps())} samples)")
-
-        final_result = None
-        sync_ref_data = SignalData.empty()
-        sync_eval_data = SignalData.empty()
-        ref_data = SignalData.from_channel_data(ref_chdata)
-        eval_data = SignalData.from_channel_data(eval_chdata)
-        for sync_block in sync_blocks:
-            block_ref_data, block_eval_data = processor.apply_sync_block(
-                ref_data, eval_data, sync_block)
-            sync_ref_data = processor.concat_signal_data(
-                sync_ref_data, block_ref_data)
-            sync_eval_data = processor.concat_signal_data(
-                sync_eval_data, block_eval_data)
-
-        final_result = metric(sync_ref_data, sync_eval_data)
+    for i, (ref_channel, eval_channel) in enumerate(chunk):
+        if on_pair_start is not None:
+            on_pair_start(i)
+        # skipped pairs keep their channels in place of the data if it could not be loaded
+        ref_chdata, eval_chdata = ref_channel, eval_channel
+        # a failing pair must not end the worker, which would be reported as a crash
+        try:
+            loaded = load_synced_pair(
+                ref_channel, eval_channel, sync_blocks, repository, processor)
+            if loaded is None:
+                # a linked channel whose MDF file was moved or changed is named in the reason
+                reason = repository.link_error(ref_channel.id) or repository.link_error(
+                    eval_channel.id) or "Channel data not found"
+                logger.error(f"Skipping {ref_channel.name}: {reason}")
+                results.append((ref_channel, eval_channel, SkippedPair(reason)))
+                continue
+            ref_chdata, eval_chdata, sync_ref_data, sync_eval_data = loaded
+            if len(ref_chdata.timestamps()) < 10 or len(eval_chdata.timestamps()) < 10:
+                logger.warning(
+                    f"Channel {ref_chdata.name} is very short ({len(ref_chdata.timestamps())} samples, {len(eval_chdata.timestamps())} samples)")
+
+            if limits is not None and limits.memory_limit is not None:
+                estimated_memory = metric.estimate_memory(len(sync_ref_data))
+                if estimated_memory > limits.memory_limit:
+                    reason = f"Estimated memory of {estimated_memory / 2**20:.0f}MiB exceeds the limit of {limits.memory_limit / 2**20:.0f}MiB"
+                    logger.error(f"Skipping {ref_chdata.name}: {reason}")
+                    results.append((ref_chdata, eval_chdata, SkippedPair(reason)))
+                    continue
+
+            final_result = metric(sync_ref_data, sync_eval_data)
+        except MemoryError:
+            reason = "Ran out of memory"
+            logger.error(f"Skipping {ref_chdata.name}: {reason}")
+            results.append((ref_chdata, eval_chdata,
+                           SkippedPair(reason, recycle=True)))
+            continue
+        except Exception as error:
+            reason = f"{type(error).__name__}: {error}"
+            logger.error(f"Skipping {ref_chdata.name}: {reason}")
+            results.append((ref_chdata, eval_chdata, SkippedPair(reason)))
+            continue
         results.append((ref_chdata, eval_chdata, final_result))
     return results
 
 
+def load_synced_pair(ref_channel: Channel, eval_channel: Channel, sync_blocks: list[SyncBlock], repository: ChannelDataRepository,
+                     processor: DataProcessor) -> tuple[ChannelData, ChannelData, SignalData, SignalData] | None:
+    """
+    Loads a channel pair and applies the sync blocks to it.
+    Only the time range covered by the sync blocks is loaded from the repository, which reads only the overlapping
+    row groups of each channel. Falls back to loading the complete channels if the time step of the stored
+    channel data is unknown, or the loaded range does not contain all synchronized samples.
+    Returns:
+        tuple: The loaded reference and evaluated data, and the synchronized reference and evaluated data.
+            None if the data of one of the channels could not be found.
+    """
+    time_step = repository.time_step(ref_channel.id)
+    if len(sync_blocks) > 0 and time_step is not None and repository.time_step(eval_channel.id) is not None:
+        # the margin covers samples selected by rounding the block boundaries to sample indices
+        margin = 2 * time_step
+        ref_chdata = repository.load_from_channel(ref_channel, min(sync_block.ref_start for sync_block in sync_blocks) - margin,
+                                                  max(sync_block.ref_end for sync_block in sync_blocks) + margin)
+        eval_chdata = repository.load_from_channel(eval_channel, min(sync_block.eval_start for sync_block in sync_blocks) - margin,
+                                                   max(sync_block.eval_end for sync_block in sync_blocks) + margin)
+        if ref_chdata is None or eval_chdata is None:
+            return None
+        ref_data = SignalData.from_channel_data(ref_chdata)
+        eval_data = SignalData.from_channel_data(eval_chdata)
+        sync_plan = processor.get_sync_plan(sync_blocks, ref_data, eval_data, time_step,
+                                            repository.sample_count(ref_channel.id), repository.sample_count(eval_channel.id))
+        if processor.plan_covers(sync_plan, ref_chdata.offset, len(ref_data), eval_chdata.offset, len(eval_data)):
+            sync_ref_data, sync_eval_data = processor.apply_sync_plan(
+                sync_plan, ref_data, eval_data, ref_chdata.offset, eval_chdata.offset)
+            return ref_chdata, eval_chdata, sync_ref_data, sync_eval_data
+
+    ref_chdata = repository.load_from_channel(ref_channel)
+    eval_chdata = repository.load_from_channel(eval_channel)
+    if ref_chdata is None or eval_chdata is None:
+        return None
+    ref_data = SignalData.from_channel_data(ref_chdata)
+    eval_data = SignalData.from_channel_data(eval_chdata)
+    sync_plan = processor.get_sync_plan(sync_blocks, ref_data, eval_data)
+    sync_ref_data, sync_eval_data = processor.apply_sync_plan(
+        sync_plan, ref_data, eval_data)
+    return ref_chdata, eval_chdata, sync_ref_data, sync_eval_data
+
+
 def compare_individual(ref_channel: ChannelData, eval_channel: ChannelData, metric: Metric, sync_block: SyncBlock):
     logger = getLogger("Compare Chunk")
     data_processor = DataProcessor()
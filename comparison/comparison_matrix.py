@@ -0,0 +1,235 @@
+from dataclasses import dataclass, field
+from functools import partial
+from logging import getLogger
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+from comparison.metrics.data_processor import DataProcessor
+from comparison.metrics.metric import Metric
+from comparison.metrics.signal_data import SignalData
+from comparison.sync_block import SyncBlock
+from measurement.channel.channel import Channel
+from measurement.channel.channel_data import ChannelData
+from measurement.channel.channel_data_repository import ChannelDataRepository
+from measurement.measurement import Measurement
+
+
+@dataclass
+class ComparisonMatrix():
+    """
+    The similarity of every reference measurement to every evaluated measurement.
+    Each entry is the average metric result of the channel pair, like ComparisonResult.result_average.
+    Attributes:
+        metric (str): Name of the metric used.
+        ref_names (list[str]): Names of the reference measurements, one per row.
+        eval_names (list[str]): Names of the evaluated measurements, one per column.
+        channel_matrices (dict[str, np.ndarray]): A matrix per channel name. Entries are NaN where one of the
+            measurements does not contain the channel.
+        overall (np.ndarray): The average of all channel matrices, ignoring missing channels.
+    """
+    metric: str
+    ref_names: list[str]
+    eval_names: list[str]
+    channel_matrices: dict[str, np.ndarray] = field(default_factory=dict)
+    overall: np.ndarray | None = None
+
+    def calculate_overall(self) -> None:
+        shape = (len(self.ref_names), len(self.eval_names))
+        sums = np.zeros(shape)
+        counts = np.zeros(shape)
+        for matrix in self.channel_matrices.values():
+            valid = ~np.isnan(matrix)
+            sums[valid] += matrix[valid]
+            counts += valid
+        self.overall = np.full(shape, np.nan)
+        np.divide(sums, counts, out=self.overall, where=counts > 0)
+
+    def to_dataframe(self, channel: str | None = None) -> pd.DataFrame:
+        """
+        Returns the matrix of the given channel, or the overall matrix if no channel is given,
+        with the reference measurements as index and the evaluated measurements as columns.
+        """
+        matrix = self.overall if channel is None else self.channel_matrices[channel]
+        return pd.DataFrame(matrix, index=self.ref_names, columns=self.eval_names)
+
+
+@dataclass
+class MatrixTask():
+    """
+    All pairs of one channel name, which are compared by one worker in one go.
+    Attributes:
+        name (str): The channel name.
+        ref_channels (list[tuple[int, Channel]]): The row and channel of each reference measurement containing the channel.
+        eval_channels (list[tuple[int, Channel]]): The column and channel of each evaluated measurement containing the channel.
+        sync_blocks (dict[tuple[int, int], SyncBlock]): The sync block of each (row, column) pair.
+        shape (tuple[int, int]): Number of reference and evaluated measurements.
+        cost (float): Estimated cost of all pairs of the task.
+    """
+    name: str
+    shape: tuple[int, int]
+    ref_channels: list[tuple[int, Channel]] = field(default_factory=list)
+    eval_channels: list[tuple[int, Channel]] = field(default_factory=list)
+    sync_blocks: dict[tuple[int, int], SyncBlock] = field(default_factory=dict)
+    cost: float = 0
+
+
+def execute_matrix(ref_measurements: list[Measurement], eval_measurements: list[Measurement] | None, metric: Metric,
+                   processes: int = 1, start_times: dict[str, float] | None = None) -> ComparisonMatrix:
+    """
+    Compares every reference measurement with every evaluated measurement, e.g. to cluster many runs of the same test.
+    In contrast to executing a Comparison per pair, the work is split by channel name: each task loads a channel
+    from all measurements once, prepares each reference channel once (see Metric.prepare), and compares it with
+    the channel of every evaluated measurement. Tasks are dispatched in the order of their estimated cost.
+    Each pair is compared from its start times until the end of the shorter measurement, like a Comparison without
+    sync blocks in the GUI.
+    Args:
+        ref_measurements (list[Measurement]): The measurements used as ground truth, one per row.
+        eval_measurements (list[Measurement] | None): The measurements compared with them, one per column.
+            If None, all reference measurements are compared with each other.
+        metric (Metric): The metric to compare with.
+        processes (int): Number of worker processes. If 1, runs in a single thread.
+        start_times (dict[str, float] | None): Time in seconds at which each measurement, given by its id, starts. Defaults to 0.
+    Returns:
+        ComparisonMatrix: The similarity per channel and overall. Returns None if the sample rates don't match.
+    Example usage:
+        matrix = execute_matrix(measurements, None, PearsonCorrelationMetric(), processes=8)
+        matrix.to_dataframe().to_csv("matrix.csv")
+    """
+    logger = getLogger(__name__)
+    if eval_measurements is None:
+        eval_measurements = ref_measurements
+    if start_times is None:
+        start_times = {}
+
+    sample_rates = {measurement.sample_rate for measurement in ref_measurements + eval_measurements}
+    if len(sample_rates) > 1:
+        logger.error("Sample rates of measurements do not match")
+        return None
+
+    tasks = plan_matrix(ref_measurements, eval_measurements,
+                        metric, start_times)
+    logger.info(
+        f"Comparing {len(ref_measurements)}x{len(eval_measurements)} measurements in {len(tasks)} channel tasks")
+
+    matrix = ComparisonMatrix(str(metric), [measurement.name for measurement in ref_measurements],
+                              [measurement.name for measurement in eval_measurements])
+    compare = partial(compare_matrix_task, metric=metric)
+    if processes <= 1:
+        task_results = map(compare, tasks)
+        for name, channel_matrix in task_results:
+            matrix.channel_matrices[name] = channel_matrix
+    else:
+        with mp.Pool(processes) as pool:
+            for name, channel_matrix in pool.imap_unordered(compare, tasks):
+                matrix.channel_matrices[name] = channel_matrix
+
+    matrix.channel_matrices = {name: matrix.channel_matrices[name] for name in sorted(
+        matrix.channel_matrices)}
+    matrix.calculate_overall()
+    logger.info("Matrix comparison done")
+    return matrix
+
+
+def plan_matrix(ref_measurements: list[Measurement], eval_measurements: list[Measurement], metric: Metric,
+                start_times: dict[str, float]) -> list[MatrixTask]:
+    """
+    Creates a task per channel name contained in at least one reference and one evaluated measurement,
+    ordered by descending cost.
+    """
+    repository = ChannelDataRepository()
+    shape = (len(ref_measurements), len(eval_measurements))
+    tasks: dict[str, MatrixTask] = {}
+    for row, measurement in enumerate(ref_measurements):
+        for channel in measurement.channels:
+            tasks.setdefault(channel.name, MatrixTask(
+                channel.name, shape)).ref_channels.append((row, channel))
+    for column, measurement in enumerate(eval_measurements):
+        for channel in measurement.channels:
+            if channel.name in tasks:
+                tasks[channel.name].eval_channels.append((column, channel))
+
+    tasks = {name: task for name, task in tasks.items()
+             if len(task.eval_channels) > 0}
+
+    pair_blocks: dict[tuple[int, int], SyncBlock] = {}
+    for row, ref_measurement in enumerate(ref_measurements):
+        for column, eval_measurement in enumerate(eval_measurements):
+            ref_start = start_times.get(ref_measurement.id, 0)
+            eval_start = start_times.get(eval_measurement.id, 0)
+            sync_time = min(ref_measurement.length - ref_start,
+                            eval_measurement.length - eval_start)
+            pair_blocks[(row, column)] = SyncBlock(
+                ref_start, ref_start + sync_time, eval_start, eval_start + sync_time)
+
+    sample_rate = ref_measurements[0].sample_rate if len(
+        ref_measurements) > 0 else 0
+    for task in tasks.values():
+        for row, ref_channel in task.ref_channels:
+            ref_samples = repository.sample_count(ref_channel.id)
+            for column, _ in task.eval_channels:
+                sync_block = pair_blocks[(row, column)]
+                task.sync_blocks[(row, column)] = sync_block
+                synced_samples = int(
+                    (sync_block.ref_end - sync_block.ref_start) * sample_rate)
+                task.cost += metric.estimate_cost(
+                    min(ref_samples, synced_samples))
+
+    return sorted(tasks.values(), key=lambda task: task.cost, reverse=True)
+
+
+def compare_matrix_task(task: MatrixTask, metric: Metric) -> tuple[str, np.ndarray]:
+    """
+    Compares all pairs of a channel name. Runs inside the worker processes.
+    Each channel is loaded once, and each reference channel is prepared once per distinct synchronized section.
+    Returns:
+        tuple: The channel name and its matrix, where rows are reference and columns are evaluated measurements.
+    """
+    logger = getLogger("Compare Matrix")
+    repository = ChannelDataRepository()
+    processor = DataProcessor()
+
+    matrix = np.full(task.shape, np.nan)
+
+    loaded: dict[str, ChannelData] = {}
+
+    def load(channel: Channel) -> SignalData | None:
+        if channel.id not in loaded:
+            loaded[channel.id] = repository.load_from_channel(channel)
+        if loaded[channel.id] is None:
+            return None
+        return SignalData.from_channel_data(loaded[channel.id])
+
+    eval_data = {column: load(channel)
+                 for column, channel in task.eval_channels}
+
+    for row, ref_channel in task.ref_channels:
+        ref_data = load(ref_channel)
+        if ref_data is None:
+            continue
+        prepared = {}
+        for column, _ in task.eval_channels:
+            if eval_data[column] is None:
+                continue
+            sync_block = task.sync_blocks[(row, column)]
+            try:
+                sync_ref_data, sync_eval_data = processor.apply_sync_block(
+                    ref_data, eval_data[column], sync_block)
+            except ValueError as error:
+                logger.warning(
+                    f"Could not synchronize channel {task.name} for pair ({row}, {column}): {error}")
+                continue
+            if len(sync_ref_data) == 0 or len(sync_ref_data) != len(sync_eval_data):
+                logger.warning(
+                    f"Channel {task.name} has no common samples for pair ({row}, {column})")
+                continue
+
+            section = (sync_block.ref_start, len(sync_ref_data))
+            if section not in prepared:
+                prepared[section] = metric.prepare(sync_ref_data)
+            result = metric.compare_prepared(
+                prepared[section], sync_eval_data)
+            matrix[row, column] = float(result.result.values.mean())
+
+    return task.name, matrix
@@ -5,19 +5,30 @@ from PySide6 import QtWidgets as w
 from PySide6.QtCore import Signal, QObject, QThread
 import PySide6.QtAsyncio as QtAsyncio
 
-from comparison.comparison_result import ComparisonResult
+from comparison.comparison_result import ComparisonResult, BAND_PERCENTILES
+from comparison.lazy_comparison_result import LazyChannelData, LazyComparisonResult, LazyMetricResult
 
 import numpy as np
 import pandas as pd
 import os
 import hashlib
 import json
+import threading
+import time
 
+from comparison.comparison_catalog import CatalogEntry, ComparisonCatalog
 from comparison.metrics.metric_result import MetricResult
 from comparison.metrics.signal_data import SignalData
+from comparison.pair_result_store import PairResultStore, replace_durably, write_json_durably
+from comparison.pair_summary import PairSummary, SUMMARY_THRESHOLDS
+from measurement.channel.channel import Channel
 from measurement.channel.channel_data_repository import ChannelDataRepository
 
 
+# Number of comparisons saved at the same time. Saving is mostly bound by the disk, more threads would only compete for it.
+MAX_CONCURRENT_SAVES = 2
+
+
 class ComparisonRepository(QObject):
     """
     The ComparisonRepository is responsible for storing all ComparisonResults.
@@ -25,9 +36,19 @@ class ComparisonRepository(QObject):
     and can be retrieved at a later stage.
     Each ComparisonResult is identified by its name, therefore the name must be unique, and saving a comparison
     with the same name again will overwrite the previously saved one.
+    Saves are queued and run in up to MAX_CONCURRENT_SAVES threads, saves of the same name one after another.
+    The saved comparisons are listed in a ComparisonCatalog, which is updated with each save and removal, such
+    that the repository starts without reading the files of each comparison.
+    Signals:
+        loadingDone (ComparisonResult): Emitted when a comparison was loaded.
+        listUpdated: Emitted when a comparison was added or removed.
+        saveProgress (str, int): The name of a comparison being saved and the percentage of saved channel pairs.
+        saveDone (str): The name of a comparison once it is completely saved.
     """
     loadingDone = Signal(ComparisonResult)
     listUpdated = Signal()
+    saveProgress = Signal(str, int)
+    saveDone = Signal(str)
     initialized = False
 
     def __new__(cls) -> 'ComparisonRepository':
@@ -43,15 +64,16 @@ class ComparisonRepository(QObject):
             self.comparison_names = []
             self.logger = getLogger(__name__)
             self.base_path = f"{os.getcwd()}/comparisons"
-            self.save_worker = None
+            self.save_queue: list[ComparisonResult] = []
+            self.save_workers: dict[str, ComparisonSaveWorker] = {}
             self.load_worker = None
             self._load()
 
     def save_comparison(self, comparison: ComparisonResult, sync: bool = False):
-        if self.save_worker is not None:
-            self.logger.warning("Already saving a comparison")
-            return
-
+        """
+        Saves a comparison. Unless sync is set, the save is queued and runs in a separate thread, and saveDone
+        is emitted once it is on disk.
+        """
         if comparison.name in self.comparison_names:
             self.logger.error(
                 f"Comparison with name {comparison.name} already exists, overwriting it")
@@ -59,19 +81,50 @@ class ComparisonRepository(QObject):
             self.comparison_names.append(comparison.name)
             self.listUpdated.emit()
         self.comparisons[comparison.name] = comparison
-        self.save_worker = ComparisonSaveWorker(comparison, self.base_path)
-        self.save_worker.done.connect(self.handle_saving_done)
         if sync:
-            self.save_worker.run()
-        else:
-            self.save_worker.start()
+            # queued saves of the same name are replaced by this one, a running one is finished first, see
+            # ComparisonSaveWorker.run
+            self.save_queue = [queued for queued in self.save_queue
+                               if queued.name != comparison.name]
+            ComparisonSaveWorker(comparison, self.base_path, self.catalog).run()
+            self.saveDone.emit(comparison.name)
+            return
 
-    def handle_saving_done(self):
-        self.save_worker.quit()
-        self.save_worker.wait()
-        self.save_worker.deleteLater()
-        self.save_worker = None
-        self.logger.info("Saving done")
+        self.save_queue.append(comparison)
+        self._start_saves()
+
+    @property
+    def pending_saves(self) -> int:
+        """
+        Number of comparisons that are queued or being saved.
+        """
+        return len(self.save_queue) + len(self.save_workers)
+
+    def _start_saves(self):
+        position = 0
+        while len(self.save_workers) < MAX_CONCURRENT_SAVES and position < len(self.save_queue):
+            comparison = self.save_queue[position]
+            if comparison.name in self.save_workers:
+                # saves of the same name write the same files, therefore they run one after another
+                position += 1
+                continue
+            self.save_queue.pop(position)
+            worker = ComparisonSaveWorker(
+                comparison, self.base_path, self.catalog)
+            worker.progress.connect(self.saveProgress)
+            worker.done.connect(self.handle_saving_done)
+            self.save_workers[comparison.name] = worker
+            worker.start()
+
+    def handle_saving_done(self, name: str):
+        worker = self.save_workers.pop(name)
+        worker.quit()
+        worker.wait()
+        worker.deleteLater()
+        self.logger.info(
+            f"Saving {name} done, {self.pending_saves} saves pending")
+        self.saveDone.emit(name)
+        self._start_saves()
 
     def load_comparison(self, name: str) -> ComparisonResult:
         """
@@ -101,7 +154,8 @@ class ComparisonRepository(QObject):
     def get_comparison_sync(self, name: str) -> ComparisonResult:
         """
         Gets a comparison from the loaded comparisons or from persistent storage.
-        If it is loaded from persistent storage, the execution of this function takes over 5 seconds.
+        Comparisons saved with summaries are opened lazily, see LazyComparisonResult. Older comparisons are loaded
+        completely, which takes over 5 seconds.
         """
         if name not in self.comparison_names:
             self.logger.error(f"Could not find comparison {name}")
@@ -141,41 +195,87 @@ class ComparisonRepository(QObject):
                 f"Base Path {self.base_path} does not exist yet. Creating it now")
             os.mkdir(self.base_path)
 
-        comparison_names = []
+        self.catalog = ComparisonCatalog(f"{self.base_path}/catalog.sqlite")
+
+        # the overview is the last file of a save and the first one removed, therefore the saved comparisons are
+        # exactly those with an overview. Comparisons saved before the catalog existed, or whose catalog update
+        # was interrupted, are added to it, without reading the files of the catalogued ones.
+        ids = {filename[:-len("_overview.json")] for filename in os.listdir(self.base_path)
+               if filename.endswith("_overview.json")}
+        entries = self.catalog.entries()
+        catalogued = {entry.id for entry in entries}
+        stale = [entry.name for entry in entries if entry.id not in ids]
+        if len(stale) > 0:
+            self.logger.info(
+                f"Removing {len(stale)} comparisons without files from the catalog")
+            self.catalog.remove_many(stale)
 
-        for _, _, files in os.walk(self.base_path):
-            for filename in files:
-                if filename.endswith("_overview.json"):
-                    json_data = json.load(open(f"{self.base_path}/{filename}"))
-                    comparison_names.append(json_data["name"])
+        missing = [read_catalog_entry(self.base_path, id)
+                   for id in sorted(ids - catalogued)]
+        missing = [entry for entry in missing if entry is not None]
+        if len(missing) > 0:
+            self.logger.info(
+                f"Adding {len(missing)} comparisons to the catalog")
+            self.catalog.put_many(missing)
 
-        self.logger.info(f"Found {len(comparison_names)} comparisons")
-        self.comparison_names = comparison_names
+        self.comparison_names = [entry.name for entry in entries if entry.id in ids] + \
+            [entry.name for entry in missing]
+        self.logger.info(f"Found {len(self.comparison_names)} comparisons")
 
-    def first_measurement(self, comparison: str):
-        if comparison not in self.comparison_names:
-            self.logger.error(f"Could not find comparison {comparison}")
-            return None
-        part = comparison.split("-")
-        return part[0].strip()
+    def catalog_entries(self) -> list[CatalogEntry]:
+        """
+        Returns the catalog entries of all saved comparisons, with their measurements, metric, creation time,
+        number of pairs and score, ordered by name.
+        """
+        return self.catalog.entries()
 
-    def second_measurement(self, comparison: str):
-        if comparison not in self.comparison_names:
-            self.logger.error(f"Could not find comparison {comparison}")
+    def load_summaries(self, name: str) -> list[PairSummary] | None:
+        """
+        Returns the summaries of the channel pairs of a comparison, without loading its results.
+        Comparisons saved before summaries were introduced have no summaries file, for them the comparison is
+        loaded completely.
+        """
+        if name not in self.comparison_names:
+            self.logger.error(f"Could not find comparison {name}")
             return None
 
-        part = comparison.split("-")
-        part = part[1].split("(")
-        return part[0].strip()
+        if name in self.comparisons:
+            return self.comparisons[name].summaries
 
-    def metric_used(self, comparison: str):
+        id = hashlib.sha256(name.encode()).hexdigest()
+        summaries = read_summaries(f"{self.base_path}/{id}_summaries.json")
+        if summaries is not None:
+            return summaries
+
+        self.logger.info(
+            f"No summaries stored for comparison {name}, loading it")
+        comparison = self.get_comparison_sync(name)
+        return comparison.summaries if comparison is not None else None
+
+    def _catalog_entry(self, comparison: str) -> CatalogEntry | None:
         if comparison not in self.comparison_names:
             self.logger.error(f"Could not find comparison {comparison}")
             return None
+        entry = self.catalog.get(comparison)
+        if entry is None and comparison in self.comparisons:
+            # still being saved
+            result = self.comparisons[comparison]
+            entry = CatalogEntry(comparison, hashlib.sha256(comparison.encode()).hexdigest(),
+                                 result.ref_measurement_name, result.eval_measurement_name, result.metric_name,
+                                 time.time(), len(result.channel_results), comparison_score(result.result.values))
+        return entry
+
+    def first_measurement(self, comparison: str):
+        entry = self._catalog_entry(comparison)
+        return entry.ref_measurement if entry is not None else None
 
-        part = "(".join(comparison.split("(")[1:])
-        part = ")".join(part.split(")")[:-1])
-        return part.strip()
+    def second_measurement(self, comparison: str):
+        entry = self._catalog_entry(comparison)
+        return entry.eval_measurement if entry is not None else None
+
+    def metric_used(self, comparison: str):
+        entry = self._catalog_entry(comparison)
+        return entry.metric if entry is not None else None
 
     def remove_comparison(self, name: str):
         if name not in self.comparison_names:
@@ -191,15 +291,82 @@ class ComparisonRepository(QObject):
         overall_result_filename = f"{self.base_path}/{id}_overall_result.parquet"
         channel_id_pairs_filename = f"{self.base_path}/{id}_channel_id_pairs.json"
         overview_filename = f"{self.base_path}/{id}_overview.json"
+        summaries_filename = f"{self.base_path}/{id}_summaries.json"
 
-        os.remove(channel_results_filename)
+        self.catalog.remove(name)
+        # without its overview, the comparison is not listed anymore, even if removing the other files is interrupted
+        os.remove(overview_filename)
+        if os.path.exists(channel_results_filename):
+            os.remove(channel_results_filename)
+        PairResultStore(self.base_path, id).remove()
         os.remove(overall_result_filename)
         os.remove(channel_id_pairs_filename)
-        os.remove(overview_filename)
+        if os.path.exists(summaries_filename):
+            os.remove(summaries_filename)
 
         self.listUpdated.emit()
 
 
+def parse_comparison_name(name: str) -> tuple[str | None, str | None, str | None]:
+    """
+    Recovers the measurements and the metric from the default name "<ref> - <eval> (<metric>)" of a comparison,
+    for comparisons saved before they were stored separately. Names containing "-" or "(" are not parsed correctly.
+    """
+    part = name.split("-")
+    ref_measurement = part[0].strip()
+    eval_measurement = part[1].split("(")[0].strip() if len(part) > 1 else None
+    metric = "(".join(name.split("(")[1:])
+    metric = ")".join(metric.split(")")[:-1]).strip()
+    return ref_measurement, eval_measurement, metric if metric != "" else None
+
+
+def read_catalog_entry(base_path: str, id: str) -> CatalogEntry | None:
+    """
+    Creates the catalog entry of a saved comparison from its files, for comparisons saved before the catalog existed.
+    """
+    overview_filename = f"{base_path}/{id}_overview.json"
+    try:
+        overview = json.load(open(overview_filename, "r"))
+        pairs = len(json.load(open(f"{base_path}/{id}_channel_id_pairs.json", "r"))[
+            "channel_id_pairs"])
+        values = pd.read_parquet(
+            f"{base_path}/{id}_overall_result.parquet", columns=["values"])["values"].to_numpy()
+    except (OSError, ValueError, KeyError) as exception:
+        getLogger(__name__).error(
+            f"Could not read saved comparison {id}: {exception}")
+        return None
+
+    name = overview["name"]
+    ref_measurement, eval_measurement, metric = parse_comparison_name(name)
+    created = overview.get("created", os.path.getmtime(overview_filename))
+    return CatalogEntry(name, id, overview.get("ref_measurement", ref_measurement),
+                        overview.get("eval_measurement", eval_measurement), overview.get(
+                            "metric", metric),
+                        created, pairs, comparison_score(values))
+
+
+def comparison_score(values: np.ndarray) -> float | None:
+    """
+    The score of a comparison listed in the catalog, the mean of its total result.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    return float(values.mean()) if len(values) > 0 else None
+
+
+def read_summaries(filename: str) -> list[PairSummary] | None:
+    """
+    Reads the summaries file of a saved comparison. Returns None if it does not exist, or was written with
+    different thresholds than SUMMARY_THRESHOLDS.
+    """
+    if not os.path.exists(filename):
+        return None
+    data = json.load(open(filename, "r"))
+    if data.get("thresholds") != SUMMARY_THRESHOLDS:
+        return None
+    return [PairSummary.from_dict(summary) for summary in data["summaries"]]
+
+
 class ComparisonLoadWorker(QThread):
     done = Signal(ComparisonResult)
 
@@ -217,14 +384,107 @@ class ComparisonLoadWorker(QThread):
         channel_results_filename = f"{self.base_path}/{id}_channel_results.parquet"
         overall_result_filename = f"{self.base_path}/{id}_overall_result.parquet"
         channel_id_pairs_filename = f"{self.base_path}/{id}_channel_id_pairs.json"
+        summaries = read_summaries(f"{self.base_path}/{id}_summaries.json")
+        store = PairResultStore(self.base_path, id)
 
-        channel_results = pd.read_parquet(channel_results_filename)
         overall_result = pd.read_parquet(overall_result_filename)
         channel_id_pairs = json.load(open(channel_id_pairs_filename, "r"))
         channel_id_pairs = channel_id_pairs["channel_id_pairs"]
 
+        migrate = not store.exists()
+        if not migrate and summaries is not None and \
+                [(summary.ref_id, summary.eval_id) for summary in summaries] == [(entry["ref_id"], entry["eval_id"]) for entry in store.read_index()]:
+            comparison = self._open_lazy(store, summaries)
+            self._add_overview(comparison, id, overall_result)
+            self.logger.info(f"Opened comparison {self.name}")
+            self.done.emit(comparison)
+            return
+
+        if migrate:
+            pairs = self._read_legacy_pairs(
+                channel_results_filename, channel_id_pairs)
+        else:
+            pairs = store.read_pairs()
+
         comparison = ComparisonResult(self.name)
 
+        for i, (ref_id, eval_id, channel_result, result_metadata, input_metadata) in enumerate(pairs):
+
+            if (i * 100 // len(channel_id_pairs)) != ((i - 1) * 100 // len(channel_id_pairs)):
+                self.logger.info(
+                    f"Loading comparison {(i * 100) // len(channel_id_pairs)}%")
+
+            ref_channel = self.repository.load(ref_id)
+            eval_channel = self.repository.load(eval_id)
+
+            metric_result = MetricResult(SignalData.from_channel_data(ref_channel), SignalData.from_channel_data(
+                eval_channel), channel_result, result_metadata, input_metadata)
+            summary = None
+            if summaries is not None and i < len(summaries) and \
+                    (summaries[i].ref_id, summaries[i].eval_id) == (ref_id, eval_id):
+                summary = summaries[i]
+            comparison.add_result(
+                ref_channel, eval_channel, metric_result, summary)
+
+        if migrate:
+            self.logger.info(
+                f"Migrating comparison {self.name} to one row group per channel pair")
+            store.write(comparison.channel_results)
+            os.remove(channel_results_filename)
+
+        self._add_overview(comparison, id, overall_result)
+        if len(comparison.bands) == 0:
+            comparison.calculate_bands()
+
+        self.logger.info(f"Loaded comparison {self.name}")
+
+        self.done.emit(comparison)
+
+    def _open_lazy(self, store: PairResultStore, summaries: list[PairSummary]) -> LazyComparisonResult:
+        """
+        Creates a comparison result from the summaries, whose channel data and results are loaded on demand.
+        """
+        comparison = LazyComparisonResult(self.name)
+        for position, summary in enumerate(summaries):
+            ref_channel = LazyChannelData(
+                summary.ref_id, summary.ref_name, self.repository)
+            eval_channel = LazyChannelData(
+                summary.eval_id, summary.eval_name, self.repository)
+            comparison.add_result(ref_channel, eval_channel, LazyMetricResult(
+                store, position, ref_channel, eval_channel), summary)
+        return comparison
+
+    def _add_overview(self, comparison: ComparisonResult, id: str, overall_result: pd.DataFrame) -> None:
+        """
+        Adds the skipped pairs, the total result and its bands, if they were saved, to a loaded comparison.
+        """
+        overview_filename = f"{self.base_path}/{id}_overview.json"
+        overview = json.load(open(overview_filename, "r"))
+        ref_measurement, eval_measurement, metric = parse_comparison_name(
+            self.name)
+        comparison.ref_measurement_name = overview.get(
+            "ref_measurement", ref_measurement)
+        comparison.eval_measurement_name = overview.get(
+            "eval_measurement", eval_measurement)
+        comparison.metric_name = overview.get("metric", metric)
+        for ref_id, ref_name, eval_id, eval_name, reason in overview.get("skipped_pairs", []):
+            comparison.add_skipped(Channel(ref_id, ref_name, [], {}), Channel(
+                eval_id, eval_name, [], {}), reason)
+
+        overall_result_value = overall_result["values"]
+        overall_result_timestamps = overall_result["timestamps"]
+        comparison.result = SignalData(
+            overall_result_timestamps, overall_result_value)
+        comparison.bands = {percentile: SignalData(overall_result_timestamps, overall_result[f"p{percentile}"])
+                            for percentile in BAND_PERCENTILES if f"p{percentile}" in overall_result.columns}
+
+    def _read_legacy_pairs(self, filename: str, channel_id_pairs: list[list[str]]):
+        """
+        Reads the pairs of a comparison saved as a single wide table, with the result and each metadata entry
+        of each pair in its own NaN padded columns. Yields the same tuples as PairResultStore.read_pairs.
+        """
+        channel_results = pd.read_parquet(filename)
+
         result_metadata_keys = {}
         input_metadata_keys = {}
 
@@ -250,86 +510,71 @@ class ComparisonLoadWorker(QThread):
                     input_metadata_keys[channel] = []
                 input_metadata_keys[channel].append(key)
 
-        for i, (ref_id, eval_id) in enumerate(channel_id_pairs):
-
-            if (i * 100 // len(channel_id_pairs)) != ((i - 1) * 100 // len(channel_id_pairs)):
-                self.logger.info(
-                    f"Loading comparison {(i * 100) // len(channel_id_pairs)}%")
+        def read_signal_data(prefix: str) -> SignalData:
+            timestamps = channel_results[f"{prefix} timestamps"].to_numpy()
+            values = channel_results[f"{prefix} values"].to_numpy()
+            timestamps = timestamps[~np.isnan(timestamps)]
+            values = values[~np.isnan(values)]
+            return SignalData(timestamps, values)
 
-            ref_channel = self.repository.load(ref_id)
-            eval_channel = self.repository.load(eval_id)
-            channel_result_value = channel_results[f"{ref_id} {eval_id} values"].to_numpy(
-            )
-            channel_result_timestamps = channel_results[f"{ref_id} {eval_id} timestamps"].to_numpy(
-            )
-            channel_result_value = channel_result_value[~np.isnan(
-                channel_result_value)]
-            channel_result_timestamps = channel_result_timestamps[~np.isnan(
-                channel_result_timestamps)]
-
-            channel_result = SignalData(
-                channel_result_timestamps, channel_result_value)
+        for ref_id, eval_id in channel_id_pairs:
+            channel_result = read_signal_data(f"{ref_id} {eval_id}")
             result_metadata = {}
             input_metadata = {}
 
-            if f"{ref_id} {eval_id}" not in result_metadata_keys:
-                result_metadata_keys[f"{ref_id} {eval_id}"] = []
-            if f"{ref_id} {eval_id}" not in input_metadata_keys:
-                input_metadata_keys[f"{ref_id} {eval_id}"] = []
-
-            result_metadata_keys_for_channel = result_metadata_keys[f"{ref_id} {eval_id}"]
-            input_metadata_keys_for_channel = input_metadata_keys[f"{ref_id} {eval_id}"]
-
-            for key in result_metadata_keys_for_channel:
-                timestamps = channel_results[f"{ref_id} {eval_id} result_metadata {key} timestamps"].to_numpy(
-                )
-                values = channel_results[f"{ref_id} {eval_id} result_metadata {key} values"].to_numpy(
-                )
-                timestamps = timestamps[~np.isnan(timestamps)]
-                values = values[~np.isnan(values)]
-                result_metadata[key] = SignalData(timestamps, values)
-
-            for key in input_metadata_keys_for_channel:
-                timestamps = channel_results[f"{ref_id} {eval_id} input_metadata {key} timestamps"].to_numpy(
-                )
-                values = channel_results[f"{ref_id} {eval_id} input_metadata {key} values"].to_numpy(
-                )
-                timestamps = timestamps[~np.isnan(timestamps)]
-                values = values[~np.isnan(values)]
-                input_metadata[key] = SignalData(timestamps, values)
-
-            metric_result = MetricResult(SignalData.from_channel_data(ref_channel), SignalData.from_channel_data(
-                eval_channel), channel_result, result_metadata, input_metadata)
-            comparison.add_result(ref_channel, eval_channel, metric_result)
-
-        overall_result_value = overall_result["values"]
-        overall_result_timestamps = overall_result["timestamps"]
-        comparison.result = SignalData(
-            overall_result_timestamps, overall_result_value)
+            for key in result_metadata_keys.get(f"{ref_id} {eval_id}", []):
+                result_metadata[key] = read_signal_data(
+                    f"{ref_id} {eval_id} result_metadata {key}")
 
-        self.logger.info(f"Loaded comparison {self.name}")
+            for key in input_metadata_keys.get(f"{ref_id} {eval_id}", []):
+                input_metadata[key] = read_signal_data(
+                    f"{ref_id} {eval_id} input_metadata {key}")
 
-        self.done.emit(comparison)
+            yield ref_id, eval_id, channel_result, result_metadata, input_metadata
 
 
 class ComparisonSaveWorker(QThread):
-    done = Signal()
+    """
+    Saves a comparison in a separate thread. Every file is written through a temporary file and flushed to disk
+    before it replaces the previous version, and the overview, which makes the comparison visible to
+    ComparisonRepository._load, is written last. A comparison is therefore only listed once it was saved completely.
+    Saves of the same name write the same files, therefore they hold a lock per name, also when run synchronously.
+    Signals:
+        progress (str, int): The name of the comparison and the percentage of saved channel pairs.
+        done (str): The name of the comparison, emitted once all files are on disk.
+    """
+    progress = Signal(str, int)
+    done = Signal(str)
 
-    def __init__(self, comparison: ComparisonResult, base_path: str):
+    save_locks: dict[str, threading.Lock] = {}
+    save_locks_lock = threading.Lock()
+
+    def __init__(self, comparison: ComparisonResult, base_path: str, catalog: ComparisonCatalog):
         super().__init__()
         self.comparison = comparison
+        self.name = comparison.name
         self.logger = getLogger(__name__)
         self.base_path = base_path
+        self.catalog = catalog
 
     def run(self) -> None:
-        self.logger.info(f"Saving comparison {self.comparison}")
+        with ComparisonSaveWorker.save_locks_lock:
+            lock = ComparisonSaveWorker.save_locks.setdefault(
+                self.name, threading.Lock())
+        with lock:
+            self._save()
+        self.done.emit(self.name)
+
+    def _save(self) -> None:
+        self.logger.info(f"Saving comparison {self.name}")
 
-        id = hashlib.sha256(self.comparison.name.encode()).hexdigest()
+        id = hashlib.sha256(self.name.encode()).hexdigest()
 
         channel_results_filename = f"{self.base_path}/{id}_channel_results.parquet"
         overall_result_filename = f"{self.base_path}/{id}_overall_result.parquet"
         channel_id_pairs_filename = f"{self.base_path}/{id}_channel_id_pairs.json"
         overview_filename = f"{self.base_path}/{id}_overview.json"
+        summaries_filename = f"{self.base_path}/{id}_summaries.json"
 
         channel_results = self.comparison.channel_results
 
@@ -338,58 +583,53 @@ class ComparisonSaveWorker(QThread):
         channel_id_pairs_data = {
             "channel_id_pairs": channel_id_pairs
         }
-        json.dump(channel_id_pairs_data, open(channel_id_pairs_filename, "w"))
+        write_json_durably(channel_id_pairs_data, channel_id_pairs_filename)
         self.logger.info(
             f"Saved channel id pairs to {channel_id_pairs_filename}")
-        dataframe_data: dict[str, np.ndarray] = {}
-        for i, (ref_ch, eval_ch, result) in enumerate(channel_results):
-            if (i * 100 // len(channel_results)) != ((i - 1) * 100 // len(channel_results)):
-                self.logger.info(
-                    f"Saving channel results {i * 100 // len(channel_results)}%")
-
-            channel_dataframe = {
-                f"{ref_ch.id} {eval_ch.id} values": result.result.values,
-                f"{ref_ch.id} {eval_ch.id} timestamps": result.result.timestamps
-            }
-
-            for key, value in result.result_metadata.items():
-                channel_dataframe[f"{ref_ch.id} {eval_ch.id} result_metadata {key} values"] = value.values
-                channel_dataframe[f"{ref_ch.id} {eval_ch.id} result_metadata {key} timestamps"] = value.timestamps
-
-            for key, value in result.input_metadata.items():
-                channel_dataframe[f"{ref_ch.id} {eval_ch.id} input_metadata {key} values"] = value.values
-                channel_dataframe[f"{ref_ch.id} {eval_ch.id} input_metadata {key} timestamps"] = value.timestamps
-
-            dataframe_data.update(channel_dataframe)
 
-        longest_dataframe_data = max([len(data)
-                                     for data in dataframe_data.values()])
-
-        for key in dataframe_data:
-            if len(dataframe_data[key]) < longest_dataframe_data:
-                data = dataframe_data[key]
-                pad_length = longest_dataframe_data - len(dataframe_data[key])
-
-                if data.dtype != np.float64:
-                    data = data.astype(np.float64)
-
-                dataframe_data[key] = np.pad(
-                    data, (0, pad_length), "constant", constant_values=np.nan)
-
-        dataframe = pd.DataFrame(dataframe_data)
-        dataframe.to_parquet(channel_results_filename)
+        PairResultStore(self.base_path, id).write(
+            channel_results, lambda percent: self.progress.emit(self.name, percent))
+        if os.path.exists(channel_results_filename):
+            # an earlier save with the same name in the wide layout
+            os.remove(channel_results_filename)
 
         overall_result = {
             "values": self.comparison.result.values,
             "timestamps": self.comparison.result.timestamps
         }
-        pd.DataFrame(overall_result).to_parquet(overall_result_filename)
-
+        for percentile, band in self.comparison.bands.items():
+            if len(band.values) == len(self.comparison.result.values):
+                overall_result[f"p{percentile}"] = band.values
+        pd.DataFrame(overall_result).to_parquet(
+            f"{overall_result_filename}.tmp")
+        replace_durably(f"{overall_result_filename}.tmp",
+                        overall_result_filename)
+
+        summaries = {
+            "thresholds": SUMMARY_THRESHOLDS,
+            "summaries": [summary.to_dict() for summary in self.comparison.summaries]
+        }
+        write_json_durably(summaries, summaries_filename)
+
+        ref_measurement, eval_measurement, metric = parse_comparison_name(
+            self.name)
+        if self.comparison.ref_measurement_name is not None:
+            ref_measurement = self.comparison.ref_measurement_name
+            eval_measurement = self.comparison.eval_measurement_name
+            metric = self.comparison.metric_name
+        created = time.time()
         overview = {
-            "name": self.comparison.name,
+            "name": self.name,
+            "ref_measurement": ref_measurement,
+            "eval_measurement": eval_measurement,
+            "metric": metric,
+            "created": created,
+            "skipped_pairs": [[ref_channel.id, ref_channel.name, eval_channel.id, eval_channel.name, reason]
+                              for ref_channel, eval_channel, reason in self.comparison.skipped_results]
         }
-        json.dump(overview, open(overview_filename, "w"))
-
-        self.logger.info(f"Saved comparison!")
+        write_json_durably(overview, overview_filename)
+        self.catalog.put(CatalogEntry(self.name, id, ref_measurement, eval_measurement, metric, created,
+                                      len(channel_results), comparison_score(self.comparison.result.values)))
 
-        self.done.emit()
+        self.logger.info(f"Saved comparison {self.name}")
+        self.progress.emit(self.name, 100)
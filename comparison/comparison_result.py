@@ -3,40 +3,78 @@ import numpy as np
 
 from logging import getLogger
 
+from measurement.channel.channel import Channel
 from measurement.channel.channel_data import ChannelData
 from .metrics import MetricResult
 from .metrics.signal_data import SignalData
+from .pair_summary import PairSummary
+from .result_aggregator import ResultAggregator
+
+# Percentiles of the channel results shown as bands around the total result.
+BAND_PERCENTILES = [5, 50, 95]
 
 
 class ComparisonResult():
     name: str
     channel_results: list[tuple[ChannelData,
                                 ChannelData, 'MetricResult']]
+    skipped_results: list[tuple[ChannelData | Channel,
+                                ChannelData | Channel, str]]
+    summaries: list[PairSummary]
     result: SignalData
+    bands: dict[float, SignalData]
+    ref_measurement_name: str | None
+    eval_measurement_name: str | None
+    metric_name: str | None
 
     def __init__(self, name: str) -> None:
         self.name = name
+        # the name can be changed by the user, therefore the compared measurements and metric are kept separately
+        self.ref_measurement_name = None
+        self.eval_measurement_name = None
+        self.metric_name = None
         self.channel_results = []
+        self.summaries = []
+        self.skipped_results = []
+        self.result = SignalData.empty()
+        self.bands = {}
+        self.aggregator = ResultAggregator()
 
-    def add_result(self, ref_channel: ChannelData, eval_channel: ChannelData, result: MetricResult) -> None:
+    def add_result(self, ref_channel: ChannelData, eval_channel: ChannelData, result: MetricResult,
+                   summary: PairSummary | None = None) -> None:
+        """
+        Adds the result of a channel pair, together with its summary. If no summary is given, it is computed.
+        """
+        if summary is None:
+            summary = PairSummary.from_result(ref_channel, eval_channel, result)
         self.channel_results.append(
             (ref_channel, eval_channel, result))
+        self.summaries.append(summary)
+        self.aggregator.add(result.result)
+
+    def add_skipped(self, ref_channel: ChannelData | Channel, eval_channel: ChannelData | Channel, reason: str) -> None:
+        """
+        Records a channel pair that was not compared, e.g. because it exceeded the time or memory limit.
+        Skipped pairs are not part of the total result.
+        """
+        self.skipped_results.append((ref_channel, eval_channel, reason))
 
     def calculate_total(self):
+        """
+        Calculates the total result as the mean of all channel results, and the percentile bands
+        (see BAND_PERCENTILES) of the channel results. The channel results are accumulated by a ResultAggregator
+        as they are added, therefore results of different lengths or with shifted timestamps are aligned by time.
+        """
         if len(self.channel_results) == 0:
             getLogger("Comparison").warning(
                 f"No results for {self.name}, cannot calculate total")
             return
 
-        channel_results = [result for _, _, result in self.channel_results]
+        self.result = self.aggregator.mean()
+        self.calculate_bands()
 
-        all_results = np.array([result.result.values
-                               for result in channel_results])
-        count = all_results.shape[0]
-        sum_results = np.sum(all_results, axis=0)
-        combined_results = sum_results / count
-        timestamps = channel_results[0].result.timestamps
-        self.result = SignalData(timestamps, combined_results)
+    def calculate_bands(self):
+        self.bands = self.aggregator.percentiles(BAND_PERCENTILES)
 
     def get_channel_result_by_name(self, name: str):
         for channel in self.channel_results:
@@ -46,7 +84,8 @@ class ComparisonResult():
 
     @property
     def result_average(self):
-        return float(self.result.values.mean())
+        # grid points not covered by any channel result are NaN
+        return float(np.nanmean(self.result.values))
 
 
 class ChannelComparisonResult():
@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from comparison.metrics.metric import Metric
+from comparison.sync_block import SyncBlock
+from measurement.channel.channel import Channel
+from measurement.channel.channel_data_repository import ChannelDataRepository
+
+
+@dataclass
+class WorkUnit():
+    """
+    A small set of channel pairs which is compared by one worker in one go.
+    Attributes:
+        index (int): Position of the unit in the dispatch order.
+        positions (list[int]): Positions of the pairs in the original pair list of the comparison.
+        pairs (list[tuple[Channel, Channel]]): The channel pairs to compare.
+        cost (float): Estimated cost of all pairs of the unit.
+        attempts (int): Number of workers that died before starting any pair of the unit.
+    """
+    index: int
+    positions: list[int] = field(default_factory=list)
+    pairs: list[tuple[Channel, Channel]] = field(default_factory=list)
+    cost: float = 0
+    attempts: int = 0
+
+
+class ComparisonScheduler():
+    """
+    Splits the channel pairs of a comparison into work units, based on the estimated cost of each pair.
+    The cost of a pair is estimated from its sample count after synchronization, and from the metric
+    (see Metric.estimate_cost). The most expensive pairs are dispatched first, and the units are kept small,
+    such that idle workers can pick up the remaining units while others still work on expensive pairs.
+    The scheduler also records the busy time of each worker, to report the utilization at the end of a run.
+    Args:
+        metric (Metric): The metric used for the comparison.
+        sync_blocks (list[SyncBlock]): The sync blocks of the comparison, limiting the compared samples.
+        sample_rate (float): The sample rate of the compared measurements.
+        workers (int): Number of workers the units are distributed to.
+        units_per_worker (int): Number of units each worker should process on average.
+            More units balance better, but increase the dispatch overhead.
+        max_unit_size (int): Maximum number of pairs in a single unit.
+    """
+
+    def __init__(self, metric: Metric, sync_blocks: list[SyncBlock], sample_rate: float, workers: int,
+                 units_per_worker: int = 8, max_unit_size: int = 250) -> None:
+        self.logger = getLogger(__name__)
+        self.metric = metric
+        self.sync_blocks = sync_blocks
+        self.sample_rate = sample_rate
+        self.workers = max(1, workers)
+        self.units_per_worker = units_per_worker
+        self.max_unit_size = max_unit_size
+        self.repository = ChannelDataRepository()
+        self.busy_times: dict[int, float] = {}
+        self.unit_counts: dict[int, int] = {}
+
+    def synced_sample_count(self) -> int | None:
+        """
+        Returns the number of samples which are compared per pair after applying the sync blocks,
+        or None if there are no sync blocks.
+        """
+        if len(self.sync_blocks) == 0:
+            return None
+        return sum(int((sync_block.ref_end - sync_block.ref_start) * self.sample_rate)
+                   for sync_block in self.sync_blocks)
+
+    def estimate_cost(self, ref_channel: Channel, eval_channel: Channel) -> float:
+        """
+        Estimates the cost of comparing a channel pair with the metric of the scheduler.
+        """
+        sample_count = min(self.repository.sample_count(ref_channel.id),
+                           self.repository.sample_count(eval_channel.id))
+        synced_sample_count = self.synced_sample_count()
+        if synced_sample_count is not None:
+            sample_count = min(sample_count, synced_sample_count)
+        return self.metric.estimate_cost(sample_count)
+
+    def plan(self, channel_pairs: list[tuple[Channel, Channel]]) -> list[WorkUnit]:
+        """
+        Splits the channel pairs into work units, ordered by descending cost.
+        Each unit is filled with pairs until it reaches the target cost, which is the total cost divided by
+        the desired number of units. Pairs that are more expensive than the target end up in a unit on their own.
+        Args:
+            channel_pairs (list[tuple[Channel, Channel]]): The pairs to compare.
+        Returns:
+            list[WorkUnit]: The work units, in the order they should be dispatched.
+        """
+        costs = [self.estimate_cost(ref_channel, eval_channel)
+                 for ref_channel, eval_channel in channel_pairs]
+        order = sorted(range(len(channel_pairs)),
+                       key=lambda i: costs[i], reverse=True)
+
+        total_cost = sum(costs)
+        target_cost = total_cost / (self.workers * self.units_per_worker)
+
+        units: list[WorkUnit] = []
+        unit = WorkUnit(0)
+        for position in order:
+            unit.positions.append(position)
+            unit.pairs.append(channel_pairs[position])
+            unit.cost += costs[position]
+            if unit.cost >= target_cost or len(unit.pairs) >= self.max_unit_size:
+                units.append(unit)
+                unit = WorkUnit(len(units))
+        if len(unit.pairs) > 0:
+            units.append(unit)
+
+        self.logger.info(
+            f"Planned {len(units)} work units for {len(channel_pairs)} pairs on {self.workers} workers (estimated cost {total_cost:.3g})")
+        return units
+
+    def record(self, worker: int, busy_time: float) -> None:
+        """
+        Records that a worker was busy with a unit for the given time in seconds.
+        """
+        self.busy_times[worker] = self.busy_times.get(worker, 0) + busy_time
+        self.unit_counts[worker] = self.unit_counts.get(worker, 0) + 1
+
+    def log_utilization(self, wall_time: float) -> None:
+        """
+        Logs the utilization of each worker, which is the share of the wall time the worker was busy.
+        Workers that never received a unit are reported as idle.
+        """
+        if wall_time <= 0:
+            return
+
+        for worker, busy_time in sorted(self.busy_times.items()):
+            self.logger.info(
+                f"Worker {worker}: {self.unit_counts[worker]} units, busy {busy_time:.1f}s of {wall_time:.1f}s ({busy_time / wall_time * 100:.0f}%)")
+
+        idle_workers = self.workers - len(self.busy_times)
+        if idle_workers > 0:
+            self.logger.info(f"{idle_workers} workers received no units")
+
+        average = sum(self.busy_times.values()) / (self.workers * wall_time)
+        self.logger.info(
+            f"Average worker utilization {average * 100:.0f}%")
@@ -0,0 +1,339 @@
+from dataclasses import dataclass
+from logging import getLogger
+import multiprocessing as mp
+import os
+import signal
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Iterator
+
+from comparison.comparison_scheduler import WorkUnit
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+@dataclass
+class PairLimits():
+    """
+    Limits for the comparison of a single channel pair.
+    Attributes:
+        time_limit (float | None): Wall clock time in seconds after which the worker comparing the pair is terminated.
+        memory_limit (int | None): Memory in bytes a worker may allocate for a pair. Pairs whose estimated memory
+            (see Metric.estimate_memory) exceeds the limit are skipped without being compared.
+    """
+    time_limit: float | None = 1800
+    memory_limit: int | None = None
+
+    @staticmethod
+    def default(processes: int) -> 'PairLimits':
+        """
+        Creates limits that share the physical memory evenly between the given number of worker processes.
+        If the physical memory cannot be determined, no memory limit is set.
+        """
+        try:
+            physical_memory = os.sysconf(
+                "SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (AttributeError, ValueError, OSError):
+            return PairLimits()
+        return PairLimits(memory_limit=physical_memory // max(1, processes))
+
+
+# Number of times a unit is dispatched again if its worker dies before starting any of its pairs.
+UNIT_RETRIES = 1
+
+
+@dataclass
+class SkippedPair():
+    """
+    Takes the place of the MetricResult of a channel pair that exceeded its limits, or whose comparison failed.
+    Attributes:
+        reason (str): Why the pair was skipped.
+        recycle (bool): Whether the worker that produced this should be replaced before it compares the next unit.
+    """
+    reason: str
+    recycle: bool = False
+
+
+def _apply_memory_limit(memory_limit: int | None):
+    """
+    Limits the address space of the current process to its current size plus the memory limit, such that
+    allocations above the limit fail with a MemoryError instead of triggering the out of memory killer.
+    Only supported on platforms that provide the resource module and /proc.
+    """
+    if memory_limit is None or resource is None:
+        return
+    try:
+        with open("/proc/self/statm") as statm:
+            current_size = int(statm.read().split()[0]) * \
+                os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    soft_limit = current_size + memory_limit
+    if hard_limit != resource.RLIM_INFINITY:
+        soft_limit = min(soft_limit, hard_limit)
+    resource.setrlimit(resource.RLIMIT_AS, (soft_limit, hard_limit))
+
+
+def _worker_main(tasks: Connection, messages: Connection, memory_limit: int | None):
+    """
+    Main function of a worker process. Receives work units until it receives None.
+    Before each pair a "start" message is sent, such that the pool knows which pair the worker is busy with.
+    """
+    limited = False
+    while True:
+        task = tasks.recv()
+        if task is None:
+            break
+        if not limited:
+            # a spawned worker imports the modules of the compare function while receiving its first task,
+            # the limit is therefore applied on top of the size of the worker after that
+            _apply_memory_limit(memory_limit)
+            limited = True
+        unit_index, pairs, compare = task
+
+        def on_pair_start(index: int):
+            messages.send(("start", unit_index, index))
+
+        start_time = time.perf_counter()
+        results = compare(pairs, on_pair_start=on_pair_start)
+        busy_time = time.perf_counter() - start_time
+        recycle = any(isinstance(result, SkippedPair) and result.recycle
+                      for _, _, result in results)
+        messages.send(("done", unit_index, results, busy_time, recycle))
+
+
+class _Worker():
+    """
+    A worker process of the ComparisonWorkerPool. Each worker has its own pipes, such that terminating it
+    cannot corrupt the communication with the other workers.
+    """
+
+    def __init__(self, context, memory_limit: int | None) -> None:
+        task_receiver, self.tasks = context.Pipe(duplex=False)
+        self.messages, message_sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_worker_main, args=(
+            task_receiver, message_sender, memory_limit), daemon=True)
+        self.process.start()
+        task_receiver.close()
+        message_sender.close()
+        self.unit: WorkUnit | None = None
+        self.unit_started = 0.0
+        self.current_index: int | None = None
+        self.pair_started = 0.0
+
+    def assign(self, unit: WorkUnit, compare: Callable):
+        self.unit = unit
+        self.unit_started = time.perf_counter()
+        self.current_index = None
+        self.tasks.send((unit.index, unit.pairs, compare))
+
+    def stop(self):
+        try:
+            self.tasks.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        self.close_pipes()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.close_pipes()
+
+    def close_pipes(self):
+        self.tasks.close()
+        self.messages.close()
+
+
+class ComparisonWorkerPool():
+    """
+    A process pool for comparing work units, which isolates channel pairs from each other.
+    In contrast to multiprocessing.Pool, the pool tracks which pair each worker is busy with. If a pair exceeds
+    the time limit, or the worker process dies (e.g. killed by the operating system because it ran out of memory),
+    the worker is terminated and replaced, the pair is reported as skipped, and the remaining pairs of the unit are
+    dispatched again. Workers whose pair failed with a MemoryError are replaced after finishing their unit.
+    The workers are started with spawn, scripts using the pool therefore need an if __name__ == "__main__" guard.
+    Args:
+        processes (int): Number of worker processes.
+        limits (PairLimits): Limits applied to each pair. Defaults to PairLimits.default(processes).
+    Example usage:
+        with ComparisonWorkerPool(4) as pool:
+            result = execute_comparison(comparison, pool)
+    """
+
+    def __init__(self, processes: int, limits: PairLimits | None = None) -> None:
+        self.logger = getLogger(__name__)
+        self.processes = max(1, processes)
+        self.limits = limits if limits is not None else PairLimits.default(
+            self.processes)
+        # workers are replaced while the comparison runs in a thread of the GUI, next to e.g. save threads, and
+        # forking a multithreaded process can deadlock on locks held by other threads, see ImportQueue
+        self.context = mp.get_context("spawn")
+        self.workers: dict[int, _Worker] = {}
+        for _ in range(self.processes):
+            self._spawn()
+
+    def __enter__(self) -> 'ComparisonWorkerPool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self.context, self.limits.memory_limit)
+        self.workers[worker.process.pid] = worker
+        return worker
+
+    def _replace(self, worker: _Worker, kill: bool):
+        self.workers.pop(worker.process.pid)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        self._spawn()
+
+    def imap_units(self, units: list[WorkUnit], compare: Callable) -> Iterator[tuple[list[int], list, int, float]]:
+        """
+        Compares the work units and yields their results as soon as they are done.
+        Args:
+            units (list[WorkUnit]): The units to compare, in the order they should be dispatched.
+            compare (Callable): Picklable function called in the worker as compare(pairs, on_pair_start=callback),
+                returning a list of (ref_channel, eval_channel, result) tuples, see compare_chunk.
+        Yields:
+            tuple: The positions of the compared pairs, their results, the id of the worker and its busy time.
+        """
+        pending = list(units)
+        next_index = max([unit.index for unit in units], default=-1) + 1
+        in_flight = 0
+
+        while len(pending) > 0 or in_flight > 0:
+            for worker in list(self.workers.values()):
+                if worker.unit is None and len(pending) > 0:
+                    worker.assign(pending.pop(0), compare)
+                    in_flight += 1
+
+            busy_workers = [worker for worker in self.workers.values()
+                            if worker.unit is not None]
+            ready = wait([worker.messages for worker in busy_workers], timeout=0.5)
+
+            for worker in busy_workers:
+                if worker.messages not in ready:
+                    continue
+                done = self._read_messages(worker)
+                if done is not None:
+                    in_flight -= 1
+                    yield done
+
+            for worker in list(self.workers.values()):
+                if worker.unit is None:
+                    continue
+                reason = None
+                if not worker.process.is_alive():
+                    # the messages sent right before the process died tell which pair it was busy with
+                    done = self._read_messages(worker)
+                    if done is not None:
+                        in_flight -= 1
+                        yield done
+                        continue
+                    reason = self._exit_reason(worker.process.exitcode)
+                elif self.limits.time_limit is not None and worker.current_index is not None and \
+                        time.perf_counter() - worker.pair_started > self.limits.time_limit:
+                    reason = f"Timed out after {self.limits.time_limit:.0f}s"
+                if reason is None:
+                    continue
+
+                unit = worker.unit
+                busy_time = time.perf_counter() - worker.unit_started
+                failed_index = worker.current_index
+                pid = worker.process.pid
+                in_flight -= 1
+                self._replace(worker, kill=True)
+
+                if failed_index is None:
+                    # no pair was started, e.g. the worker died while receiving the unit
+                    if unit.attempts < UNIT_RETRIES:
+                        self.logger.warning(
+                            f"Worker {pid} died before comparing a pair: {reason}, dispatching its unit again")
+                        unit.attempts += 1
+                        pending.insert(0, unit)
+                        continue
+                    self.logger.error(
+                        f"Skipping {len(unit.pairs)} pairs: {reason} before comparing a pair")
+                    yield unit.positions, [(ref_channel, eval_channel, SkippedPair(reason))
+                                           for ref_channel, eval_channel in unit.pairs], pid, busy_time
+                    continue
+
+                ref_channel, eval_channel = unit.pairs[failed_index]
+                self.logger.error(
+                    f"Skipping {ref_channel.name}: {reason}")
+
+                remaining = [i for i in range(
+                    len(unit.pairs)) if i != failed_index]
+                if len(remaining) > 0:
+                    retry = WorkUnit(next_index, [unit.positions[i] for i in remaining], [
+                                     unit.pairs[i] for i in remaining], unit.cost)
+                    next_index += 1
+                    pending.insert(0, retry)
+
+                yield [unit.positions[failed_index]], [(ref_channel, eval_channel, SkippedPair(reason))], pid, busy_time
+
+    def _read_messages(self, worker: _Worker) -> tuple[list[int], list, int, float] | None:
+        """
+        Reads all messages a worker sent so far. Returns the result of its unit if it is done.
+        """
+        while worker.unit is not None:
+            try:
+                if not worker.messages.poll():
+                    return None
+                message = worker.messages.recv()
+            except (EOFError, OSError):
+                # the process died, which is handled by the caller
+                return None
+            if message[1] != worker.unit.index:
+                continue
+            if message[0] == "start":
+                worker.current_index = message[2]
+                worker.pair_started = time.perf_counter()
+            elif message[0] == "done":
+                _, _, results, busy_time, recycle = message
+                unit = worker.unit
+                worker.unit = None
+                pid = worker.process.pid
+                if recycle:
+                    self.logger.warning(
+                        f"Worker {pid} ran out of memory, replacing it")
+                    self._replace(worker, kill=False)
+                return unit.positions, results, pid, busy_time
+        return None
+
+    @staticmethod
+    def _exit_reason(exitcode: int | None) -> str:
+        """
+        Describes why a worker process ended. Only a SIGKILL points to the out of memory killer, other exit codes
+        are crashes, e.g. in native code of a metric.
+        """
+        if exitcode is not None and exitcode < 0 and -exitcode == getattr(signal, "SIGKILL", None):
+            return "Worker process was killed (SIGKILL), possibly because the system ran out of memory"
+        if exitcode is not None and exitcode < 0:
+            try:
+                return f"Worker process crashed ({signal.Signals(-exitcode).name})"
+            except ValueError:
+                pass
+        return f"Worker process terminated unexpectedly (exit code {exitcode})"
+
+    def close(self):
+        """
+        Stops all worker processes.
+        """
+        for worker in self.workers.values():
+            if worker.unit is None:
+                worker.stop()
+            else:
+                worker.kill()
+        self.workers = {}
@@ -0,0 +1,109 @@
+from logging import getLogger
+
+import numpy as np
+
+from comparison.comparison_result import ComparisonResult
+from comparison.metrics.metric_result import MetricResult
+from comparison.metrics.signal_data import SignalData
+from comparison.pair_result_store import PairResultStore
+from comparison.result_aggregator import ResultAggregator
+from measurement.channel.channel_data import ChannelData
+from measurement.channel.channel_data_repository import ChannelDataRepository
+
+
+class LazyChannelData(ChannelData):
+    """
+    A ChannelData whose timestamps and values are loaded from the ChannelDataRepository on first access.
+    The id and name are available without loading.
+    """
+
+    def __init__(self, id: str, name: str, repository: ChannelDataRepository) -> None:
+        self.name = name
+        self.id = id
+        self.offset = 0
+        self.repository = repository
+        self.data: ChannelData | None = None
+        self.logger = getLogger(__name__)
+
+    def _load(self) -> ChannelData:
+        if self.data is None:
+            self.data = self.repository.load(self.id)
+            if self.data is None:
+                self.data = ChannelData(
+                    np.array([]), np.array([]), self.name, self.id)
+        return self.data
+
+    @property
+    def index(self) -> np.ndarray:
+        return self._load().index
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._load().values
+
+
+class LazyMetricResult(MetricResult):
+    """
+    A MetricResult of a saved comparison, whose arrays are read from the PairResultStore on first access.
+    Reading one attribute reads the row group of the pair once, the inputs are loaded from the channel data.
+    """
+
+    def __init__(self, store: PairResultStore, position: int, ref_channel: ChannelData, eval_channel: ChannelData) -> None:
+        self.store = store
+        self.position = position
+        self.ref_channel = ref_channel
+        self.eval_channel = eval_channel
+        self.loaded: tuple[SignalData, dict[str, SignalData], dict[str, SignalData]] | None = None
+
+    def _load(self) -> tuple[SignalData, dict[str, SignalData], dict[str, SignalData]]:
+        if self.loaded is None:
+            self.loaded = self.store.read_pair(self.position)
+        return self.loaded
+
+    @property
+    def reference_input(self) -> SignalData:
+        return SignalData.from_channel_data(self.ref_channel)
+
+    @property
+    def evaluated_input(self) -> SignalData:
+        return SignalData.from_channel_data(self.eval_channel)
+
+    @property
+    def result(self) -> SignalData:
+        return self._load()[0]
+
+    @property
+    def result_metadata(self) -> dict[str, SignalData]:
+        return self._load()[1]
+
+    @property
+    def input_metadata(self) -> dict[str, SignalData]:
+        return self._load()[2]
+
+
+class LazyComparisonResult(ComparisonResult):
+    """
+    A saved ComparisonResult that is opened from its summaries, without reading any result or channel data.
+    Its channel results are LazyChannelData and LazyMetricResult proxies, which load their data when it is
+    accessed, e.g. when a channel pair is plotted. The total result and its bands are read from the saved comparison.
+    """
+
+    def add_result(self, ref_channel: ChannelData, eval_channel: ChannelData, result: MetricResult,
+                   summary=None) -> None:
+        """
+        Adds a channel pair without aggregating its result, such that its arrays are not loaded.
+        """
+        if summary is None:
+            super().add_result(ref_channel, eval_channel, result)
+            return
+        self.channel_results.append((ref_channel, eval_channel, result))
+        self.summaries.append(summary)
+
+    def calculate_total(self):
+        """
+        Calculates the total result from all channel results, which loads all of them.
+        """
+        self.aggregator = ResultAggregator()
+        for _, _, result in self.channel_results:
+            self.aggregator.add(result.result)
+        super().calculate_total()
@@ -3,7 +3,7 @@ from logging import getLogger
 import numpy as np
 
 from .metric_result import MetricResult
-from .signal_data import SignalData
+from .signal_data import RunLengthSignalData, SignalData
 from .metric import Metric
 
 
@@ -21,6 +21,13 @@ class AreaValidationMetric(Metric):
                               ref_channel.sample_time_step)
         averaging_time = averaging_count * ref_channel.sample_time_step
 
+        if RunLengthSignalData.have_runs(ref_channel, eval_channel) and 0 < averaging_count <= len(ref_channel):
+            averaged_differences = 1 - \
+                self._average_runs(ref_channel, eval_channel,
+                                   amplitude, averaging_count)
+            averaged_differences = np.clip(averaged_differences, 0, 1)
+            return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, averaged_differences), {}, {})
+
         differences = np.abs(ref_channel.values -
                              eval_channel.values) / amplitude
 
@@ -33,5 +40,34 @@ class AreaValidationMetric(Metric):
 
         return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, averaged_differences), {}, {})
 
+    @staticmethod
+    def _average_runs(ref_channel: RunLengthSignalData, eval_channel: RunLengthSignalData, amplitude: float,
+                      averaging_count: int) -> np.ndarray:
+        """
+        Computes np.convolve(differences, window, mode='same') from the segments in which neither channel changes,
+        without expanding the channels. The sum of the differences up to a sample is linear within each segment,
+        therefore the sum over each window is the difference of two such sums.
+        """
+        length = len(ref_channel)
+        starts, ref_values, eval_values = RunLengthSignalData.joint_runs(
+            ref_channel, eval_channel)
+        differences = np.abs(ref_values - eval_values) / amplitude
+        run_lengths = np.diff(np.append(starts, length))
+        sums_at_starts = np.concatenate(
+            [[0], np.cumsum(differences * run_lengths)[:-1]])
+
+        # the sum of the differences before each position from 0 to length, the position length is in the last run
+        run = np.repeat(np.arange(len(starts)), np.append(
+            run_lengths[:-1], run_lengths[-1] + 1))
+        positions = np.arange(length + 1)
+        sums_before = sums_at_starts[run] + \
+            differences[run] * (positions - starts[run])
+
+        # mode 'same' centers the window like the full convolution shifted by (averaging_count - 1) // 2
+        window_end = positions[:-1] + (averaging_count - 1) // 2
+        upper = np.minimum(window_end, length - 1) + 1
+        lower = np.maximum(window_end - averaging_count + 1, 0)
+        return (sums_before[upper] - sums_before[lower]) / averaging_count
+
     def __str__(self) -> str:
         return f"AVM ({self.averaging_time})"
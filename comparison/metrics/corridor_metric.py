@@ -45,5 +45,8 @@ class CorridorMetric(Metric):
 
         return MetricResult(ref_channel, eval_channel, result, {}, {})
 
+    def estimate_cost(self, length: int) -> float:
+        return float(length) ** 2
+
     def __str__(self) -> str:
         return f"Corridor ({self.inner}, {self.outer}, {self.delay_inner}, {self.delay_outer})"
@@ -70,5 +70,8 @@ class CrossCorrelationMetric(Metric):
 
         return scaled_cross_correlation
 
+    def estimate_cost(self, length: int) -> float:
+        return 2 * self.allowed_time_shift * float(length) ** 2
+
     def __str__(self):
         return f"CrossCorrelationMetric ({self.allowed_time_shift})"
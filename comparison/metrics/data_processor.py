@@ -1,13 +1,45 @@
 
 
+from dataclasses import dataclass
 import numpy as np
 from comparison.metrics.metric_result import MetricResult
 from comparison.sync_block import SyncBlock
-from .signal_data import SignalData
+from .signal_data import RunLengthSignalData, SignalData
+
+
+@dataclass
+class SyncPlan:
+    """
+    The samples selected by a list of sync blocks, compiled once per comparison by DataProcessor.compile_sync_plan.
+
+    Attributes
+    ----------
+    ref_index : np.ndarray
+        Indices of the reference samples of all blocks, in order.
+    eval_index : np.ndarray
+        Indices of the evaluated samples of all blocks, in order.
+    ref_block_lengths : list[int]
+        Number of reference samples of each block.
+    eval_block_lengths : list[int]
+        Number of evaluated samples of each block.
+    ref_start_times : list[float]
+        Time subtracted from the reference timestamps of each block, such that the block starts at 0.
+    eval_start_times : list[float]
+        Time subtracted from the evaluated timestamps of each block.
+    """
+    ref_index: np.ndarray
+    eval_index: np.ndarray
+    ref_block_lengths: list[int]
+    eval_block_lengths: list[int]
+    ref_start_times: list[float]
+    eval_start_times: list[float]
 
 
 class DataProcessor:
 
+    def __init__(self) -> None:
+        self.sync_plans: dict[tuple, SyncPlan] = {}
+
     def shift_signal(self, signal_data: SignalData, shift: float):
         """
         Shifts the signal data by the given shift value.
@@ -127,3 +159,144 @@ class DataProcessor:
         eval_values = eval_data.values[eval_start_step:eval_start_step + length]
 
         return SignalData(ref_timestamps, ref_values), SignalData(eval_timestamps, eval_values)
+
+    def compile_sync_plan(self, sync_blocks: list[SyncBlock], time_step: float, ref_length: int, eval_length: int) -> SyncPlan:
+        """
+        Computes the sample indices and time offsets of all sync blocks at once.
+        The plan selects exactly the samples that apply_sync_block selects for each block.
+
+        Args:
+            sync_blocks (list[SyncBlock]): The sync blocks, in order.
+            time_step (float): The sample time step of the reference data.
+            ref_length (int): Number of samples of the reference data.
+            eval_length (int): Number of samples of the evaluation data.
+
+        Returns:
+            SyncPlan: The compiled plan, which can be applied to any channel pair with the same time step and lengths.
+        """
+        ref_ranges = []
+        eval_ranges = []
+        ref_start_times = []
+        eval_start_times = []
+        for sync_block in sync_blocks:
+            ref_start_step = int(sync_block.ref_start / time_step)
+            eval_start_step = int(sync_block.eval_start / time_step)
+            length = int((sync_block.ref_end - sync_block.ref_start) / time_step)
+            other_length = int(
+                (sync_block.eval_end - sync_block.eval_start) / time_step)
+            if length != other_length:
+                raise ValueError("Lengths of the sync blocks do not match")
+            # slicing a range follows the same rules as slicing the arrays in apply_sync_block
+            ref_ranges.append(range(ref_length)[
+                              ref_start_step:ref_start_step + length])
+            eval_ranges.append(range(eval_length)[
+                               eval_start_step:eval_start_step + length])
+            ref_start_times.append(ref_start_step * time_step)
+            eval_start_times.append(eval_start_step * time_step)
+
+        def to_index(ranges: list[range]) -> np.ndarray:
+            if len(ranges) == 0:
+                return np.array([], dtype=np.int64)
+            return np.concatenate([np.arange(index_range.start, index_range.stop, index_range.step, dtype=np.int64)
+                                   for index_range in ranges])
+
+        return SyncPlan(to_index(ref_ranges), to_index(eval_ranges),
+                        [len(index_range) for index_range in ref_ranges],
+                        [len(index_range) for index_range in eval_ranges],
+                        ref_start_times, eval_start_times)
+
+    def get_sync_plan(self, sync_blocks: list[SyncBlock], ref_data: SignalData, eval_data: SignalData,
+                      time_step: float | None = None, ref_length: int | None = None, eval_length: int | None = None) -> SyncPlan:
+        """
+        Returns the sync plan for the sync blocks and the given pair, compiling it only if no pair with
+        the same time step and lengths was synchronized with this processor before.
+        If only a time range of the channels was loaded, the time step and lengths of the complete channels
+        must be given, since they cannot be derived from the loaded data.
+        """
+        if time_step is None:
+            time_step = ref_data.sample_time_step if len(sync_blocks) > 0 else 0
+        if ref_length is None:
+            ref_length = len(ref_data.timestamps)
+        if eval_length is None:
+            eval_length = len(eval_data.timestamps)
+        key = (tuple((sync_block.ref_start, sync_block.ref_end, sync_block.eval_start, sync_block.eval_end)
+                     for sync_block in sync_blocks), time_step, ref_length, eval_length)
+        if key not in self.sync_plans:
+            self.sync_plans[key] = self.compile_sync_plan(
+                sync_blocks, time_step, ref_length, eval_length)
+        return self.sync_plans[key]
+
+    def apply_sync_plan(self, plan: SyncPlan, ref_data: SignalData, eval_data: SignalData,
+                        ref_offset: int = 0, eval_offset: int = 0) -> tuple[SignalData, SignalData]:
+        """
+        Synchronizes the reference and evaluation data with a compiled sync plan.
+        The result is identical to applying each sync block with apply_sync_block and concatenating the blocks with
+        concat_signal_data, but the samples are gathered at once instead of growing the arrays block by block.
+
+        Args:
+            plan (SyncPlan): The compiled sync plan.
+            ref_data (SignalData): The reference data to be synchronized.
+            eval_data (SignalData): The evaluation data to be synchronized.
+            ref_offset (int): Index of the first sample of ref_data within the complete channel, if only a time range was loaded.
+            eval_offset (int): Index of the first sample of eval_data within the complete channel.
+
+        Returns:
+            tuple[SignalData, SignalData]: A tuple containing the synchronized reference and evaluation data.
+                If offsets are given, the loaded data must contain all samples of the plan, see plan_covers.
+        """
+        return (self._gather(ref_data, plan.ref_index - ref_offset, plan.ref_block_lengths, plan.ref_start_times),
+                self._gather(eval_data, plan.eval_index - eval_offset, plan.eval_block_lengths, plan.eval_start_times))
+
+    @staticmethod
+    def plan_covers(plan: SyncPlan, ref_offset: int, ref_length: int, eval_offset: int, eval_length: int) -> bool:
+        """
+        Checks whether partially loaded channels, given by the offset and length of the loaded samples,
+        contain all samples selected by the plan.
+        """
+        def covers(index: np.ndarray, offset: int, length: int) -> bool:
+            return len(index) == 0 or (index.min() >= offset and index.max() < offset + length)
+        return covers(plan.ref_index, ref_offset, ref_length) and covers(plan.eval_index, eval_offset, eval_length)
+
+    def _gather(self, data: SignalData, index: np.ndarray, block_lengths: list[int], start_times: list[float]) -> SignalData:
+        if len(block_lengths) == 0:
+            return SignalData.empty()
+
+        # the shift of each block follows concat_signal_data, which only depends on the first two and
+        # the last timestamp of the data concatenated so far
+        shifts = []
+        first = None
+        second = None
+        last = None
+        count = 0
+        position = 0
+        for block_length, start_time in zip(block_lengths, start_times):
+            shift = 0
+            if count > 1:
+                shift = last + (second - first)
+            shifts.append(shift)
+            if block_length > 0:
+                block_index = index[position:position + block_length]
+                if count == 0:
+                    first = (data.timestamps[block_index[0]] - start_time) + shift
+                    if block_length > 1:
+                        second = (data.timestamps[block_index[1]] - start_time) + shift
+                elif count == 1:
+                    second = (data.timestamps[block_index[0]] - start_time) + shift
+                last = (data.timestamps[block_index[-1]] - start_time) + shift
+            count += block_length
+            position += block_length
+
+        start_time_per_sample = np.repeat(start_times, block_lengths)
+        shift_per_sample = np.repeat(np.array(shifts, dtype=np.float64), block_lengths)
+        timestamps = (data.timestamps[index] - start_time_per_sample) + shift_per_sample
+        if isinstance(data, RunLengthSignalData):
+            # the blocks select consecutive samples, their runs are cut out without expanding the values
+            block_starts = np.cumsum([0] + block_lengths[:-1])
+            selected = [length > 0 for length in block_lengths]
+            starts, run_values = data.select_blocks(
+                index[block_starts[selected]], np.array(block_lengths)[selected])
+            return RunLengthSignalData(timestamps, starts, run_values, len(index))
+        # concat_signal_data starts from an empty float array, which promotes integer values to float
+        values = data.values[index].astype(
+            np.result_type(np.float64, data.values.dtype), copy=False)
+        return SignalData(timestamps, values)
@@ -3,7 +3,7 @@ from logging import getLogger
 import numpy as np
 
 from .metric_result import MetricResult
-from .signal_data import SignalData
+from .signal_data import RunLengthSignalData, SignalData
 from .metric import Metric
 
 
@@ -13,10 +13,20 @@ class EuclideanDistanceMetric(Metric):
         self.logger = getLogger(__name__)
 
     def __call__(self, ref_channel: SignalData, eval_channel: SignalData) -> MetricResult:
+        return self.compare_prepared(self.prepare(ref_channel), eval_channel)
 
-        amplitude = max(ref_channel.amplitude(), eval_channel.amplitude(), 0.00001)
+    def prepare(self, ref_channel: SignalData) -> tuple[SignalData, float]:
+        return ref_channel, ref_channel.amplitude()
+
+    def compare_prepared(self, prepared: tuple[SignalData, float], eval_channel: SignalData) -> MetricResult:
+        ref_channel, ref_amplitude = prepared
+
+        amplitude = max(ref_amplitude, eval_channel.amplitude(), 0.00001)
         length = ref_channel.shape[0]
 
+        if RunLengthSignalData.have_runs(ref_channel, eval_channel):
+            return self._compare_runs(ref_channel, eval_channel, amplitude, length)
+
         differences = (ref_channel.values -
                        eval_channel.values) ** 2
 
@@ -39,5 +49,33 @@ class EuclideanDistanceMetric(Metric):
 
         return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, parts), {}, {})
 
+    def _compare_runs(self, ref_channel: RunLengthSignalData, eval_channel: RunLengthSignalData, amplitude: float,
+                      length: int) -> MetricResult:
+        """
+        Same as compare_prepared, but computed once per segment in which neither channel changes.
+        """
+        starts, ref_values, eval_values = RunLengthSignalData.joint_runs(
+            ref_channel, eval_channel)
+        run_lengths = np.diff(np.append(starts, length))
+        differences = (ref_values - eval_values) ** 2
+
+        euclidean_distance = np.sqrt(np.sum(differences * run_lengths))
+        max_result = np.sqrt((amplitude ** 2) * length)
+        euclidean_distance_norm = 1 - (euclidean_distance / max_result)
+
+        self.logger.info(
+            f"The euclidean distance was calculated as {euclidean_distance} with the maximal possible distance being {max_result} therefore it was normalized to {euclidean_distance_norm}")
+
+        parts = 1 - (differences / (amplitude ** 2))
+        parts_sum = np.sum(parts * run_lengths)
+        if parts_sum == 0:
+            parts = np.ones(len(starts))
+        else:
+            parts = (parts * length) / parts_sum
+
+        parts = parts * euclidean_distance_norm
+
+        return MetricResult(ref_channel, eval_channel, ref_channel.with_runs(starts, parts), {}, {})
+
     def __str__(self) -> str:
         return f"Euclidean Distance"
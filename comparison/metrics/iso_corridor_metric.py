@@ -1,9 +1,9 @@
 from logging import getLogger
 
-from .signal_data import SignalData
+from .signal_data import RunLengthSignalData, SignalData
 
 from .metric_result import MetricResult
-from .metric import Metric
+from .metric import Metric, PYTHON_LOOP_COST
 import numpy as np
 
 
@@ -42,7 +42,12 @@ class IsoCorridorMetric(Metric):
         self.regression_factor = 2
 
     def __call__(self, ref_channel: SignalData, eval_channel: SignalData) -> MetricResult:
+        return self.compare_prepared(self.prepare(ref_channel), eval_channel)
 
+    def prepare(self, ref_channel: SignalData) -> tuple[SignalData, float, float, dict[str, SignalData]]:
+        """
+        Calculates the corridor widths and boundaries around the reference channel, which are shared by all evaluated channels.
+        """
         amplitude = ref_channel.amplitude()
         inner_corridor = amplitude * self.inner_corridor_a0
         outer_corridor = amplitude * self.outer_corridor_b0
@@ -50,8 +55,14 @@ class IsoCorridorMetric(Metric):
         if amplitude == 0:
             self.logger.warning(f"Amplitude of reference channel is 0!")
 
-        corridor = np.array([self._corridor_func(inner_corridor, outer_corridor, a, b)
-                             for a, b in zip(ref_channel.values, eval_channel.values)])
+        if isinstance(ref_channel, RunLengthSignalData):
+            # the corridors change where the reference changes
+            return ref_channel, inner_corridor, outer_corridor, {
+                "outer_corridor_top": ref_channel.with_runs(ref_channel.starts, ref_channel.run_values + outer_corridor),
+                "inner_corridor_top": ref_channel.with_runs(ref_channel.starts, ref_channel.run_values + inner_corridor),
+                "outer_corridor_bottom": ref_channel.with_runs(ref_channel.starts, ref_channel.run_values - outer_corridor),
+                "inner_corridor_bottom": ref_channel.with_runs(ref_channel.starts, ref_channel.run_values - inner_corridor)
+            }
 
         outer_corridor_top = np.full(
             ref_channel.shape, outer_corridor) + ref_channel.values
@@ -62,12 +73,28 @@ class IsoCorridorMetric(Metric):
         inner_corridor_bottom = ref_channel.values - \
             np.full(ref_channel.shape, inner_corridor)
 
-        return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, corridor), {}, {
+        return ref_channel, inner_corridor, outer_corridor, {
             "outer_corridor_top": SignalData(ref_channel.timestamps, outer_corridor_top),
             "inner_corridor_top": SignalData(ref_channel.timestamps, inner_corridor_top),
             "outer_corridor_bottom": SignalData(ref_channel.timestamps, outer_corridor_bottom),
             "inner_corridor_bottom": SignalData(ref_channel.timestamps, inner_corridor_bottom)
-        })
+        }
+
+    def compare_prepared(self, prepared: tuple[SignalData, float, float, dict[str, SignalData]], eval_channel: SignalData) -> MetricResult:
+        ref_channel, inner_corridor, outer_corridor, corridors = prepared
+
+        if RunLengthSignalData.have_runs(ref_channel, eval_channel):
+            # the score is constant in each segment in which neither channel changes
+            starts, ref_values, eval_values = RunLengthSignalData.joint_runs(
+                ref_channel, eval_channel)
+            corridor = np.array([self._corridor_func(inner_corridor, outer_corridor, a, b)
+                                 for a, b in zip(ref_values, eval_values)], dtype=np.float64)
+            return MetricResult(ref_channel, eval_channel, ref_channel.with_runs(starts, corridor), {}, dict(corridors))
+
+        corridor = np.array([self._corridor_func(inner_corridor, outer_corridor, a, b)
+                             for a, b in zip(ref_channel.values, eval_channel.values)])
+
+        return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, corridor), {}, dict(corridors))
 
     def _corridor_func(self, inner: float, outer: float, a: float, b: float) -> float:
 
@@ -81,5 +108,8 @@ class IsoCorridorMetric(Metric):
             return 0
         return ((outer - diff) / (outer - inner)) ** self.regression_factor
 
+    def estimate_cost(self, length: int) -> float:
+        return float(length) * PYTHON_LOOP_COST
+
     def __str__(self) -> str:
         return f"IsoCorridorMetric ({self.inner_corridor_a0}, {self.outer_corridor_b0}, {self.regression_factor})"
@@ -1,7 +1,7 @@
 from logging import getLogger
 
 from .signal_data import SignalData
-from .metric import Metric
+from .metric import Metric, PYTHON_LOOP_COST
 from .metric_result import MetricResult
 from .iso_phase_metric import IsoPhaseMetric
 
@@ -135,5 +135,14 @@ class IsoMagnitudeMetric(Metric):
 
         return max(0, (self.max_error - epsilon_mag) / self.max_error) ** self.regression_factor
 
+    def estimate_cost(self, length: int) -> float:
+        dtw_cost = 2 * self.time_warping_window * \
+            float(length) ** 2 * PYTHON_LOOP_COST
+        return IsoPhaseMetric().estimate_cost(length) + dtw_cost
+
+    def estimate_memory(self, length: int) -> int:
+        # dtw_matrix and pure_dtw_matrix
+        return 2 * 8 * length ** 2
+
     def __str__(self) -> str:
         return "IsoMagnitudeMetric"
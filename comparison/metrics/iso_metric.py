@@ -52,5 +52,13 @@ class IsoMetric(Metric):
 
         return result
 
+    def estimate_cost(self, length: int) -> float:
+        return sum(metric.estimate_cost(length) for metric in [
+            IsoCorridorMetric(), IsoMagnitudeMetric(), IsoPhaseMetric(), IsoSlopeMetric()])
+
+    def estimate_memory(self, length: int) -> int:
+        return max(metric.estimate_memory(length) for metric in [
+            IsoCorridorMetric(), IsoMagnitudeMetric(), IsoPhaseMetric(), IsoSlopeMetric()])
+
     def __str__(self) -> str:
         return "ISO Metric"
@@ -41,5 +41,8 @@ class IsoMetricSmall(Metric):
 
         return result
 
+    def estimate_cost(self, length: int) -> float:
+        return IsoCorridorMetric().estimate_cost(length) + IsoPhaseMetric(self.allowed_time_shift).estimate_cost(length)
+
     def __str__(self) -> str:
         return f"IsoMetricSmall ({self.allowed_time_shift})"
@@ -121,5 +121,8 @@ class IsoPhaseMetric(Metric):
 
         return max(0, ((max_allowed_shift - best) / max_allowed_shift) ** self.regression_factor), shifted_reference, shifted_evaluated
 
+    def estimate_cost(self, length: int) -> float:
+        return 2 * self.allowable_time_shift * float(length) ** 2
+
     def __str__(self):
         return f"IsoPhaseMetric ({self.allowable_time_shift})"
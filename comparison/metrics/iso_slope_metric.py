@@ -1,5 +1,5 @@
 from .signal_data import SignalData
-from .metric import Metric
+from .metric import Metric, PYTHON_LOOP_COST
 from .metric_result import MetricResult
 from .iso_phase_metric import IsoPhaseMetric
 import numpy as np
@@ -93,5 +93,8 @@ class IsoSlopeMetric(Metric):
             a_slope - b_slope) / b_slope_norm
         return max(0, (self.max_error - epsilon_slope) / self.max_error) ** self.regression_factor
     
+    def estimate_cost(self, length: int) -> float:
+        return IsoPhaseMetric().estimate_cost(length) + 2 * float(length) * PYTHON_LOOP_COST
+
     def __str__(self):
         return "IsoSlopeMetric"
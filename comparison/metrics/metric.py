@@ -4,9 +4,44 @@ from .signal_data import SignalData
 from .metric_result import MetricResult
 import numpy as np
 
+# Relative cost of one sample processed in a python loop compared to a vectorized numpy operation.
+PYTHON_LOOP_COST = 50
+
 
 class Metric(metaclass=ABCMeta):
 
     @abstractmethod
     def __call__(self, ref_channel: SignalData, eval_channel: SignalData) -> MetricResult:
         pass
+
+    def estimate_cost(self, length: int) -> float:
+        """
+        Estimates the relative cost of comparing two channels with the given number of samples.
+        The value has no unit, it is only used by the ComparisonScheduler to order channel pairs,
+        therefore only the ratio between metrics and lengths matters.
+        Metrics which grow faster than linear with the length should override this method.
+        """
+        return float(length)
+
+    def estimate_memory(self, length: int) -> int:
+        """
+        Estimates the peak memory in bytes needed to compare two channels with the given number of samples.
+        Used to skip pairs which would exceed the memory limit of a comparison worker, before they are compared.
+        Metrics which allocate more than a few arrays of the input length should override this method.
+        """
+        return 64 * length
+
+    def prepare(self, ref_channel: SignalData) -> object:
+        """
+        Precomputes everything that only depends on the reference channel, such that comparing one reference channel
+        with many evaluated channels (see ComparisonMatrix) does not repeat it for every pair.
+        The returned object is passed to compare_prepared. By default the reference channel itself is returned.
+        """
+        return ref_channel
+
+    def compare_prepared(self, prepared: object, eval_channel: SignalData) -> MetricResult:
+        """
+        Compares an evaluated channel with a reference channel prepared by prepare.
+        Must return the same result as calling the metric with the reference channel.
+        """
+        return self(prepared, eval_channel)
@@ -98,5 +98,9 @@ class OPSAMetric(Metric):
         row_ind, col_ind = opt.linear_sum_assignment(dist_mat)
         return np.array([row_ind, col_ind])
 
+    def estimate_cost(self, length: int) -> float:
+        # one assignment problem per interval, the interval size depends on the sample rate
+        return float(length) ** 2
+
     def __str__(self) -> str:
         return f"OPSA ({self.cutoff}, {self.size_y}, {self.interval_time}, {self.interval_extent}, {self.p})"
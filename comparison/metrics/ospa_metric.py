@@ -91,5 +91,13 @@ class OSPAMetric(Metric):
         row_ind, col_ind = opt.linear_sum_assignment(dist_mat)
         return np.array([row_ind, col_ind])
 
+    def estimate_cost(self, length: int) -> float:
+        # dense n x n distance matrix and the hungarian assignment on it
+        return float(length) ** 3
+
+    def estimate_memory(self, length: int) -> int:
+        # distance matrix, its clipped and its exponentiated copy
+        return 3 * 8 * length ** 2
+
     def __str__(self) -> str:
         return f"OSPA ({self.cutoff}, {self.size_y}, {self.interval_time}, {self.interval_extent}, {self.p})"
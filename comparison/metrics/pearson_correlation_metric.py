@@ -11,20 +11,33 @@ class PearsonCorrelationMetric(Metric):
         self.logger = getLogger(__name__)
 
     def __call__(self, ref_channel: SignalData, eval_channel: SignalData) -> MetricResult:
-        ref_values = ref_channel.values
-        eval_values = eval_channel.values
-        length = len(ref_values)
+        return self.compare_prepared(self.prepare(ref_channel), eval_channel)
 
-        correlation = self.pearson_correlation(ref_values, eval_values)
+    def prepare(self, ref_channel: SignalData) -> tuple[SignalData, np.ndarray, float]:
+        """
+        Centers the reference values and calculates their sum of squares, which are shared by all evaluated channels.
+        """
+        centered = ref_channel.values - ref_channel.values.mean()
+        return ref_channel, centered, np.sum(centered ** 2)
+
+    def compare_prepared(self, prepared: tuple[SignalData, np.ndarray, float], eval_channel: SignalData) -> MetricResult:
+        ref_channel, ref_centered, ref_sum_of_squares = prepared
+        length = len(ref_channel.values)
+
+        correlation = self.pearson_correlation_prepared(
+            ref_centered, ref_sum_of_squares, eval_channel.values)
         result = np.full(length, correlation)
 
         return MetricResult(ref_channel, eval_channel, SignalData(ref_channel.timestamps, result), {}, {})
 
     def pearson_correlation(self, a: np.ndarray, b: np.ndarray) -> float:
-        mean_a = a.mean()
+        centered_a = a - a.mean()
+        return self.pearson_correlation_prepared(centered_a, np.sum(centered_a ** 2), b)
+
+    def pearson_correlation_prepared(self, centered_a: np.ndarray, sum_of_squares_a: float, b: np.ndarray) -> float:
         mean_b = b.mean()
-        upper = np.sum((a - mean_a) * (b - mean_b))
-        lower = np.sqrt(np.sum((a - mean_a) ** 2)
+        upper = np.sum(centered_a * (b - mean_b))
+        lower = np.sqrt(sum_of_squares_a
                         * np.sum((b - mean_b) ** 2))
         if lower == 0:
             return 0
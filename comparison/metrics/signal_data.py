@@ -2,7 +2,7 @@ import numpy as np
 
 from dataclasses import dataclass
 
-from measurement.channel.channel_data import ChannelData
+from measurement.channel.channel_data import ChannelData, RunLengthChannelData, expand_runs
 
 
 @dataclass
@@ -44,8 +44,127 @@ class SignalData:
 
     @staticmethod
     def from_channel_data(data: ChannelData) -> 'SignalData':
+        if isinstance(data, RunLengthChannelData):
+            return RunLengthSignalData(None, data.starts, data.run_values, data.samples,
+                                       (data.time_start, data.time_end))
         return SignalData(data.timestamps(), data.datapoints())
 
     @staticmethod
     def empty() -> 'SignalData':
         return SignalData(np.array([]), np.array([]))
+
+
+class RunLengthSignalData(SignalData):
+    """
+    SignalData of a step-like signal, given by runs of equal values. The values are only expanded when they are
+    accessed, metrics with a fast path for segments (see joint_runs) use the runs directly.
+    The timestamps are given, or created on access from a time range like np.linspace.
+    Args:
+        timestamps (np.ndarray | None): The timestamps, or None if they are given by time_range.
+        starts (np.ndarray): The index of the first sample of each run, starting with 0.
+        run_values (np.ndarray): The value of each run.
+        samples (int): The number of samples.
+        time_range (tuple[float, float] | None): The first and last timestamp of a regular time axis.
+    """
+
+    def __init__(self, timestamps: np.ndarray | None, starts: np.ndarray, run_values: np.ndarray, samples: int,
+                 time_range: tuple[float, float] | None = None) -> None:
+        self.expanded_timestamps = timestamps
+        self.starts = starts
+        self.run_values = run_values
+        self.samples = samples
+        self.time_range = time_range
+        self.expanded_values = None
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        if self.expanded_timestamps is None:
+            self.expanded_timestamps = np.linspace(
+                self.time_range[0], self.time_range[1], self.samples)
+        return self.expanded_timestamps
+
+    @property
+    def values(self) -> np.ndarray:
+        if self.expanded_values is None:
+            self.expanded_values = expand_runs(
+                self.starts, self.run_values, self.samples)
+        return self.expanded_values
+
+    def __len__(self):
+        return self.samples
+
+    def __getitem__(self, key) -> tuple[float, float]:
+        return (self.values[key], self.timestamps[key])
+
+    def run_lengths(self) -> np.ndarray:
+        return np.diff(np.append(self.starts, self.samples))
+
+    def with_runs(self, starts: np.ndarray, run_values: np.ndarray) -> 'RunLengthSignalData':
+        """
+        Returns signal data with the same timestamps and other runs, without expanding the timestamps.
+        """
+        return RunLengthSignalData(self.expanded_timestamps, starts, run_values, self.samples, self.time_range)
+
+    def amplitude(self) -> float:
+        return max(abs(np.max(self.run_values)), abs(np.min(self.run_values)))
+
+    def min(self) -> float:
+        return np.min(self.run_values)
+
+    def max(self) -> float:
+        return np.max(self.run_values)
+
+    def mean(self) -> float:
+        return np.sum(self.run_values * self.run_lengths()) / self.samples
+
+    @property
+    def shape(self):
+        return (self.samples,)
+
+    def select_blocks(self, block_starts: list[int], block_lengths: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the runs of the concatenation of blocks of consecutive samples.
+        Args:
+            block_starts (list[int]): The index of the first sample of each block.
+            block_lengths (list[int]): The number of samples of each block, at least 1.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The starts and values of the runs.
+        """
+        starts = []
+        run_values = []
+        position = 0
+        for block_start, block_length in zip(block_starts, block_lengths):
+            first = np.searchsorted(self.starts, block_start, side="right") - 1
+            last = np.searchsorted(
+                self.starts, block_start + block_length, side="left")
+            starts.append(np.maximum(
+                self.starts[first:last] - block_start, 0) + position)
+            run_values.append(self.run_values[first:last])
+            position += block_length
+        if len(starts) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        return np.concatenate(starts), np.concatenate(run_values)
+
+    @staticmethod
+    def joint_runs(a: 'RunLengthSignalData', b: 'RunLengthSignalData') -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Splits two signals with the same number of samples into segments in which neither of them changes.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The index of the first sample of each segment, and the values
+                of both signals in each segment.
+        """
+        starts = np.union1d(a.starts, b.starts)
+        a_values = a.run_values[np.searchsorted(
+            a.starts, starts, side="right") - 1]
+        b_values = b.run_values[np.searchsorted(
+            b.starts, starts, side="right") - 1]
+        return starts, a_values, b_values
+
+    @staticmethod
+    def have_runs(*signals: SignalData) -> bool:
+        """
+        Checks whether all signals are RunLengthSignalData with the same number of samples, such that they can be
+        compared segment by segment.
+        """
+        return all(isinstance(signal, RunLengthSignalData) for signal in signals) and \
+            len({len(signal) for signal in signals}) == 1
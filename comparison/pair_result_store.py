@@ -0,0 +1,219 @@
+import json
+from logging import getLogger
+import os
+from typing import Callable, Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from comparison.metrics.metric_result import MetricResult
+from comparison.metrics.signal_data import SignalData
+
+# Version of the layout written by PairResultStore, stored in its index file.
+PAIR_RESULTS_VERSION = 1
+
+PAIR_RESULTS_SCHEMA = pa.schema([("timestamps", pa.float64()), ("values", pa.float64())])
+
+
+def replace_durably(temporary_filename: str, filename: str) -> None:
+    """
+    Flushes a completely written temporary file to disk and renames it to its final name, such that the
+    final file is either the previous or the new version, even if the process or the machine stops.
+    The file is opened for writing, since Windows only flushes files with write access. On file systems that
+    do not support flushing, the file is only renamed.
+    """
+    with open(temporary_filename, "r+b") as file:
+        try:
+            os.fsync(file.fileno())
+        except OSError as error:
+            getLogger(__name__).warning(
+                f"Could not flush {temporary_filename} to disk: {error}")
+    os.replace(temporary_filename, filename)
+
+
+def write_json_durably(data, filename: str) -> None:
+    """
+    Writes a json file through a temporary file, see replace_durably.
+    """
+    temporary_filename = f"{filename}.tmp"
+    with open(temporary_filename, "w") as file:
+        json.dump(data, file)
+    replace_durably(temporary_filename, filename)
+
+
+class PairResultStore():
+    """
+    Stores the metric results of the channel pairs of a saved comparison.
+    All series of a pair (the result, and each result and input metadata entry) are stored one after another in a
+    single row group of <id>_pair_results.parquet, with one row group per pair. An index file <id>_pair_index.json
+    lists for each pair its channel ids, its row group and the position of each series within it, such that a
+    single pair can be loaded by reading only its row group, and series of different lengths need no padding.
+    The input of each metric result is not stored, as it is loaded from the channel data.
+    Args:
+        base_path (str): Folder of the saved comparisons.
+        id (str): Id of the comparison, the hash of its name.
+    Example usage:
+        store = PairResultStore(base_path, id)
+        store.write(comparison.channel_results)
+        result, result_metadata, input_metadata = store.read_pair(0)
+    """
+
+    def __init__(self, base_path: str, id: str) -> None:
+        self.logger = getLogger(__name__)
+        self.filename = f"{base_path}/{id}_pair_results.parquet"
+        self.index_filename = f"{base_path}/{id}_pair_index.json"
+        self.index: list[dict] | None = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename) and os.path.exists(self.index_filename)
+
+    def write(self, channel_results: list[tuple], on_progress: Callable[[int], None] | None = None) -> None:
+        """
+        Writes the results of all pairs, one row group at a time, see PairResultWriter.
+        Args:
+            channel_results (list[tuple]): The (ref_channel, eval_channel, MetricResult) tuple of each pair.
+            on_progress (Callable[[int], None] | None): Called with the percentage of written pairs whenever it changes.
+        """
+        with PairResultWriter(self) as writer:
+            for i, (ref_channel, eval_channel, result) in enumerate(channel_results):
+                if (i * 100 // len(channel_results)) != ((i - 1) * 100 // len(channel_results)):
+                    self.logger.info(
+                        f"Saving channel results {i * 100 // len(channel_results)}%")
+                    if on_progress is not None:
+                        on_progress(i * 100 // len(channel_results))
+                writer.append(ref_channel, eval_channel, result)
+
+    def read_index(self) -> list[dict]:
+        if self.index is None:
+            data = json.load(open(self.index_filename, "r"))
+            if data.get("version") != PAIR_RESULTS_VERSION:
+                self.logger.warning(
+                    f"Unknown version {data.get('version')} of {self.index_filename}")
+            self.index = data["pairs"]
+        return self.index
+
+    def read_pair(self, position: int, parquet_file: pq.ParquetFile | None = None) -> tuple[SignalData, dict[str, SignalData], dict[str, SignalData]]:
+        """
+        Reads the result of a single pair, by reading only its row group.
+        Args:
+            position (int): Position of the pair in the saved comparison.
+            parquet_file (pq.ParquetFile | None): An already opened results file, when reading many pairs.
+        Returns:
+            tuple: The result, the result metadata and the input metadata of the pair.
+        """
+        entry = self.read_index()[position]
+        if entry["row_group"] is None:
+            timestamps = np.array([])
+            values = np.array([])
+        else:
+            if parquet_file is None:
+                parquet_file = pq.ParquetFile(self.filename)
+            table = parquet_file.read_row_group(entry["row_group"])
+            timestamps = table.column("timestamps").to_numpy()
+            values = table.column("values").to_numpy()
+
+        result = SignalData.empty()
+        result_metadata = {}
+        input_metadata = {}
+        for kind, key, start, length in entry["series"]:
+            signal_data = SignalData(
+                timestamps[start:start + length], values[start:start + length])
+            if kind == "result":
+                result = signal_data
+            elif kind == "result_metadata":
+                result_metadata[key] = signal_data
+            else:
+                input_metadata[key] = signal_data
+        return result, result_metadata, input_metadata
+
+    def read_pairs(self) -> Iterator[tuple[str, str, SignalData, dict[str, SignalData], dict[str, SignalData]]]:
+        """
+        Reads all pairs in order, yielding the channel ids, the result, the result metadata and the input metadata of each.
+        """
+        parquet_file = pq.ParquetFile(self.filename)
+        for position, entry in enumerate(self.read_index()):
+            yield (entry["ref_id"], entry["eval_id"]) + self.read_pair(position, parquet_file)
+
+    def remove(self) -> None:
+        for filename in [self.filename, self.index_filename]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+
+class PairResultWriter():
+    """
+    Writes the results of a PairResultStore incrementally, one pair at a time as they are appended.
+    The series of a pair are handed to the parquet writer as chunks of one row group, without concatenating or
+    padding them, therefore the memory needed besides the results themselves is bounded by the write buffers
+    of a single pair. The results are written to a temporary file, which replaces the store once the writer is
+    closed, such that a comparison that is still read lazily from the store can be saved again.
+    Args:
+        store (PairResultStore): The store to write.
+    Example usage:
+        with PairResultWriter(store) as writer:
+            for ref_channel, eval_channel, result in channel_results:
+                writer.append(ref_channel, eval_channel, result)
+    """
+
+    def __init__(self, store: PairResultStore) -> None:
+        self.store = store
+        self.temporary_filename = f"{store.filename}.tmp"
+        self.writer = pq.ParquetWriter(
+            self.temporary_filename, PAIR_RESULTS_SCHEMA)
+        self.index = []
+        self.row_groups = 0
+
+    def __enter__(self) -> 'PairResultWriter':
+        return self
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        if exception_type is None:
+            self.close()
+        else:
+            self.writer.close()
+            os.remove(self.temporary_filename)
+
+    def append(self, ref_channel, eval_channel, result: MetricResult) -> None:
+        """
+        Writes the result of a pair as one row group.
+        """
+        series = [("result", None, result.result)]
+        series += [("result_metadata", key, value)
+                   for key, value in result.result_metadata.items()]
+        series += [("input_metadata", key, value)
+                   for key, value in result.input_metadata.items()]
+
+        entries = []
+        timestamps = []
+        values = []
+        start = 0
+        for kind, key, signal_data in series:
+            length = len(signal_data.values)
+            entries.append([kind, key, start, length])
+            if length > 0:
+                timestamps.append(pa.array(np.asarray(
+                    signal_data.timestamps, dtype=np.float64)))
+                values.append(pa.array(np.asarray(
+                    signal_data.values, dtype=np.float64)))
+            start += length
+
+        entry = {"ref_id": ref_channel.id,
+                 "eval_id": eval_channel.id, "row_group": None, "series": entries}
+        if start > 0:
+            table = pa.Table.from_arrays([pa.chunked_array(timestamps, pa.float64()), pa.chunked_array(values, pa.float64())],
+                                         schema=PAIR_RESULTS_SCHEMA)
+            self.writer.write_table(table, row_group_size=start)
+            entry["row_group"] = self.row_groups
+            self.row_groups += 1
+        self.index.append(entry)
+
+    def close(self) -> None:
+        """
+        Finishes the results file, replaces the store with it and writes the index.
+        """
+        self.writer.close()
+        replace_durably(self.temporary_filename, self.store.filename)
+        write_json_durably({"version": PAIR_RESULTS_VERSION, "pairs": self.index},
+                           self.store.index_filename)
+        self.store.index = self.index
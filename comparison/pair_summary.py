@@ -0,0 +1,66 @@
+from dataclasses import dataclass, field, asdict
+
+import numpy as np
+
+from comparison.metrics.metric_result import MetricResult
+
+# Thresholds for which the fraction of the result below them is summarized, matching the colors of the CompareView.
+SUMMARY_THRESHOLDS = [0.4, 0.6, 0.8, 0.9]
+
+
+@dataclass
+class PairSummary():
+    """
+    Summary statistics of the result of a channel pair, such that comparisons can be listed, sorted and filtered
+    without reducing the full result arrays again. Stored alongside a saved comparison, see ComparisonRepository.
+    Attributes:
+        ref_id (str): Id of the reference channel.
+        ref_name (str): Name of the reference channel.
+        eval_id (str): Id of the evaluated channel.
+        eval_name (str): Name of the evaluated channel.
+        mean (float): Mean of the result.
+        min (float): Minimum of the result.
+        max (float): Maximum of the result.
+        median (float): Median of the result.
+        fraction_below (dict[str, float]): Fraction of the result samples below each threshold of SUMMARY_THRESHOLDS,
+            keyed by the threshold as string.
+        worst_time (float | None): Time of the lowest result value.
+    """
+    ref_id: str
+    ref_name: str
+    eval_id: str
+    eval_name: str
+    mean: float = np.nan
+    min: float = np.nan
+    max: float = np.nan
+    median: float = np.nan
+    fraction_below: dict[str, float] = field(default_factory=dict)
+    worst_time: float | None = None
+
+    @staticmethod
+    def from_result(ref_channel, eval_channel, result: MetricResult) -> 'PairSummary':
+        """
+        Summarizes the result of a channel pair. The channels may be ChannelData or Channel objects.
+        """
+        summary = PairSummary(ref_channel.id, ref_channel.name,
+                              eval_channel.id, eval_channel.name)
+        values = np.asarray(result.result.values)
+        if len(values) == 0:
+            return summary
+
+        summary.mean = float(values.mean())
+        summary.min = float(values.min())
+        summary.max = float(values.max())
+        summary.median = float(np.median(values))
+        summary.fraction_below = {str(threshold): float(np.count_nonzero(values < threshold) / len(values))
+                                  for threshold in SUMMARY_THRESHOLDS}
+        summary.worst_time = float(
+            np.asarray(result.result.timestamps)[np.argmin(values)])
+        return summary
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(data: dict) -> 'PairSummary':
+        return PairSummary(**data)
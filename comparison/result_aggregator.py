@@ -0,0 +1,164 @@
+import numpy as np
+
+from comparison.metrics.signal_data import SignalData
+
+
+class ResultAggregator():
+    """
+    Aggregates the results of many channel pairs into a total result while they arrive, without keeping a
+    matrix of all results in memory.
+    All results are placed on a shared time grid: the grid starts at the first timestamp of the first result and
+    has the time step of the first result with at least two samples. Each sample is assigned to the nearest grid
+    point, therefore results of different lengths (e.g. OPSAMetric, which omits the last interval) or shifted results
+    are aligned by time, and the grid grows as needed. NaN and infinite values are ignored.
+    Besides sum and count per grid point, a histogram of the values per grid point is kept, from which percentile
+    bands are estimated. The histogram starts with the value range [0, 1] and doubles it whenever a value falls
+    outside, such that the resolution of the percentiles is (range of the values) / bins. The memory needed
+    therefore only depends on the length of the grid, not on the number of results.
+    Args:
+        bins (int): Number of histogram bins per grid point, must be even.
+    Example usage:
+        aggregator = ResultAggregator()
+        for metric_result in results:
+            aggregator.add(metric_result.result)
+        mean = aggregator.mean()
+        bands = aggregator.percentiles([5, 50, 95])
+    """
+
+    def __init__(self, bins: int = 64) -> None:
+        if bins < 2 or bins % 2 != 0:
+            raise ValueError("The number of bins must be even")
+        self.bins = bins
+        self.origin: float | None = None
+        self.time_step: float | None = None
+        self.timestamps = np.array([])
+        self.sum = np.array([])
+        self.count = np.array([], dtype=np.int64)
+        self.histogram = np.zeros((0, bins), dtype=np.uint16)
+        self.value_min = 0.0
+        self.value_max = 1.0
+        self.results = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def add(self, result: SignalData) -> None:
+        """
+        Adds the result of a channel pair.
+        """
+        timestamps = np.asarray(result.timestamps, dtype=np.float64)
+        values = np.asarray(result.values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        if self.origin is None:
+            self.origin = float(timestamps[0])
+        if self.time_step is None and len(timestamps) > 1 and timestamps[1] > timestamps[0]:
+            self.time_step = float(timestamps[1] - timestamps[0])
+        time_step = self.time_step if self.time_step is not None else 1.0
+
+        index = np.rint((timestamps - self.origin) / time_step).astype(np.int64)
+        index = self._grow(index, timestamps)
+
+        valid = np.isfinite(values)
+        if not valid.all():
+            index = index[valid]
+            values = values[valid]
+        if len(values) == 0:
+            return
+
+        self._fit_range(values.min(), values.max())
+        if self.results == np.iinfo(self.histogram.dtype).max:
+            self.histogram = self.histogram.astype(np.uint32)
+        self.results += 1
+
+        bin_width = (self.value_max - self.value_min) / self.bins
+        value_bins = np.clip(((values - self.value_min) / bin_width).astype(np.int64), 0, self.bins - 1)
+        if np.all(np.diff(index) > 0):
+            # the common case, each grid point is hit at most once
+            self.sum[index] += values
+            self.count[index] += 1
+            self.histogram.reshape(-1)[index * self.bins + value_bins] += 1
+        else:
+            np.add.at(self.sum, index, values)
+            np.add.at(self.count, index, 1)
+            np.add.at(self.histogram, (index, value_bins), 1)
+
+    def _grow(self, index: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Extends the grid such that it contains the given grid indices, and returns them relative to the new grid.
+        Grid points without timestamp yet take the timestamp of the first result hitting them.
+        """
+        front = max(0, -int(index.min()))
+        back = max(0, int(index.max()) + 1 + front - len(self.timestamps))
+        if front > 0 or back > 0:
+            self.timestamps = np.concatenate(
+                [np.full(front, np.nan), self.timestamps, np.full(back, np.nan)])
+            self.sum = np.concatenate([np.zeros(front), self.sum, np.zeros(back)])
+            self.count = np.concatenate([np.zeros(front, dtype=np.int64), self.count,
+                                         np.zeros(back, dtype=np.int64)])
+            self.histogram = np.concatenate([np.zeros((front, self.bins), dtype=self.histogram.dtype), self.histogram,
+                                             np.zeros((back, self.bins), dtype=self.histogram.dtype)])
+            if front > 0:
+                self.origin -= front * (self.time_step if self.time_step is not None else 1.0)
+            index = index + front
+        missing = np.isnan(self.timestamps[index])
+        if missing.any():
+            self.timestamps[index[missing]] = timestamps[missing]
+        return index
+
+    def _fit_range(self, value_min: float, value_max: float) -> None:
+        """
+        Doubles the value range of the histogram until it contains the given values, merging pairs of bins.
+        """
+        while value_max > self.value_max or value_min < self.value_min:
+            width = self.value_max - self.value_min
+            half = self.bins // 2
+            merged = self.histogram.reshape(-1, half, 2).sum(axis=2, dtype=self.histogram.dtype)
+            histogram = np.zeros_like(self.histogram)
+            if value_max > self.value_max:
+                histogram[:, :half] = merged
+                self.value_max += width
+            else:
+                histogram[:, half:] = merged
+                self.value_min -= width
+            self.histogram = histogram
+
+    def mean(self) -> SignalData:
+        """
+        Returns the mean of all results per grid point. Grid points without any value are NaN.
+        """
+        values = np.full(len(self.sum), np.nan)
+        np.divide(self.sum, self.count, out=values, where=self.count > 0)
+        return SignalData(self._grid_timestamps(), values)
+
+    def percentiles(self, percentiles: list[float]) -> dict[float, SignalData]:
+        """
+        Estimates percentiles of all results per grid point from the histograms, interpolating linearly within a bin.
+        Args:
+            percentiles (list[float]): The percentiles to estimate, between 0 and 100.
+        Returns:
+            dict[float, SignalData]: The estimated values of each percentile. Grid points without any value are NaN.
+        """
+        timestamps = self._grid_timestamps()
+        bin_width = (self.value_max - self.value_min) / self.bins
+        cumulative = np.cumsum(self.histogram, axis=1, dtype=np.int64)
+        rows = np.arange(len(cumulative))
+        bands = {}
+        for percentile in percentiles:
+            target = percentile / 100 * self.count
+            value_bin = np.argmax(cumulative >= target[:, None], axis=1)
+            below = np.where(value_bin > 0, cumulative[rows, value_bin - 1], 0)
+            within = self.histogram[rows, value_bin].astype(np.float64)
+            fraction = np.divide(target - below, within, out=np.zeros(len(rows)), where=within > 0)
+            values = self.value_min + bin_width * (value_bin + fraction)
+            values[self.count == 0] = np.nan
+            bands[percentile] = SignalData(timestamps, values)
+        return bands
+
+    def _grid_timestamps(self) -> np.ndarray:
+        timestamps = self.timestamps.copy()
+        missing = np.isnan(timestamps)
+        if missing.any():
+            time_step = self.time_step if self.time_step is not None else 1.0
+            timestamps[missing] = self.origin + np.flatnonzero(missing) * time_step
+        return timestamps
@@ -1,14 +1,24 @@
 from logging import getLogger
 import numpy as np
+from PySide6.QtCore import QThread, Signal
 
 from comparison.comparison import Comparison
 from comparison.metrics.signal_data import SignalData
 from comparison.sync_block import SyncBlock
+from measurement.channel.channel import Channel
 from measurement.channel.channel_data import ChannelData
+from measurement.channel.channel_data_repository import ChannelDataRepository
 import math
 
 import itertools
 
+# number of samples checked at once when searching for a sync time
+SYNC_SEARCH_BLOCK_SIZE = 65536
+# relative tolerance of math.isclose, which is used to detect value changes of sync marker channels
+MARKER_RELATIVE_TOLERANCE = 1e-09
+# maximum number of channel pairs inspected when selecting informative channels for the automatic synchronization
+AUTO_SYNC_MAX_CANDIDATES = 200
+
 
 class SyncProcessor:
 
@@ -35,20 +45,52 @@ class SyncProcessor:
         """
         timestamps = channel_data.timestamps()
         values = channel_data.datapoints()
-        last_value = values[0]
+        index = self._first_sync_index(timestamps, values, sync_value, after_time)
+        if index is None:
+            return timestamps[-1]
+        return timestamps[index]
+
+    def _first_sync_index(self, timestamps: np.ndarray, values: np.ndarray, sync_value: float, after_time: float) -> int | None:
+        """
+        Returns the index of the first sample after after_time which reaches the sync value, or None.
+        A sample reaches the sync value if it equals it, or if the signal crosses or touches the sync value between
+        the previous and the sample, while the sample is within the tolerance of the sync value.
+        The samples are checked in blocks, such that an early sync time does not require checking the whole channel.
+        """
         tolerance = max(0.1 * np.abs(sync_value), 0.1)
-        for i in range(1, len(timestamps)):
-            if timestamps[i] <= after_time:
-                last_value = values[i]
-                continue
-            if values[i] >= sync_value and last_value <= sync_value and abs(values[i] - sync_value) < tolerance:
-                return timestamps[i]
-            if values[i] <= sync_value and last_value >= sync_value and abs(values[i] - sync_value) < tolerance:
-                return timestamps[i]
-            if values[i] == sync_value:
-                return timestamps[i]
-            last_value = values[i]
-        return timestamps[-1]
+        start = max(int(np.searchsorted(timestamps, after_time, side="right")), 1)
+        for block_start in range(start, len(timestamps), SYNC_SEARCH_BLOCK_SIZE):
+            block_end = min(block_start + SYNC_SEARCH_BLOCK_SIZE, len(timestamps))
+            current = values[block_start:block_end]
+            previous = values[block_start - 1:block_end - 1]
+            within_tolerance = np.abs(current - sync_value) < tolerance
+            rising = (current >= sync_value) & (previous <= sync_value)
+            falling = (current <= sync_value) & (previous >= sync_value)
+            reached = ((rising | falling) & within_tolerance) | (current == sync_value)
+            hits = np.flatnonzero(reached)
+            if len(hits) > 0:
+                return block_start + int(hits[0])
+        return None
+
+    def find_sync_time_batch(self, channels: list[ChannelData], sync_value: float, after_time: float = 0) -> list[float]:
+        """
+        Finds the sync time of several candidate channels, see find_sync_time.
+
+        Parameters
+        ----------
+        channels : list[ChannelData]
+            Channels to find the sync time in.
+        sync_value : float
+            Value to find the sync time for.
+        after_time : float
+            Only samples after this time are considered.
+
+        Returns
+        -------
+        list[float]
+            The sync time of each channel, in the order of the channels.
+        """
+        return [self.find_sync_time(channel, sync_value, after_time) for channel in channels]
 
     def find_longest_end_sync_time(self, ref_start: float, eval_start: float, comparison: Comparison) -> tuple[float, float]:
         """
@@ -124,11 +166,56 @@ class SyncProcessor:
         """
         timestamps = channel.timestamps()
         values = channel.datapoints()
+        changes = np.flatnonzero(~self._is_close(values[1:], values[:-1])) + 1
+        return self._sync_markers(timestamps, values, changes, use_initial_value)
+
+    def find_all_sync_times_batch(self, channels: list[ChannelData], use_initial_value: bool) -> dict[str, list[tuple[float, float]]]:
+        """
+        Finds all the sync times of several candidate channels at once, see find_all_sync_times.
+        Channels with the same number of samples are stacked, such that the value changes of all of them are
+        detected in a single pass.
+
+        Args:
+            channels (list[ChannelData]): The channels to search for sync times.
+            use_initial_value (bool): Whether the first sample of each channel is a sync marker.
+
+        Returns:
+            dict[str, list[tuple[float, float]]]: The sync markers of each channel, by channel id.
+        """
+        sync_times = {}
+        channels_by_length: dict[int, list[ChannelData]] = {}
+        for channel in channels:
+            channels_by_length.setdefault(len(channel.datapoints()), []).append(channel)
+
+        for length, group in channels_by_length.items():
+            if length == 0:
+                for channel in group:
+                    sync_times[channel.id] = self.find_all_sync_times(channel, use_initial_value)
+                continue
+            values = np.stack([channel.datapoints() for channel in group])
+            changed = ~self._is_close(values[:, 1:], values[:, :-1])
+            for row, channel in enumerate(group):
+                changes = np.flatnonzero(changed[row]) + 1
+                sync_times[channel.id] = self._sync_markers(
+                    channel.timestamps(), channel.datapoints(), changes, use_initial_value)
+        return sync_times
+
+    def _is_close(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Element-wise math.isclose with its default tolerances, which differs from np.isclose.
+        """
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        with np.errstate(invalid="ignore", over="ignore"):
+            difference = np.abs(b - a)
+            close = (difference <= np.abs(MARKER_RELATIVE_TOLERANCE * b)) | \
+                (difference <= np.abs(MARKER_RELATIVE_TOLERANCE * a))
+        return (a == b) | (np.isfinite(a) & np.isfinite(b) & close)
+
+    def _sync_markers(self, timestamps: np.ndarray, values: np.ndarray, changes: np.ndarray, use_initial_value: bool) -> list[tuple[float, float]]:
         sync_times = [(timestamps[0], values[0])] if use_initial_value else []
-        for i in range(1, len(timestamps)):
-            if not math.isclose(values[i], values[i-1]):
-                sync_times.append((timestamps[i], values[i]))
-        if sync_times[-1] != (timestamps[-1], values[-1]):
+        sync_times.extend(zip(timestamps[changes], values[changes]))
+        if len(sync_times) == 0 or sync_times[-1] != (timestamps[-1], values[-1]):
             sync_times.append((timestamps[-1], values[-1]))
         return sync_times
 
@@ -206,3 +293,238 @@ class SyncProcessor:
 
             sync_block = SyncBlock(ref_start, ref_end, eval_start, eval_end)
             comparison.add_sync_block(sync_block)
+
+    def estimate_offset(self, ref_data: SignalData, eval_data: SignalData, max_offset: float) -> tuple[float, float]:
+        """
+        Estimates the time offset between two signals, using an FFT based cross-correlation.
+        The offset is the time that has to be added to a reference time to get the time of the same event
+        in the evaluated signal.
+
+        Args:
+            ref_data (SignalData): The reference signal.
+            eval_data (SignalData): The evaluated signal, sampled with the same time step.
+            max_offset (float): The largest offset in seconds that is considered, in both directions.
+
+        Returns:
+            tuple[float, float]: The offset in seconds and the correlation at that offset, between -1 and 1.
+                The correlation is 0 if one of the signals is constant.
+        """
+        if len(ref_data) < 2 or len(eval_data) < 2:
+            return 0.0, 0.0
+        time_step = ref_data.sample_time_step
+        ref_values = ref_data.values - ref_data.values.mean()
+        eval_values = eval_data.values - eval_data.values.mean()
+        ref_norm = np.sqrt(np.sum(ref_values ** 2))
+        eval_norm = np.sqrt(np.sum(eval_values ** 2))
+        if ref_norm == 0 or eval_norm == 0 or not np.isfinite(ref_norm * eval_norm):
+            return 0.0, 0.0
+
+        size = 1 << int(len(ref_values) + len(eval_values) - 1).bit_length()
+        correlation = np.fft.irfft(np.conj(np.fft.rfft(ref_values, size))
+                                   * np.fft.rfft(eval_values, size), size)
+        correlation /= ref_norm * eval_norm
+
+        max_lag = int(max_offset / time_step)
+        positive_lags = min(max_lag, len(eval_values) - 1)
+        negative_lags = min(max_lag, len(ref_values) - 1)
+        lags = np.concatenate([np.arange(-negative_lags, 0),
+                               np.arange(0, positive_lags + 1)])
+        candidates = correlation[lags % size]
+        best = int(np.argmax(candidates))
+        return float(lags[best] * time_step), float(candidates[best])
+
+    def select_sync_channels(self, comparison: Comparison, count: int) -> list[tuple[Channel, Channel]]:
+        """
+        Selects the channel pairs that are most informative for the automatic synchronization, which are the
+        channels whose values change most often. Constant channels are never selected.
+        At most AUTO_SYNC_MAX_CANDIDATES pairs, spread evenly over all pairs, are inspected.
+        """
+        repository = ChannelDataRepository()
+        channel_pairs = comparison.get_channels()
+        step = max(1, len(channel_pairs) // AUTO_SYNC_MAX_CANDIDATES)
+        scores = []
+        for ref_channel, eval_channel in channel_pairs[::step]:
+            ref_data = repository.load_from_channel(ref_channel)
+            if ref_data is None or len(ref_data.datapoints()) < 2:
+                continue
+            changes = np.count_nonzero(np.diff(ref_data.datapoints()))
+            if changes > 0:
+                scores.append((changes, ref_channel, eval_channel))
+        scores.sort(key=lambda score: score[0], reverse=True)
+        return [(ref_channel, eval_channel) for _, ref_channel, eval_channel in scores[:count]]
+
+    def estimate_common_offset(self, pairs: list[tuple[SignalData, SignalData]], max_offset: float,
+                               min_correlation: float) -> tuple[float, float] | None:
+        """
+        Estimates the offset of several channel pairs, and combines them to the correlation weighted median offset.
+        Pairs whose correlation is below min_correlation are ignored.
+
+        Returns:
+            tuple[float, float] | None: The offset in seconds and the mean correlation of the used pairs,
+                or None if no pair reached the minimal correlation.
+        """
+        estimates = [self.estimate_offset(ref_data, eval_data, max_offset)
+                     for ref_data, eval_data in pairs]
+        return self._weighted_median(estimates, min_correlation)
+
+    def _weighted_median(self, estimates: list[tuple[float, float]], min_correlation: float) -> tuple[float, float] | None:
+        estimates = sorted((offset, correlation) for offset, correlation in estimates
+                           if correlation >= min_correlation)
+        if len(estimates) == 0:
+            return None
+        weights = np.cumsum([correlation for _, correlation in estimates])
+        median = int(np.searchsorted(weights, weights[-1] / 2))
+        return estimates[median][0], float(np.mean([correlation for _, correlation in estimates]))
+
+    def auto_sync(self, comparison: Comparison, channel_count: int = 8, max_offset: float = 30.0,
+                  window: float | None = None, max_drift: float = 1.0, min_correlation: float = 0.5) -> list[SyncBlock]:
+        """
+        Synchronizes the measurements of a comparison automatically, without sync values or marker channels.
+
+        The most informative channels (see select_sync_channels) are cross-correlated to estimate a global offset
+        between the measurements. If a window is given, the reference measurement is additionally split into
+        windows of that length, and the offset of each window is estimated within max_drift of the global offset,
+        which compensates drifting clocks or pauses in one of the measurements. Windows without a reliable
+        estimate keep the offset of the previous window.
+        The resulting sync blocks are added to the comparison.
+
+        Args:
+            comparison (Comparison): The comparison to synchronize.
+            channel_count (int): Number of channels used for the estimation.
+            max_offset (float): The largest global offset in seconds that is considered.
+            window (float | None): Length of the windows in seconds for piecewise offsets, or None for a single block.
+            max_drift (float): The largest deviation of a window offset from the global offset, in seconds.
+            min_correlation (float): Channels correlating less than this at their best offset are ignored.
+
+        Returns:
+            list[SyncBlock]: The sync blocks added to the comparison. Empty if no reliable offset was found.
+
+        Example:
+        >>> processor = SyncProcessor()
+        >>> processor.auto_sync(comparison, window=60)
+        """
+        repository = ChannelDataRepository()
+        pairs = []
+        for ref_channel, eval_channel in self.select_sync_channels(comparison, channel_count):
+            ref_data = repository.load_from_channel(ref_channel)
+            eval_data = repository.load_from_channel(eval_channel)
+            if ref_data is None or eval_data is None:
+                continue
+            pairs.append((SignalData.from_channel_data(ref_data),
+                         SignalData.from_channel_data(eval_data)))
+
+        if len(pairs) == 0:
+            self.logger.error("No informative channels found for the automatic synchronization")
+            return []
+
+        estimate = self.estimate_common_offset(pairs, max_offset, min_correlation)
+        if estimate is None:
+            self.logger.error(
+                f"No channel reached a correlation of {min_correlation}, cannot synchronize automatically")
+            return []
+        offset, correlation = estimate
+        self.logger.info(
+            f"Estimated offset of {offset:.3f}s with a correlation of {correlation:.3f} from {len(pairs)} channels")
+
+        time_step = pairs[0][0].sample_time_step
+        ref_length = comparison.ref_measurement.length
+        if window is None:
+            offsets = [(0.0, ref_length, offset)]
+        else:
+            offsets = []
+            window_offset = offset
+            for window_start in np.arange(0, ref_length, window):
+                window_end = min(window_start + window, ref_length)
+                estimates = [self._estimate_window_offset(ref_data, eval_data, window_start, window_end, offset, max_drift)
+                             for ref_data, eval_data in pairs]
+                window_estimate = self._weighted_median(
+                    [estimate for estimate in estimates if estimate is not None], min_correlation)
+                if window_estimate is not None:
+                    window_offset = window_estimate[0]
+                offsets.append((float(window_start), float(window_end), window_offset))
+
+        sync_blocks = self._offsets_to_sync_blocks(offsets, comparison, time_step)
+        for sync_block in sync_blocks:
+            comparison.add_sync_block(sync_block)
+        self.logger.info(f"Added {len(sync_blocks)} sync blocks")
+        return sync_blocks
+
+    def _estimate_window_offset(self, ref_data: SignalData, eval_data: SignalData, window_start: float, window_end: float,
+                                offset: float, max_drift: float) -> tuple[float, float] | None:
+        """
+        Estimates the offset of a window of the reference signal, by correlating it with the window of the evaluated
+        signal at the given offset, extended by max_drift on both sides.
+        Returns the offset in seconds and its correlation, or None if the windows are too short or the best offset
+        deviates more than max_drift from the given offset.
+        """
+        time_step = ref_data.sample_time_step
+        ref_start = max(int(round(window_start / time_step)), 0)
+        ref_end = int(round(window_end / time_step))
+        eval_start = max(int(round((window_start + offset - max_drift) / time_step)), 0)
+        eval_end = max(int(round((window_end + offset + max_drift) / time_step)), 0)
+        ref_window = SignalData(ref_data.timestamps[ref_start:ref_end], ref_data.values[ref_start:ref_end])
+        eval_window = SignalData(eval_data.timestamps[eval_start:eval_end], eval_data.values[eval_start:eval_end])
+        if len(ref_window) < 2 or len(eval_window) < 2:
+            return None
+
+        lag, correlation = self.estimate_offset(
+            ref_window, eval_window, (window_end - window_start) + 2 * max_drift)
+        window_offset = lag + (eval_start - ref_start) * time_step
+        if abs(window_offset - offset) > max_drift + time_step:
+            return None
+        return window_offset, correlation
+
+    def _offsets_to_sync_blocks(self, offsets: list[tuple[float, float, float]], comparison: Comparison,
+                                time_step: float) -> list[SyncBlock]:
+        """
+        Converts (ref_start, ref_end, offset) sections to sync blocks that lie within both measurements.
+        All start times are placed a quarter sample after a sample and all blocks are half a sample longer, such that
+        apply_sync_block selects exactly the intended samples, and ref and eval blocks have the same number of samples
+        despite floating point rounding. Each block selects the samples from its start step up to, but excluding, its
+        end step, and the next block starts at that end step, such that no reference sample is left out between blocks.
+        """
+        last_ref_step = int(comparison.ref_measurement.length / time_step) - 1
+        last_eval_step = int(comparison.eval_measurement.length / time_step) - 1
+        sync_blocks = []
+        next_step = 0
+        for ref_start, ref_end, offset in offsets:
+            offset_steps = int(round(offset / time_step))
+            start_step = max(int(round(ref_start / time_step)), -offset_steps, next_step)
+            end_step = min(int(round(ref_end / time_step)), last_ref_step, last_eval_step - offset_steps)
+            length = end_step - start_step
+            if length <= 0:
+                continue
+            ref_block_start = float((start_step + 0.25) * time_step)
+            eval_block_start = float((start_step + offset_steps + 0.25) * time_step)
+            sync_blocks.append(SyncBlock(ref_block_start, ref_block_start + (length + 0.5) * time_step,
+                                         eval_block_start, eval_block_start + (length + 0.5) * time_step))
+            next_step = end_step
+        return sync_blocks
+
+
+class AutoSyncWorker(QThread):
+    """
+    Runs SyncProcessor.auto_sync in a separate thread, since it loads and correlates full channels.
+    The sync blocks are estimated on a copy of the comparison, the receiver of done applies them.
+    Signals:
+        done (list): Emitted with the estimated sync blocks, empty if no reliable offset was found.
+    Args:
+        comparison (Comparison): The comparison to synchronize, it is not modified.
+        window (float | None): Length of the windows in seconds for piecewise offsets, see auto_sync.
+    """
+    done = Signal(list)
+
+    def __init__(self, comparison: Comparison, window: float | None = None) -> None:
+        super().__init__()
+        self.comparison = comparison.copy()
+        self.comparison.sync_blocks = []
+        self.window = window
+        self.logger = getLogger(__name__)
+
+    def run(self) -> None:
+        try:
+            sync_blocks = SyncProcessor().auto_sync(self.comparison, window=self.window)
+        except Exception as error:
+            self.logger.error(f"Automatic synchronization failed: {type(error).__name__}: {error}")
+            sync_blocks = []
+        self.done.emit(sync_blocks)
@@ -1,4 +1,5 @@
 import logging
+import os
 import uuid
 from PySide6 import QtCore, QtWidgets, QtGui
 from PySide6.QtCore import QMetaType
@@ -7,6 +8,7 @@ import matplotlib.pyplot as plt
 from comparison.comparison_result import ComparisonResult
 from gui.comparison.result_tab import ResultTab
 from gui.measurement.import_window import ImportWindow
+from measurement.import_queue import ImportJob
 from measurement.measurement import Measurement
 from measurement.measurement_import import MeasurementImportInfo
 from measurement.measurement_registry import MeasurementRegistry
@@ -37,9 +39,48 @@ class MainWindow(QtWidgets.QMainWindow):
         central_widget.setLayout(self.main_layout)
         self.setCentralWidget(central_widget)
 
+        import_queue = MeasurementRegistry().import_queue
+        import_queue.jobQueued.connect(self.show_import_status)
+        import_queue.jobProgress.connect(self.show_import_status)
+        import_queue.jobDone.connect(self.show_import_status)
+        import_queue.jobFailed.connect(self.show_import_status)
+        import_queue.jobSkipped.connect(self.show_import_status)
+
     def load_measurement(self, measurement: MeasurementImportInfo):
         self.logger.debug(f"Loading measurement {measurement}")
-        MeasurementRegistry().import_file(measurement)
+        if os.path.isdir(measurement.filename):
+            MeasurementRegistry().import_folder(measurement.filename, measurement)
+        else:
+            MeasurementRegistry().import_file(measurement)
+
+    def show_import_status(self, job: ImportJob, *args):
+        """
+        Shows the progress and the estimated remaining time of the running imports in the status bar.
+        """
+        import_queue = MeasurementRegistry().import_queue
+        if not import_queue.busy:
+            if job.state == "failed":
+                self.statusBar().showMessage(
+                    f"Could not import {os.path.basename(job.info.filename)}: {job.error}")
+            elif job.state == "skipped":
+                self.statusBar().showMessage(
+                    f"{os.path.basename(job.info.filename)} was already imported", 5000)
+            else:
+                self.statusBar().showMessage("All imports done", 5000)
+            return
+        parts = []
+        for running in import_queue.jobs:
+            if running.state != "running":
+                continue
+            eta = running.eta
+            remaining = f", {eta:.0f}s left" if eta is not None else ""
+            parts.append(
+                f"{os.path.basename(running.info.filename)} {running.progress*100:.0f}%{remaining}")
+        queued = len(import_queue.queued)
+        message = "Importing " + ", ".join(parts)
+        if queued > 0:
+            message += f" ({queued} queued)"
+        self.statusBar().showMessage(message)
 
     def select_measurement(self, measurement: Measurement):
         self.logger.debug(f"Selecting measurement {measurement.name}")
@@ -60,6 +101,8 @@ class MenuBar(QtWidgets.QMenuBar):
         file_menu = self.addMenu("File")
         open_action = file_menu.addAction("Import")
         open_action.triggered.connect(self.open_file)
+        open_folder_action = file_menu.addAction("Import Folder")
+        open_folder_action.triggered.connect(self.open_folder)
         file_menu.addAction("New", self.new_file)
 
         comparisons_menu = self.addMenu("Comparisons")
@@ -78,6 +121,14 @@ class MenuBar(QtWidgets.QMenuBar):
                 self.import_window.startImport.connect(self.handle_import)
                 self.import_window.show()
 
+    def open_folder(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Import all measurements in folder")
+        if folder:
+            self.import_window = ImportWindow(folder)
+            self.import_window.startImport.connect(self.handle_import)
+            self.import_window.show()
+
     def handle_import(self, options: MeasurementImportInfo):
         self.import_window.close()
         self.import_window.deleteLater()
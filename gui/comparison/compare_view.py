@@ -41,19 +41,24 @@ class CompareView(QWidget):
             QVBoxLayout.SizeConstraint.SetMinAndMaxSize)
 
         list_widget = widgets.QTableWidget()
-        list_widget.setColumnCount(2)
-        list_widget.setHorizontalHeaderLabels(["Signal", "Mean"])
+        list_widget.setColumnCount(3)
+        list_widget.setHorizontalHeaderLabels(["Signal", "Mean", "Min"])
         list_widget.setColumnWidth(0, 300)
 
-        for i, (ref_ch, eval_ch, result) in enumerate(self.comparison_result.channel_results):
-            mean = result.result.mean()
+        for i, summary in enumerate(self.comparison_result.summaries):
+            mean = summary.mean
             tile = widgets.QTableWidgetItem()
             mean_tile = widgets.QTableWidgetItem()
-            tile.setText(f"{ref_ch.name}")
+            min_tile = widgets.QTableWidgetItem()
+            tile.setText(f"{summary.ref_name}")
             tile.setData(Qt.ItemDataRole.UserRole, i)
             tile.setSizeHint(QSize(300, 30))
             mean_tile.setText(f"{mean:.4f}")
             mean_tile.setData(Qt.ItemDataRole.UserRole, i)
+            min_tile.setText(f"{summary.min:.4f}")
+            min_tile.setData(Qt.ItemDataRole.UserRole, i)
+            if summary.worst_time is not None:
+                min_tile.setToolTip(f"At {summary.worst_time:.2f}s")
 
             if mean < 0.4:
                 tile.setBackground(Qt.GlobalColor.red)
@@ -74,6 +79,22 @@ class CompareView(QWidget):
             list_widget.insertRow(i)
             list_widget.setItem(i, 0, tile)
             list_widget.setItem(i, 1, mean_tile)
+            list_widget.setItem(i, 2, min_tile)
+
+        row = list_widget.rowCount()
+        for ref_ch, eval_ch, reason in self.comparison_result.skipped_results:
+            tile = widgets.QTableWidgetItem()
+            reason_tile = widgets.QTableWidgetItem()
+            tile.setText(f"{ref_ch.name}")
+            tile.setSizeHint(QSize(300, 30))
+            reason_tile.setText("Skipped")
+            for item in [tile, reason_tile]:
+                item.setToolTip(reason)
+                item.setBackground(Qt.GlobalColor.lightGray)
+            list_widget.insertRow(row)
+            list_widget.setItem(row, 0, tile)
+            list_widget.setItem(row, 1, reason_tile)
+            row += 1
 
         list_widget.itemDoubleClicked.connect(self.handle_channel_selected)
         self.main_layout.addWidget(list_widget)
@@ -127,6 +148,8 @@ class CompareView(QWidget):
 
     def handle_channel_selected(self, item: widgets.QListWidgetItem):
         index = item.data(Qt.ItemDataRole.UserRole)
+        if index is None:
+            return
         ref_ch, eval_ch, result = self.comparison_result.channel_results[index]
         self.logger.info(
             f"Channel selected: {ref_ch.name} vs {eval_ch.name}")
@@ -138,7 +161,15 @@ class CompareView(QWidget):
         y_data = self.comparison_result.result.values
 
         fig, ax = plt.subplots(1, 1, figsize=(8, 6))
-        ax.plot(x_data, y_data)
+        bands = self.comparison_result.bands
+        if 5 in bands and 95 in bands:
+            ax.fill_between(bands[5].timestamps, bands[5].values, bands[95].values,
+                            alpha=0.3, label="5th - 95th percentile")
+        if 50 in bands:
+            ax.plot(bands[50].timestamps, bands[50].values,
+                    linestyle="--", label="Median")
+        ax.plot(x_data, y_data, label="Average")
+        ax.legend()
         ax.set_xlabel("Time")
         ax.set_ylabel("Average Metric Value")
         ax.set_title(f"Total Comparison")
@@ -4,6 +4,7 @@ from PySide6.QtCore import Signal, Qt
 
 from comparison.comparison import Comparison
 from comparison.comparison_executor import MultiComparisonExecutor
+from comparison.comparison_repository import ComparisonRepository
 from comparison.comparison_result import ComparisonResult
 from gui import utils
 from gui.comparison.compare_view import CompareView
@@ -38,12 +39,20 @@ class MultiComparisonView(w.QWidget):
     def setup_done_ui(self):
         layout = w.QHBoxLayout()
 
+        list_layout = w.QVBoxLayout()
         self.comparison_list_widget = w.QListWidget()
         self.comparison_list_widget.setFixedWidth(300)
         self.comparison_list_widget.itemDoubleClicked.connect(
             self.handle_comparison_opened)
+        list_layout.addWidget(self.comparison_list_widget)
 
-        layout.addWidget(self.comparison_list_widget)
+        self.save_all_button = w.QPushButton("Save All")
+        self.save_all_button.clicked.connect(self.handle_save_all)
+        list_layout.addWidget(self.save_all_button)
+        self.save_status_label = w.QLabel()
+        list_layout.addWidget(self.save_status_label)
+
+        layout.addLayout(list_layout)
 
         self.comparison_view = CompareView()
         layout.addWidget(self.comparison_view)
@@ -55,6 +64,38 @@ class MultiComparisonView(w.QWidget):
             Qt.ItemDataRole.UserRole)
         self.comparison_view.set_result(comparison_result)
 
+    def handle_save_all(self):
+        """
+        Queues all comparison results for saving under their names, see ComparisonRepository.save_comparison.
+        """
+        self.save_all_button.setEnabled(False)
+        repository = ComparisonRepository()
+        repository.saveProgress.connect(self.handle_save_progress)
+        repository.saveDone.connect(self.handle_save_done)
+        self.saves_pending = {result.name for result in self.comparison_results}
+        for result in self.comparison_results:
+            repository.save_comparison(result)
+        self.update_save_status()
+
+    def handle_save_progress(self, name: str, percent: int):
+        if name in self.saves_pending:
+            self.update_save_status(f"{name}: {percent}%")
+
+    def handle_save_done(self, name: str):
+        self.saves_pending.discard(name)
+        self.update_save_status()
+        if len(self.saves_pending) == 0:
+            repository = ComparisonRepository()
+            repository.saveProgress.disconnect(self.handle_save_progress)
+            repository.saveDone.disconnect(self.handle_save_done)
+
+    def update_save_status(self, current: str = ""):
+        saved = len(self.comparison_results) - len(self.saves_pending)
+        status = f"Saved {saved}/{len(self.comparison_results)} comparisons"
+        if current != "" and len(self.saves_pending) > 0:
+            status += f"\n{current}"
+        self.save_status_label.setText(status)
+
     def handle_comparisons_done(self, results: list[ComparisonResult]):
         self.comparison_results = results
         self.setup_done_ui()
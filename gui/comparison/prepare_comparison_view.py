@@ -7,7 +7,7 @@ from comparison.comparison_executor import ComparisonExecutor
 from comparison.comparison_repository import ComparisonRepository
 from comparison.comparison_result import ComparisonResult
 from comparison.sync_block import SyncBlock
-from comparison.sync_processor import SyncProcessor
+from comparison.sync_processor import AutoSyncWorker, SyncProcessor
 from gui.comparison.channel_assignment_tile import ChannelAssignmentTile
 from gui.comparison.channel_prepare_window import ChannelPrepareWindow
 from gui.select_multiple_dialog import SelectMultipleDialog
@@ -24,6 +24,9 @@ class PrepareComparisonView(QtWidgets.QWidget):
         super().__init__()
         self.comparison = None
         self.channel_window = None
+        self.auto_sync_worker = None
+        self.auto_sync_comparison = None
+        self.auto_sync_button = None
         self.metric_registry = MetricRegistry()
         self.logger = logging.getLogger(__name__)
         self.setup_ui()
@@ -67,6 +70,13 @@ class PrepareComparisonView(QtWidgets.QWidget):
         start_multiple_button.clicked.connect(self.handle_start_multiple)
         menu_layout.addWidget(start_multiple_button)
 
+        auto_sync_button = QtWidgets.QPushButton(
+            "Auto Synchronize" if self.auto_sync_worker is None else "Synchronizing...")
+        auto_sync_button.clicked.connect(self.handle_auto_sync)
+        auto_sync_button.setEnabled(self.auto_sync_worker is None)
+        menu_layout.addWidget(auto_sync_button)
+        self.auto_sync_button = auto_sync_button
+
         layout.addLayout(menu_layout)
 
         list_widget = QtWidgets.QListWidget()
@@ -144,6 +154,41 @@ class PrepareComparisonView(QtWidgets.QWidget):
 
         self.channel_window = channel_window
 
+    def handle_auto_sync(self):
+        if self.comparison is None:
+            self.logger.warning("No comparison selected")
+            return
+
+        if self.auto_sync_worker is not None:
+            return
+
+        # loading and correlating the channels takes long for long measurements, therefore it runs in a thread
+        worker = AutoSyncWorker(self.comparison, window=60)
+        worker.done.connect(self.handle_auto_sync_done)
+        worker.finished.connect(worker.deleteLater)
+        self.auto_sync_worker = worker
+        self.auto_sync_comparison = self.comparison
+        self.auto_sync_button.setEnabled(False)
+        self.auto_sync_button.setText("Synchronizing...")
+        worker.start()
+
+    def handle_auto_sync_done(self, sync_blocks: list[SyncBlock]):
+        comparison = self.auto_sync_comparison
+        self.auto_sync_worker = None
+        self.auto_sync_comparison = None
+        if self.auto_sync_button is not None:
+            self.auto_sync_button.setEnabled(True)
+            self.auto_sync_button.setText("Auto Synchronize")
+
+        if len(sync_blocks) == 0:
+            QtWidgets.QMessageBox.warning(
+                self, "Auto Synchronization", "Could not find a reliable offset between the measurements")
+            return
+        # the blocks belong to the comparison the synchronization was started for, even if another one is shown now
+        comparison.sync_blocks = list(sync_blocks)
+        self.logger.info(
+            f"Synchronized automatically with {len(sync_blocks)} sync blocks")
+
     def handle_start_multiple(self):
         options = list(MetricRegistry().available_metrics())
         dialog = SelectMultipleDialog(options)
@@ -1,4 +1,5 @@
 import logging
+import time
 from PySide6 import QtCore, QtWidgets, QtGui
 from comparison.comparison_repository import ComparisonRepository
 from comparison.comparison_result import ComparisonResult
@@ -33,8 +34,7 @@ class FilesView(QtWidgets.QWidget):
             item.setData(QtCore.Qt.ItemDataRole.UserRole, measurement)
             self.measurement_list_widget.addItem(item)
 
-        for comparison in sorted(self.comparison_repo.comparison_names):
-            self.comparison_list_widget.addItem(comparison)
+        self.add_comparison_items()
 
         self.comparison_list_widget.itemDoubleClicked.connect(
             self.handle_comparison_opened)
@@ -65,8 +65,21 @@ class FilesView(QtWidgets.QWidget):
     def handle_comparisons_updated(self):
         self.logger.info("Handling comparisons updated, refreshing list")
         self.comparison_list_widget.clear()
+        self.add_comparison_items()
+
+    def add_comparison_items(self):
+        entries = {
+            entry.name: entry for entry in self.comparison_repo.catalog_entries()}
         for comparison in sorted(self.comparison_repo.comparison_names):
-            self.comparison_list_widget.addItem(comparison)
+            item = QtWidgets.QListWidgetItem(comparison)
+            entry = entries.get(comparison)
+            if entry is not None:
+                score = f"{entry.score:.3f}" if entry.score is not None else "-"
+                item.setToolTip(f"{entry.ref_measurement} vs. {entry.eval_measurement}\n"
+                                f"Metric: {entry.metric}\n"
+                                f"Saved: {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.created))}\n"
+                                f"Pairs: {entry.pairs}, Score: {score}")
+            self.comparison_list_widget.addItem(item)
 
     def handle_measurement_opened(self, item: QtWidgets.QListWidgetItem):
         self.logger.info(f"Opening measurement {item.text()}")
@@ -26,7 +26,11 @@ class ImportWindow(QWidget):
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        layout.addWidget(QLabel(f"Import Measurement: {self.filename}"))
+        if os.path.isdir(self.filename):
+            layout.addWidget(
+                QLabel(f"Import all Measurements (.mf4) in: {self.filename}"))
+        else:
+            layout.addWidget(QLabel(f"Import Measurement: {self.filename}"))
 
         remove_constant_channels = QCheckBox("Remove Constant Null Signals")
         remove_constant_channels.setChecked(self.options.remove_constant_channels)
@@ -44,6 +48,18 @@ class ImportWindow(QWidget):
             handle_merge_duplicate_channels)
         layout.addWidget(merge_duplicate_channels)
 
+        link_signals = QCheckBox("Link File (read signals on first use)")
+        link_signals.setToolTip(
+            "Only the signal names are imported, the signals are read from the file when they are first used. "
+            "Constant signals are not removed and repeated signals are not merged. The file must not be moved.")
+        link_signals.setChecked(self.options.link)
+
+        def handle_link_signals():
+            self.options.link = link_signals.isChecked()
+            self.logger.info(f"Link file: {self.options.link}")
+        link_signals.clicked.connect(handle_link_signals)
+        layout.addWidget(link_signals)
+
         name_mapping_layout = QHBoxLayout()
         if self.name_mapping_filename is None:
             name_mapping_layout.addWidget(
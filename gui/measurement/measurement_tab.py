@@ -7,6 +7,7 @@ from gui.comparison.compare_tab import CompareTab
 from gui.main_view import MainView
 from gui.measurement.new_channel_window import NewChannelWindow
 from measurement.channel.channel_repository import ChannelRepository
+from measurement.channel.kmatrix_service import KMatrixService
 from measurement.measurement import Measurement
 from measurement.measurement_registry import MeasurementRegistry
 
@@ -48,7 +49,7 @@ class MeasurementTab(QtWidgets.QWidget):
         self.main_layout.addWidget(QtWidgets.QLabel(
             f"Sample Rate: {self.measurement.sample_rate} Hz"))
         self.main_layout.addWidget(QtWidgets.QLabel(
-            f"Signals: {len(self.measurement.channels)}"))
+            f"Signals: {self.measurement.channel_count}"))
         self.main_layout.addWidget(QtWidgets.QLabel(
             f"Duration: {self.measurement.length} s"))
 
@@ -56,7 +57,8 @@ class MeasurementTab(QtWidgets.QWidget):
 
         filter_layout.addWidget(QtWidgets.QLabel("Filter:"))
         filter_field = QtWidgets.QLineEdit()
-        filter_field.setPlaceholderText("Filter signals")
+        filter_field.setPlaceholderText(
+            "Filter signals, or bus:<name> / pdu:<name>")
         filter_field.editingFinished.connect(
             lambda: self.handle_filter(filter_field.text()))
         filter_layout.addWidget(filter_field)
@@ -66,13 +68,19 @@ class MeasurementTab(QtWidgets.QWidget):
         list_widget = QtWidgets.QListWidget()
         repo = ChannelRepository()
 
-        for channel in self.measurement.channels:
+        kmatrix = KMatrixService()
+        descriptions = kmatrix.describe_many(self.measurement.channels) if kmatrix.available() else \
+            [None] * self.measurement.channel_count
+
+        for channel, description in zip(self.measurement.channels, descriptions):
             if repo.is_name_qualified(channel):
                 signal_name = repo.get_signal_name(channel)
             else:
                 signal_name = channel.name
             item = QtWidgets.QListWidgetItem(signal_name)
             item.setData(QtCore.Qt.ItemDataRole.UserRole, channel)
+            if description is not None:
+                item.setToolTip(description)
             list_widget.addItem(item)
         list_widget.itemDoubleClicked.connect(self.handle_channel_clicked)
         self.list_widget = list_widget
@@ -102,6 +110,16 @@ class MeasurementTab(QtWidgets.QWidget):
             for i in range(self.list_widget.count()):
                 self.list_widget.item(i).setHidden(False)
             return
+        key, _, value = filter_text.partition(":")
+        if key in ["bus", "pdu"] and value != "":
+            # looked up in the index of the measurement instead of comparing the names
+            channels = self.measurement.find_channels(**{key: value.strip()})
+            ids = {channel.id for channel in channels}
+            for i in range(self.list_widget.count()):
+                item = self.list_widget.item(i)
+                channel = item.data(QtCore.Qt.ItemDataRole.UserRole)
+                item.setHidden(channel.id not in ids)
+            return
         for i in range(self.list_widget.count()):
             item = self.list_widget.item(i)
             if filter_text.lower() in item.text().lower():
@@ -0,0 +1,150 @@
+from contextlib import closing
+import json
+import sqlite3
+
+from .channel import Channel
+from .channel_name import parse_channel_name
+
+# Version of the channel table. Version 2 added the parts of the channel names, see parse_channel_name.
+CHANNEL_CATALOG_VERSION = 2
+
+CHANNEL_COLUMNS = "id, group_id, name, aliases, value_name_mapping"
+
+# Maximum number of ids bound in a single query, below the limit of older SQLite versions.
+QUERY_CHUNK_SIZE = 900
+
+
+class ChannelCatalog():
+    """
+    Stores the metadata of all channels (name, aliases and value name mapping) in a SQLite database, with one
+    row per channel indexed by its id and by its group. Single channels are read by their id without reading
+    their group, and groups are written in a single transaction.
+    The names are parsed once when a channel is stored, and their signal, bus and PDU parts are stored in indexed
+    columns, such that channels can be queried by them, see query.
+    Every call opens its own connection, therefore the catalog can be used from the import and comparison threads.
+    Args:
+        filename (str): The database file, created if it does not exist.
+    Example usage:
+        catalog = ChannelCatalog(f"{storage_folder}/channels.sqlite")
+        catalog.put_many(channels)
+        channel = catalog.get(channel_id)
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        with closing(self._connect()) as connection, connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == CHANNEL_CATALOG_VERSION:
+                return
+            if version != 1:
+                connection.execute("DROP TABLE IF EXISTS channels")
+                connection.execute(
+                    "CREATE TABLE channels (id TEXT PRIMARY KEY, group_id TEXT NOT NULL, name TEXT NOT NULL, "
+                    "aliases TEXT NOT NULL, value_name_mapping TEXT NOT NULL)")
+                connection.execute(
+                    "CREATE INDEX channels_group ON channels (group_id)")
+            for column in ["qualified INTEGER NOT NULL DEFAULT 0", "signal TEXT", "bus TEXT", "pdu TEXT"]:
+                connection.execute(f"ALTER TABLE channels ADD COLUMN {column}")
+            # channels stored by version 1 are parsed once now
+            names = connection.execute(
+                "SELECT id, name FROM channels").fetchall()
+            connection.executemany("UPDATE channels SET qualified = ?, signal = ?, bus = ?, pdu = ? WHERE id = ?",
+                                   [self._name_columns(name) + (id,) for id, name in names])
+            for column in ["name", "signal", "bus", "pdu"]:
+                connection.execute(
+                    f"CREATE INDEX channels_{column} ON channels ({column})")
+            connection.execute(
+                f"PRAGMA user_version = {CHANNEL_CATALOG_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.filename, timeout=30)
+
+    @staticmethod
+    def _name_columns(name: str) -> tuple:
+        parts = parse_channel_name(name)
+        if not parts.qualified:
+            return (0, None, None, None)
+        return (1, parts.signal, parts.bus, parts.pdu)
+
+    @staticmethod
+    def _to_row(channel: Channel) -> tuple:
+        # the mapping is stored as [value, name] pairs, such that the float values are kept exactly
+        return (channel.id, channel.id.split(".")[0], channel.name, json.dumps(channel.aliases),
+                json.dumps([[value, name] for value, name in channel.value_name_mapping.items()])) + \
+            ChannelCatalog._name_columns(channel.name)
+
+    @staticmethod
+    def _from_row(row: tuple) -> Channel:
+        id, _, name, aliases, value_name_mapping = row
+        return Channel(id, name, json.loads(aliases),
+                       {float(value): meaning for value, meaning in json.loads(value_name_mapping)})
+
+    def put_many(self, channels: list[Channel]) -> None:
+        """
+        Adds channels, or replaces channels with the same id, in a single transaction.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(f"INSERT OR REPLACE INTO channels ({CHANNEL_COLUMNS}, qualified, signal, bus, pdu) "
+                                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [self._to_row(channel) for channel in channels])
+
+    def get(self, id: str) -> Channel | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE id = ?", (id,)).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def get_many(self, ids: list[str]) -> dict[str, Channel]:
+        """
+        Reads the channels with the given ids. Ids that are not in the catalog are missing in the result.
+        """
+        channels = {}
+        with closing(self._connect()) as connection:
+            for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+                chunk = ids[start:start + QUERY_CHUNK_SIZE]
+                rows = connection.execute(
+                    f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                for row in rows:
+                    channels[row[0]] = self._from_row(row)
+        return channels
+
+    def query(self, signal: str | None = None, bus: str | None = None, pdu: str | None = None,
+              prefix: str | None = None, contains: str | None = None,
+              group_ids: list[str] | None = None) -> list[Channel]:
+        """
+        Finds the channels matching all given criteria, see ChannelRepository.find_channels.
+        """
+        conditions = []
+        parameters = []
+        for column, value in [("signal", signal), ("bus", bus), ("pdu", pdu)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if prefix is not None:
+            # a range, such that the index of the names is used
+            conditions.append("name >= ? AND name < ?")
+            parameters += [prefix, prefix + "\U0010ffff"]
+        if contains is not None:
+            conditions.append("instr(lower(name), ?) > 0")
+            parameters.append(contains.lower())
+        if group_ids is not None:
+            conditions.append(
+                f"group_id IN ({', '.join('?' * len(group_ids))})")
+            parameters += group_ids
+        where = f"WHERE {' AND '.join(conditions)}" if len(conditions) > 0 else ""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT {CHANNEL_COLUMNS} FROM channels {where} ORDER BY name", parameters).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def has_group(self, group_id: str) -> bool:
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT 1 FROM channels WHERE group_id = ? LIMIT 1",
+                                      (group_id,)).fetchone() is not None
+
+    def delete_group(self, group_id: str) -> int:
+        """
+        Removes all channels of a group, and returns their number.
+        """
+        with closing(self._connect()) as connection, connection:
+            return connection.execute("DELETE FROM channels WHERE group_id = ?", (group_id,)).rowcount
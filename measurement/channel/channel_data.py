@@ -8,11 +8,13 @@ import numpy as np
 
 class ChannelData():
 
-    def __init__(self, timestamps: np.ndarray, values: np.ndarray, name: str, id: str) -> None:
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, name: str, id: str, offset: int = 0) -> None:
         self.index = timestamps
         self.values = values
         self.name = name
         self.id = id
+        # index of the first sample within the stored channel, if only a time range of the channel was loaded
+        self.offset = offset
         self.logger = getLogger(__name__)
 
     def timestamps(self) -> np.ndarray:
@@ -69,3 +71,87 @@ class ChannelData():
             np.ndarray: A NumPy array containing the channel index and values.
         """
         return np.array([self.index, self.values])
+
+
+def find_runs(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Splits values into runs of equal values, compared bitwise such that expand_runs restores them exactly.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The index of the first value of each run, and the value of each run.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.array([], dtype=np.int64), values
+    bits = values.view(np.int64)
+    starts = np.concatenate(
+        [[0], np.flatnonzero(bits[1:] != bits[:-1]) + 1]).astype(np.int64)
+    return starts, values[starts]
+
+
+def expand_runs(starts: np.ndarray, run_values: np.ndarray, samples: int) -> np.ndarray:
+    """
+    Returns the values of all samples of runs, see find_runs.
+    """
+    return np.repeat(run_values, np.diff(np.append(starts, samples)))
+
+
+class RunLengthChannelData(ChannelData):
+    """
+    ChannelData of a step-like channel (e.g. states or enumerations), stored as runs of equal values on the regular
+    time axis np.linspace(time_start, time_end, samples) created at import. The timestamps and values are only
+    expanded when they are accessed, the runs can be used without expanding them, see RunLengthSignalData.
+    Args:
+        starts (np.ndarray): The index of the first sample of each run, starting with 0.
+        run_values (np.ndarray): The value of each run.
+        time_start (float): The first timestamp.
+        time_end (float): The last timestamp.
+        samples (int): The number of samples.
+    """
+
+    def __init__(self, starts: np.ndarray, run_values: np.ndarray, time_start: float, time_end: float, samples: int,
+                 name: str, id: str, offset: int = 0) -> None:
+        self.starts = starts
+        self.run_values = run_values
+        self.time_start = time_start
+        self.time_end = time_end
+        self.samples = samples
+        self.expanded_index = None
+        self.expanded_values = None
+        self.name = name
+        self.id = id
+        self.offset = offset
+        self.logger = getLogger(__name__)
+
+    @property
+    def index(self) -> np.ndarray:
+        if self.expanded_index is None:
+            self.expanded_index = np.linspace(
+                self.time_start, self.time_end, self.samples)
+        return self.expanded_index
+
+    @index.setter
+    def index(self, timestamps: np.ndarray) -> None:
+        self.expanded_index = timestamps
+
+    @property
+    def values(self) -> np.ndarray:
+        if self.expanded_values is None:
+            self.expanded_values = expand_runs(
+                self.starts, self.run_values, self.samples)
+        return self.expanded_values
+
+    @values.setter
+    def values(self, values: np.ndarray) -> None:
+        self.starts, self.run_values = find_runs(values)
+        self.samples = len(values)
+        self.expanded_values = values
+
+    @property
+    def length_samples(self) -> int:
+        return self.samples
+
+    def min(self) -> float:
+        return float(self.run_values.min())
+
+    def max(self) -> float:
+        return float(self.run_values.max())
@@ -1,17 +1,48 @@
 
 
+import hashlib
 import json
 from logging import getLogger
 import os
 
+from asammdf import MDF
+
 from measurement.channel.channel import Channel
 
-from .channel_data import ChannelData
+from .channel_data import ChannelData, RunLengthChannelData, find_runs
+from .channel_processor import ChannelProcessor
+from .channel_repository import ChannelRepository
+from .content_catalog import ContentCatalog
 
 import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+
+# Time span in seconds of the samples stored in one parquet row group. Loading a time range of a channel
+# only reads the row groups overlapping it, see ChannelDataRepository.load.
+ROW_GROUP_DURATION = 60.0
+
+# Number of MDF files of linked channels kept open by a repository.
+OPEN_FILE_LIMIT = 4
+
+# Minimum number of samples per run of equal values for a channel to be stored as runs, see store_group.
+RUN_LENGTH_RATIO = 8
 
 
 class ChannelDataRepository():
+    """
+    Stores the samples of the channels in one parquet file per group, with the metadata of the channels in a JSON
+    file next to it.
+    Groups stored with store_group are deduplicated by content: identical arrays (e.g. the same signal of two runs
+    of the same bench configuration) are stored once under the data id "<group id>.<content hash>", and the
+    metadata of each channel references its data id. The references are counted in a ContentCatalog, such that
+    the files of a deleted group are kept as long as channels of other groups reference its data.
+    Step-like channels (e.g. states or enumerations) on a regular time axis are stored as runs of equal values in
+    a second parquet file "<group id>_runs.parquet", and loaded as RunLengthChannelData, see store_group.
+    Groups stored with store_links only reference the samples of their channels in an MDF file. A linked channel
+    is read from the file and resampled when it is first loaded, and the result is kept in a parquet file of the
+    channel in the folder "linked", see _load_linked.
+    """
 
     def __init__(self) -> None:
         self.logger = getLogger(__name__)
@@ -19,14 +50,28 @@ class ChannelDataRepository():
 
         self.cache = {}
         self.metadata_cache = {}
+        self.sample_count_cache = {}
+        self.parquet_file_cache = {}
+        self.linked_cache = {}
+        self.runs_cache = {}
+        self.mdf_cache: dict[str, MDF] = {}
 
         self.hit_count = 0
         self.miss_count = 0
 
         if not os.path.exists(self.storage_folder):
             os.makedirs(self.storage_folder)
+        self.linked_folder = self.storage_folder + "/linked"
+        if not os.path.exists(self.linked_folder):
+            os.makedirs(self.linked_folder)
+        self.content_catalog = ContentCatalog(
+            os.getcwd() + "/measurements" + "/content.sqlite")
 
     def store(self, channel_data: ChannelData) -> None:
+        """
+        Stores the data of a single channel in its group, replacing earlier data of it. The data is stored under
+        the id of the channel and not deduplicated, as it is typically edited.
+        """
         group_id = channel_data.id.split(".")[0]
         filename = self.storage_folder + "/" + group_id + ".parquet"
         metadata_filename = self.storage_folder + \
@@ -41,21 +86,119 @@ class ChannelDataRepository():
             self.logger.info(
                 f"Could not find channel data group {group_id}, creating it")
 
+        previous = group_metadata.get(channel_data.id, {})
+        if "hash" in previous:
+            # the shared data is kept for the other channels referencing it, unless this channel was the last one
+            for removable_group_id in self.content_catalog.release_many([previous["hash"]]):
+                if removable_group_id != group_id:
+                    self._remove_group_files(removable_group_id)
+        if "link" in previous:
+            linked_filename = f"{self.linked_folder}/{channel_data.id}.parquet"
+            if os.path.exists(linked_filename):
+                os.remove(linked_filename)
+            self.linked_cache.pop(channel_data.id, None)
+
         dataframe[f"{channel_data.id} time"] = channel_data.timestamps()
         dataframe[f"{channel_data.id} value"] = channel_data.datapoints()
-        dataframe.to_parquet(filename)
-        group_metadata[f"{channel_data.id}"] = {
-            "name": channel_data.name,
-            "id": channel_data.id
-        }
+        dataframe.to_parquet(
+            filename, row_group_size=self._row_group_size(channel_data))
+        group_metadata[f"{channel_data.id}"] = self._channel_metadata(
+            channel_data)
 
         json.dump(group_metadata, open(metadata_filename, "w"))
+        self._forget_group(group_id)
 
         # self.logger.info(
         #    f"Stored channel data {channel_data.name} with id {channel_data.id}")
 
-    def load(self, id: str) -> ChannelData:
+    @staticmethod
+    def _channel_metadata(channel_data: ChannelData) -> dict:
+        timestamps = channel_data.timestamps()
+        metadata = {
+            "name": channel_data.name,
+            "id": channel_data.id,
+            "samples": len(timestamps)
+        }
+        if len(timestamps) > 1:
+            metadata["time_step"] = float(timestamps[1] - timestamps[0])
+        return metadata
+
+    @staticmethod
+    def _content_hash(channel_data: ChannelData) -> str | None:
+        """
+        Returns a hash of the timestamps and values of a channel, including their types, or None if the values
+        are not numeric and therefore not deduplicated.
+        """
+        timestamps = np.ascontiguousarray(channel_data.timestamps())
+        values = np.ascontiguousarray(channel_data.datapoints())
+        if timestamps.dtype.hasobject or values.dtype.hasobject:
+            return None
+        content_hash = hashlib.blake2b(digest_size=16)
+        for array in [timestamps, values]:
+            content_hash.update(f"{array.dtype.str}{array.shape}".encode())
+            content_hash.update(array.data)
+        return content_hash.hexdigest()
+
+    def _forget_group(self, group_id: str) -> None:
+        self.cache.pop(group_id, None)
+        self.metadata_cache.pop(group_id, None)
+        self.sample_count_cache.pop(group_id, None)
+        self.parquet_file_cache.pop(group_id, None)
+        self.runs_cache.pop(group_id, None)
+
+    @staticmethod
+    def _find_runs(channel_data: ChannelData, regular_time_axes: dict) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Returns the runs of a channel if it should be stored as runs: its values are numeric and restored exactly
+        from float64, its timestamps are exactly the regular time axis RunLengthChannelData creates, and its runs
+        are on average at least RUN_LENGTH_RATIO samples long. Returns None otherwise.
+        Args:
+            regular_time_axes (dict): Cache of the regular time axes already created, the channels of a group
+                typically share their time axis.
+        """
+        timestamps = channel_data.timestamps()
+        values = channel_data.datapoints()
+        if len(values) < 2 or len(timestamps) != len(values) or values.dtype.kind not in "biuf":
+            return None
+        starts, run_values = find_runs(values)
+        if len(starts) * RUN_LENGTH_RATIO > len(values):
+            return None
+        if not np.array_equal(run_values.astype(values.dtype), values[starts]):
+            return None
+        key = (float(timestamps[0]), float(timestamps[-1]), len(timestamps))
+        if key not in regular_time_axes:
+            regular_time_axes[key] = np.linspace(*key)
+        if not np.array_equal(regular_time_axes[key], timestamps):
+            return None
+        return starts, run_values
+
+    @staticmethod
+    def _row_group_size(channel_data: ChannelData) -> int | None:
+        """
+        Returns the number of rows per row group, such that each row group covers ROW_GROUP_DURATION seconds.
+        Returns None (the parquet default) if the time step cannot be determined.
+        """
+        timestamps = channel_data.timestamps()
+        if len(timestamps) < 2 or not timestamps[1] > timestamps[0]:
+            return None
+        return max(1, int(ROW_GROUP_DURATION / (timestamps[1] - timestamps[0])))
+
+    def load(self, id: str, t_start: float | None = None, t_end: float | None = None) -> ChannelData:
+        """
+        Loads the data of a channel.
+        If a time range is given and the group is not cached, only the row groups of the parquet file overlapping
+        the range are read, based on the statistics of the time column. The returned data then covers at least
+        the range, and its offset attribute is the index of its first sample within the stored channel.
+        Args:
+            id (str): Id of the channel.
+            t_start (float | None): Start of the time range in seconds. Defaults to the start of the channel.
+            t_end (float | None): End of the time range in seconds. Defaults to the end of the channel.
+        Returns:
+            ChannelData: The loaded data, or None if the channel data could not be found.
+        """
         group_id = id.split(".")[0]
+        if (t_start is not None or t_end is not None) and group_id not in self.cache:
+            return self._load_range(id, t_start, t_end)
 
         if group_id in self.cache and group_id in self.metadata_cache:
             dataframe = self.cache[group_id]
@@ -84,7 +227,16 @@ class ChannelDataRepository():
 
             self.miss_count += 1
 
+        if id not in group_metadata:
+            self.logger.error(f"Could not find channel data with id {id}")
+            return None
         metadata = group_metadata[id]
+        if "data" in metadata:
+            return self._load_shared(metadata)
+        if "link" in metadata:
+            return self._load_linked(metadata)
+        if "runs" in metadata:
+            return self._load_runs(group_id, metadata)
         time = dataframe[f"{id} time"].to_numpy()
         values = dataframe[f"{id} value"].to_numpy()
 
@@ -94,46 +246,457 @@ class ChannelDataRepository():
 
         return ChannelData(time, values, metadata["name"], metadata["id"])
 
-    def load_from_channel(self, channel: Channel) -> ChannelData:
-        return self.load(channel.id)
+    def _load_range(self, id: str, t_start: float | None, t_end: float | None) -> ChannelData:
+        group = self._open_group(id.split(".")[0])
+        if group is None or id not in group[2]:
+            self.logger.error(f"Could not find channel data with id {id}")
+            return None
+        parquet_file, columns, group_metadata = group
+        if "data" in group_metadata[id]:
+            return self._load_shared(group_metadata[id], t_start, t_end)
+        if "link" in group_metadata[id]:
+            return self._load_linked(group_metadata[id], t_start, t_end)
+        if "runs" in group_metadata[id]:
+            # the runs of a channel are small, therefore they are always loaded completely
+            return self._load_runs(id.split(".")[0], group_metadata[id])
+        metadata = group_metadata[id]
+        time, values, offset = self._read_row_groups(
+            parquet_file, columns, f"{id} time", f"{id} value", t_start, t_end)
+        return ChannelData(time, values, metadata["name"], metadata["id"], offset)
+
+    @staticmethod
+    def _read_row_groups(parquet_file: pq.ParquetFile, columns: dict[str, int], time_name: str, value_name: str,
+                         t_start: float | None, t_end: float | None) -> tuple[np.ndarray, np.ndarray, int]:
+        """
+        Reads the row groups of a parquet file whose time column overlaps the time range.
+        Returns:
+            tuple[np.ndarray, np.ndarray, int]: The timestamps, the values, and the index of the first read row.
+        """
+        parquet_metadata = parquet_file.metadata
+        time_column = columns[time_name]
+
+        t_start = -np.inf if t_start is None else t_start
+        t_end = np.inf if t_end is None else t_end
+        offset = 0
+        first_row_group = None
+        last_row_group = None
+        for i in range(parquet_metadata.num_row_groups):
+            row_group = parquet_metadata.row_group(i)
+            statistics = row_group.column(time_column).statistics
+            # row groups without statistics cannot be excluded
+            overlaps = statistics is None or not statistics.has_min_max or \
+                (statistics.max >= t_start and statistics.min <= t_end)
+            if overlaps:
+                if first_row_group is None:
+                    first_row_group = i
+                last_row_group = i
+            elif first_row_group is None:
+                offset += row_group.num_rows
+
+        if first_row_group is None:
+            return np.array([]), np.array([]), offset
+
+        table = parquet_file.read_row_groups(
+            list(range(first_row_group, last_row_group + 1)), columns=[time_name, value_name])
+        return table.column(time_name).to_numpy(), table.column(value_name).to_numpy(), offset
+
+    def _load_shared(self, metadata: dict, t_start: float | None = None, t_end: float | None = None) -> ChannelData:
+        """
+        Loads the data a deduplicated channel references, which may be stored in another group.
+        """
+        data = self.load(metadata["data"], t_start, t_end)
+        if data is None:
+            return None
+        if isinstance(data, RunLengthChannelData):
+            return RunLengthChannelData(data.starts, data.run_values, data.time_start, data.time_end, data.samples,
+                                        metadata["name"], metadata["id"])
+        return ChannelData(data.timestamps(), data.datapoints(), metadata["name"], metadata["id"], data.offset)
+
+    def _load_runs(self, group_id: str, metadata: dict) -> ChannelData:
+        """
+        Loads a channel stored as runs, the runs file of its group is read once and cached.
+        """
+        if group_id not in self.runs_cache:
+            filename = self.storage_folder + "/" + group_id + "_runs.parquet"
+            if not os.path.exists(filename):
+                self.logger.error(
+                    f"Could not find the runs of channel data with id {metadata['id']}")
+                return None
+            dataframe = pd.read_parquet(filename)
+            self.runs_cache[group_id] = (
+                dataframe["start"].to_numpy(), dataframe["value"].to_numpy())
+            if len(self.runs_cache) > 10:
+                self.runs_cache.pop(next(iter(self.runs_cache)))
+        starts, run_values = self.runs_cache[group_id]
+        offset, count = metadata["runs"]
+        run_values = run_values[offset:offset + count].astype(
+            metadata["dtype"], copy=False)
+        return RunLengthChannelData(starts[offset:offset + count], run_values, metadata["time_start"],
+                                    metadata["time_end"], metadata["samples"], metadata["name"], metadata["id"])
+
+    def _load_linked(self, metadata: dict, t_start: float | None = None, t_end: float | None = None) -> ChannelData:
+        """
+        Loads a linked channel. On its first load the channel is read from its MDF file and resampled like at
+        import, and stored in the folder "linked", later loads read the stored data. If a time range is given, only
+        the row groups of the stored data overlapping it are read, like for other channels, see load.
+        Returns None if the MDF file was removed or changed since the channel was linked. This is checked on every
+        load, also if the channel was already read, such that all channels of a moved file fail alike.
+        """
+        error = self._link_error(metadata)
+        if error is not None:
+            self.logger.error(error)
+            return None
+        id = metadata["id"]
+        ranged = t_start is not None or t_end is not None
+        if id in self.linked_cache:
+            channel_data = self.linked_cache[id]
+            return self._slice_range(channel_data, t_start, t_end) if ranged else channel_data
+        filename = f"{self.linked_folder}/{id}.parquet"
+        if os.path.exists(filename) and ranged:
+            parquet_file = pq.ParquetFile(filename)
+            columns = {name: i for i, name in enumerate(
+                parquet_file.schema_arrow.names)}
+            time, values, offset = self._read_row_groups(
+                parquet_file, columns, "time", "value", t_start, t_end)
+            return ChannelData(time, values, metadata["name"], id, offset)
+        if os.path.exists(filename):
+            dataframe = pd.read_parquet(filename)
+            channel_data = ChannelData(dataframe["time"].to_numpy(
+            ), dataframe["value"].to_numpy(), metadata["name"], id)
+        else:
+            channel_data = self._read_linked(metadata)
+            if channel_data is None:
+                return None
+            # written to a temporary file first, the channel may be loaded by several comparison workers at once
+            temporary_filename = f"{filename}.{os.getpid()}.tmp"
+            pd.DataFrame({"time": channel_data.timestamps(), "value": channel_data.datapoints()}).to_parquet(
+                temporary_filename, row_group_size=self._row_group_size(channel_data))
+            os.replace(temporary_filename, filename)
+
+        self.linked_cache[id] = channel_data
+        if len(self.linked_cache) > 100:
+            self.linked_cache.pop(next(iter(self.linked_cache)))
+        return self._slice_range(channel_data, t_start, t_end) if ranged else channel_data
+
+    @staticmethod
+    def _slice_range(channel_data: ChannelData, t_start: float | None, t_end: float | None) -> ChannelData:
+        """
+        Returns the samples of loaded channel data within the time range, with one more sample on each side.
+        """
+        timestamps = channel_data.timestamps()
+        start = 0 if t_start is None else max(
+            int(np.searchsorted(timestamps, t_start, side="left")) - 1, 0)
+        end = len(timestamps) if t_end is None else min(
+            int(np.searchsorted(timestamps, t_end, side="right")) + 1, len(timestamps))
+        return ChannelData(timestamps[start:end], channel_data.datapoints()[start:end], channel_data.name,
+                           channel_data.id, channel_data.offset + start)
+
+    def link_error(self, id: str) -> str | None:
+        """
+        Returns why a linked channel cannot be loaded, naming its MDF file, or None if the channel is not linked
+        or its file is unchanged.
+        """
+        group_metadata = self._group_metadata(id.split(".")[0])
+        if group_metadata is None or id not in group_metadata or "link" not in group_metadata[id]:
+            return None
+        return self._link_error(group_metadata[id])
+
+    @staticmethod
+    def _link_error(metadata: dict) -> str | None:
+        link = metadata["link"]
+        try:
+            stat = os.stat(link["file"])
+        except OSError:
+            return f"Could not find {link['file']}, which channel {metadata['name']} is linked to"
+        if stat.st_size != link["size"] or stat.st_mtime_ns != link["mtime"]:
+            return f"{link['file']}, which channel {metadata['name']} is linked to, changed since it was imported"
+        return None
+
+    def _read_linked(self, metadata: dict) -> ChannelData:
+        link = metadata["link"]
+        if link["file"] not in self.mdf_cache:
+            if len(self.mdf_cache) >= OPEN_FILE_LIMIT:
+                self.mdf_cache.pop(next(iter(self.mdf_cache))).close()
+            self.mdf_cache[link["file"]] = MDF(link["file"])
+        mdf = self.mdf_cache[link["file"]]
+        self.logger.info(
+            f"Reading linked channel {metadata['name']} from {link['file']}")
+        signal = mdf.get(group=link["group"], index=link["index"])
+        raw_signal = mdf.get(
+            group=link["group"], index=link["index"], raw=True)
+
+        processor = ChannelProcessor()
+        values, raw_values = processor.decode_signal(
+            signal.samples, raw_signal.samples)
+        if len(values) == 0 or len(values) != len(signal.timestamps):
+            self.logger.error(
+                f"Linked channel {metadata['name']} has no values, or a different number of values and timestamps")
+            return None
+        unique_values, indices = np.unique(values, return_index=True)
+        value_mapping = processor.value_name_mapping(
+            unique_values, indices, raw_values)
+        if len(value_mapping) > 0:
+            # the value names are only known once the samples are read
+            channel_repository = ChannelRepository()
+            channel = channel_repository.load(metadata["id"])
+            if channel is not None:
+                channel.value_name_mapping = value_mapping
+                channel_repository.store(channel)
+
+        channel_data = ChannelData(
+            signal.timestamps, raw_values, metadata["name"], metadata["id"])
+        return processor.normalize_channel(channel_data, link["length"], link["sample_rate"])
+
+    def _open_group(self, group_id: str) -> tuple[pq.ParquetFile, dict[str, int], dict] | None:
+        """
+        Opens the parquet file of a group for reading row groups, and caches it together with the index of each
+        column and the group metadata, such that the footer of a wide group is only parsed once.
+        Returns None if the group could not be found.
+        """
+        if group_id not in self.parquet_file_cache:
+            filename = self.storage_folder + "/" + group_id + ".parquet"
+            metadata_filename = self.storage_folder + \
+                "/" + group_id + "_metadata.json"
+            if not os.path.exists(filename) or not os.path.exists(metadata_filename):
+                return None
+            parquet_file = pq.ParquetFile(filename)
+            columns = {name: i for i, name in enumerate(
+                parquet_file.schema_arrow.names)}
+            self.parquet_file_cache[group_id] = (
+                parquet_file, columns, json.load(open(metadata_filename)))
+
+            if len(self.parquet_file_cache) > 10:
+                first_item = next(iter(self.parquet_file_cache))
+                self.parquet_file_cache.pop(first_item)
+        return self.parquet_file_cache[group_id]
+
+    def _group_metadata(self, group_id: str) -> dict | None:
+        if group_id in self.metadata_cache:
+            return self.metadata_cache[group_id]
+        group = self._open_group(group_id)
+        return group[2] if group is not None else None
+
+    def load_from_channel(self, channel: Channel, t_start: float | None = None, t_end: float | None = None) -> ChannelData:
+        return self.load(channel.id, t_start, t_end)
+
+    def time_step(self, id: str) -> float | None:
+        """
+        Returns the time step between the first two samples of a channel, without loading its data.
+        Returns None for channel data stored before the time step was recorded, or if it could not be found.
+        """
+        group_metadata = self._group_metadata(id.split(".")[0])
+        if group_metadata is None or id not in group_metadata:
+            return None
+        return group_metadata[id].get("time_step")
+
+    def sample_count(self, id: str) -> int:
+        """
+        Returns the number of samples stored for a channel, without loading its data.
+        All channels of a group share the same length, therefore only the parquet footer of the group is read.
+        Returns 0 if the channel data could not be found.
+        """
+        group_id = id.split(".")[0]
+        if group_id in self.sample_count_cache:
+            return self.sample_count_cache[group_id]
+
+        group_metadata = self._group_metadata(group_id)
+        if group_metadata is not None and "data" in group_metadata.get(id, {}):
+            # groups of deduplicated channels may hold no data of their own
+            return self.sample_count(group_metadata[id]["data"])
+        if group_metadata is not None and ("link" in group_metadata.get(id, {}) or "runs" in group_metadata.get(id, {})):
+            return group_metadata[id]["samples"]
+
+        if group_id in self.cache:
+            count = len(self.cache[group_id])
+        else:
+            filename = self.storage_folder + "/" + group_id + ".parquet"
+            if not os.path.exists(filename):
+                self.logger.error(f"Could not find channel data with id {id}")
+                return 0
+            count = pq.read_metadata(filename).num_rows
+
+        self.sample_count_cache[group_id] = count
+        return count
 
     def store_group(self, group_id: str, data: list[ChannelData]):
+        """
+        Stores the data of the channels of a new group. Arrays whose content is already stored, in this or another
+        group, are not stored again, the channels reference the stored data instead.
+        Channels whose values change rarely are stored as runs of equal values, which are expanded to the samples
+        when they are accessed, see _find_runs.
+        The references are only added to the ContentCatalog once the files of the group are written, such that an
+        import failing in between never leaves references to data that does not exist.
+        """
         filename = self.storage_folder + "/" + group_id + ".parquet"
-        metadata_filename = self.storage_folder + \
-            "/" + group_id + "_metadata.json"
-
-        dataframe = pd.DataFrame()
-        group_metadata = {}
         if os.path.exists(filename):
             self.logger.error(
                 f"Channel Data Group {group_id} already exists, cannot store an existing group")
             return
 
+        content_hashes = [self._content_hash(channel_data) for channel_data in data]
+        hashes = [content_hash for content_hash in content_hashes if content_hash is not None]
+        stored_ids = self.content_catalog.find_many(hashes)
+        group_metadata = self._write_group(
+            group_id, data, content_hashes, stored_ids)
+
+        data_ids = self.content_catalog.acquire_many(
+            [(content_hash, f"{group_id}.{content_hash}") for content_hash in hashes])
+        acquired_ids = {content_hash: data_id for content_hash, data_id in data_ids.items()
+                        if data_id.split(".")[0] != group_id}
+        if acquired_ids != stored_ids:
+            # another import stored or removed the same content in the meantime
+            self.logger.info(
+                f"Shared data of channel data group {group_id} changed while it was stored, storing it again")
+            group_metadata = self._write_group(
+                group_id, data, content_hashes, acquired_ids)
+
+        run_channels = sum(1 for metadata in group_metadata.values() if "runs" in metadata)
+        if run_channels > 0:
+            self.logger.info(
+                f"Stored {run_channels} step-like channels of group {group_id} as runs")
+        shared_count = sum(1 for metadata in group_metadata.values()
+                           if "data" in metadata and metadata["data"].split(".")[0] != group_id)
+        if shared_count > 0:
+            self.logger.info(
+                f"Stored {len(data) - shared_count} of {len(data)} channels of group {group_id}, "
+                f"the others reference identical data")
+
+    def _write_group(self, group_id: str, data: list[ChannelData], content_hashes: list[str | None],
+                     stored_ids: dict[str, str]) -> dict:
+        """
+        Writes the files of a group created by store_group, replacing earlier files of it.
+        Args:
+            content_hashes (list[str | None]): The content hash of each channel, None if it is not deduplicated.
+            stored_ids (dict[str, str]): The data id of each content hash that is stored in another group.
+        Returns:
+            dict: The metadata of the group.
+        """
+        filename = self.storage_folder + "/" + group_id + ".parquet"
+        metadata_filename = self.storage_folder + \
+            "/" + group_id + "_metadata.json"
+        runs_filename = self.storage_folder + "/" + group_id + "_runs.parquet"
+
+        group_metadata = {}
         dataframe_headers = []
         dataframe_columns = []
-        for channel_data in data:
-            dataframe_headers.append(f"{channel_data.id} time")
-            dataframe_headers.append(f"{channel_data.id} value")
+        run_starts = []
+        run_values = []
+        run_count = 0
+        regular_time_axes = {}
+        for channel_data, content_hash in zip(data, content_hashes):
+            metadata = self._channel_metadata(channel_data)
+            data_id = channel_data.id
+            if content_hash is not None:
+                data_id = stored_ids.get(
+                    content_hash, f"{group_id}.{content_hash}")
+                metadata["hash"] = content_hash
+                metadata["data"] = data_id
+                if data_id in group_metadata or data_id.split(".")[0] != group_id:
+                    group_metadata[channel_data.id] = metadata
+                    continue
+                group_metadata[data_id] = {**self._channel_metadata(channel_data), "id": data_id}
+                runs = self._find_runs(channel_data, regular_time_axes)
+                if runs is not None:
+                    timestamps = channel_data.timestamps()
+                    group_metadata[data_id].update({
+                        "runs": [run_count, len(runs[0])],
+                        "time_start": float(timestamps[0]),
+                        "time_end": float(timestamps[-1]),
+                        "dtype": channel_data.datapoints().dtype.str})
+                    run_starts.append(runs[0])
+                    run_values.append(runs[1])
+                    run_count += len(runs[0])
+                    group_metadata[channel_data.id] = metadata
+                    continue
+            dataframe_headers.append(f"{data_id} time")
+            dataframe_headers.append(f"{data_id} value")
             dataframe_columns.append(channel_data.timestamps())
             dataframe_columns.append(channel_data.datapoints())
-            group_metadata[f"{channel_data.id}"] = {
-                "name": channel_data.name,
-                "id": channel_data.id
-            }
+            group_metadata[channel_data.id] = metadata
 
-        new_dataframe = pd.DataFrame(
+        dataframe = pd.DataFrame(
             dict(zip(dataframe_headers, dataframe_columns)))
 
-        dataframe = pd.concat([dataframe, new_dataframe], axis=1)
+        # all channels of a group share the same time axis, therefore the first channel determines the row groups
+        row_group_size = self._row_group_size(data[0]) if len(data) > 0 else None
+        if len(run_starts) > 0:
+            pd.DataFrame({"start": np.concatenate(run_starts), "value": np.concatenate(run_values)}).to_parquet(
+                runs_filename)
+        elif os.path.exists(runs_filename):
+            os.remove(runs_filename)
+        dataframe.to_parquet(filename, row_group_size=row_group_size)
+        json.dump(group_metadata, open(metadata_filename, "w"))
+        self._forget_group(group_id)
+        return group_metadata
+
+    def store_links(self, group_id: str, channels: list[Channel], links: list[dict]):
+        """
+        Stores a new group of linked channels, whose samples are read from an MDF file when they are first loaded.
+        Args:
+            group_id (str): The id of the group.
+            channels (list[Channel]): The channels of the group.
+            links (list[dict]): For each channel, the MDF file ("file", "size", "mtime"), the position of the channel
+                in it ("group", "index"), and the length and sample rate it is resampled to ("length", "sample_rate").
+        """
+        filename = self.storage_folder + "/" + group_id + ".parquet"
+        metadata_filename = self.storage_folder + \
+            "/" + group_id + "_metadata.json"
+        if os.path.exists(filename):
+            self.logger.error(
+                f"Channel Data Group {group_id} already exists, cannot store an existing group")
+            return
 
-        dataframe.to_parquet(filename)
+        group_metadata = {}
+        for channel, link in zip(channels, links):
+            # the same number of samples normalize_channel creates
+            samples = int(link["length"] * link["sample_rate"])
+            metadata = {"name": channel.name, "id": channel.id,
+                        "samples": samples, "link": link}
+            if samples > 1:
+                metadata["time_step"] = float(link["length"] / (samples - 1))
+            group_metadata[channel.id] = metadata
+
+        # the group holds no samples itself
+        pd.DataFrame().to_parquet(filename)
         json.dump(group_metadata, open(metadata_filename, "w"))
 
     def delete_group(self, group_id: str):
+        """
+        Deletes a group. Its files are kept as long as channels of other groups reference data stored in it, and
+        the files of other deleted groups are removed once this group was the last one referencing their data.
+        """
+        group_metadata = self._group_metadata(group_id)
+        if group_metadata is None:
+            self.logger.error(
+                f"Could not find channel data group {group_id} to delete")
+            return
+        # shared data is referenced by the channels of a group, the entries of the data itself have no hash
+        content_hashes = [metadata["hash"] for metadata in group_metadata.values()
+                          if "hash" in metadata]
+        removable_groups = self.content_catalog.release_many(
+            content_hashes, deleted_group=group_id)
+        if group_id not in removable_groups:
+            self.logger.info(
+                f"Keeping the data of channel data group {group_id}, it is referenced by other groups")
+        for removable_group_id in removable_groups:
+            self._remove_group_files(removable_group_id)
+
+    def _remove_group_files(self, group_id: str):
         filename = self.storage_folder + "/" + group_id + ".parquet"
         metadata_filename = self.storage_folder + \
             "/" + group_id + "_metadata.json"
 
+        group_metadata = self._group_metadata(group_id) or {}
+        for id, metadata in group_metadata.items():
+            linked_filename = f"{self.linked_folder}/{id}.parquet"
+            if "link" in metadata and os.path.exists(linked_filename):
+                os.remove(linked_filename)
+            self.linked_cache.pop(id, None)
+
+        self._forget_group(group_id)
+        runs_filename = self.storage_folder + "/" + group_id + "_runs.parquet"
+        if os.path.exists(runs_filename):
+            os.remove(runs_filename)
         if os.path.exists(filename):
             os.remove(filename)
             self.logger.info(f"Deleted channel data group {group_id}")
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class ChannelName():
+    """
+    The parts of a qualified channel name "<prefix>::<prefix>::<signal>_XIX_<pdu>_XIX_<bus>".
+    Attributes:
+        qualified (bool): Whether the name has three "::" separated parts, the last one containing "XIX".
+        signal (str): The signal name, the last part up to the first "_XIX".
+        bus (str): The bus name, the last part after the last "XIX_".
+        pdu (str | None): The PDU name, between the first and second "_XIX_", None if there is no "_XIX_".
+    """
+    qualified: bool
+    signal: str
+    bus: str
+    pdu: str | None
+
+
+@lru_cache(maxsize=1 << 17)
+def parse_channel_name(name: str) -> ChannelName:
+    """
+    Parses a channel name into its parts. The result is cached, such that each name is split only once.
+    """
+    parts = name.split("::")
+    last = parts[-1]
+    pdu_parts = last.split("_XIX_")
+    return ChannelName(len(parts) == 3 and "XIX" in last, last.split("_XIX")[0], last.split("XIX_")[-1],
+                       pdu_parts[1] if len(pdu_parts) > 1 else None)
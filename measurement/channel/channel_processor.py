@@ -7,6 +7,36 @@ import numpy as np
 
 class ChannelProcessor():
 
+    def decode_signal(self, values: np.ndarray, raw_values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Prepares the samples of a signal read from an MDF file for storing them.
+        Args:
+            values (np.ndarray): The converted samples of the signal.
+            raw_values (np.ndarray): The raw samples of the signal.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The converted samples and the samples to store. Numeric samples are
+                converted to float and stored themselves, other samples (e.g. texts) are stored as their raw values.
+        """
+        raw_values = raw_values.astype(np.float64)
+        if values.dtype in [np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64, np.float16, np.float32, np.float64]:
+            values = values.astype(np.float64)
+            raw_values = values
+        return values, raw_values
+
+    def value_name_mapping(self, unique_values: np.ndarray, indices: np.ndarray, raw_values: np.ndarray) -> dict:
+        """
+        Returns the mapping of the stored values of a signal to its converted values, for signals with at most 20
+        distinct values, e.g. states or texts.
+        Args:
+            unique_values (np.ndarray): The distinct converted values, see np.unique.
+            indices (np.ndarray): The index of the first occurrence of each distinct value.
+            raw_values (np.ndarray): The stored values, see decode_signal.
+        """
+        if len(unique_values) > 20:
+            return {}
+        stored_values = [float(value) for value in raw_values[indices]]
+        return dict(zip(stored_values, unique_values))
+
     def resample(self, channel_data: ChannelData, length: float, samples: int) -> ChannelData:
         """
         Resamples the given channel data to a specified length and number of samples.
@@ -1,93 +1,84 @@
 
 import json
 import os
-import pandas as pd
 import uuid
 
 from logging import getLogger
 
 from .channel import Channel
+from .channel_catalog import ChannelCatalog
+from .channel_name import parse_channel_name
+from .kmatrix_service import KMatrixService
 
 
 class ChannelRepository():
+    """
+    Stores the metadata of the channels in a ChannelCatalog. Channels are grouped by the first part of their id,
+    the group id, which is shared with the ChannelDataRepository.
+    Groups stored as JSON files by earlier versions are moved into the catalog when they are first read.
+    """
 
     def __init__(self) -> None:
         self.logger = getLogger(__name__)
         self.storage_folder = os.getcwd() + "/measurements" + "/channels"
         if not os.path.exists(self.storage_folder):
             os.makedirs(self.storage_folder)
+        self.catalog = ChannelCatalog(
+            os.getcwd() + "/measurements" + "/channels.sqlite")
 
     def store(self, channel: Channel) -> None:
-        group_id = channel.id.split(".")[0]
-        filename = self.storage_folder + "/" + group_id + ".json"
-        dict_to_store = channel.__dict__.copy()
-        dict_to_store.pop("value_name_mapping")
-        dict_to_store["value_name_mapping"] = {}
-        for value, name in channel.value_name_mapping.items():
-            dict_to_store["value_name_mapping"] = {
-                **dict_to_store["value_name_mapping"], str(name): float(value)}
-
-        group_data = {}
-        if os.path.exists(filename):
-            group_data = json.load(open(filename, "r"))
-        else:
-            self.logger.info(
-                f"Group {group_id} does not exist yet. Creating...")
-
-        group_data[channel.id] = dict_to_store
-
-        json.dump(group_data, open(filename, "w"))
-
-        # self.logger.info(f"Stored channel {channel.name} with id {channel.id}")
+        self.catalog.put_many([channel])
 
     def load(self, id: str) -> Channel:
-        group_id = id.split(".")[0]
-        filename = self.storage_folder + "/" + group_id + ".json"
-
-        if not os.path.exists(filename):
-            self.logger.error(f"Could not find group with id {group_id}")
-            return None
-
-        group_dict = json.load(open(filename))
-
-        channel_dict = group_dict[id]
-
-        value_name_mapping = channel_dict["value_name_mapping"]
-        new_value_name_mapping = {}
-        for value, name in value_name_mapping.items():
-            new_value_name_mapping[float(value)] = name
-
-        return Channel(channel_dict["id"], channel_dict["name"], channel_dict["aliases"], new_value_name_mapping)
+        channel = self.catalog.get(id)
+        if channel is None and self._migrate_group(self.parse_group_id(id)):
+            channel = self.catalog.get(id)
+        if channel is None:
+            self.logger.error(f"Could not find channel with id {id}")
+        return channel
+
+    def load_many(self, ids: list[str]) -> list[Channel]:
+        """
+        Loads the channels with the given ids at once, in the given order. Channels that are not found are skipped.
+        """
+        channels = self.catalog.get_many(ids)
+        missing = {self.parse_group_id(id) for id in ids if id not in channels}
+        if any([self._migrate_group(group_id) for group_id in missing]):
+            channels = self.catalog.get_many(ids)
+        if len(channels) != len(set(ids)):
+            self.logger.error(
+                f"Could not find {len(set(ids)) - len(channels)} of {len(set(ids))} channels")
+        return [channels[id] for id in ids if id in channels]
+
+    def store_many(self, channels: list[Channel]) -> None:
+        """
+        Stores channels of any groups at once, replacing earlier versions of them.
+        """
+        self.catalog.put_many(channels)
 
     def store_group(self, group_id: str, data: list[Channel]):
-        filename = self.storage_folder + "/" + group_id + ".json"
-
-        group_data = {}
-        if os.path.exists(filename):
-            group_data = json.load(open(filename, "r"))
-        else:
-            self.logger.info(
-                f"Group {group_id} does not exist yet. Creating...")
-
-        for channel in data:
-            dict_to_store = channel.__dict__.copy()
-            dict_to_store.pop("value_name_mapping")
-            dict_to_store["value_name_mapping"] = {}
-            for value, name in channel.value_name_mapping.items():
-                dict_to_store["value_name_mapping"] = {
-                    **dict_to_store["value_name_mapping"], str(name): float(value)}
-
-            group_data[channel.id] = dict_to_store
-
-        json.dump(group_data, open(filename, "w"))
+        self.catalog.put_many(data)
 
     def delete_group(self, group_id: str):
-        filename = self.storage_folder + "/" + group_id + ".json"
-        if os.path.exists(filename):
-            os.remove(filename)
-        else:
+        self._migrate_group(group_id)
+        if self.catalog.delete_group(group_id) == 0:
             self.logger.error(f"Could not find group with id {group_id}")
 
+    def _migrate_group(self, group_id: str) -> bool:
+        """
+        Moves a group stored as JSON file into the catalog. Returns whether there was such a file.
+        """
+        filename = self.storage_folder + "/" + group_id + ".json"
+        if not os.path.exists(filename):
+            return False
+        self.logger.info(f"Moving group {group_id} into the channel catalog")
+        group_data = json.load(open(filename, "r"))
+        # the value name mapping is stored as {name: value}, like Channel.to_dict
+        self.catalog.put_many([Channel.from_dict(channel_dict)
+                               for channel_dict in group_data.values()])
+        os.remove(filename)
+        return True
+
     def generate_group_id(self) -> str:
         return str(uuid.uuid4())
 
@@ -102,59 +93,44 @@ class ChannelRepository():
         return channel_id.split(".")[1]
 
     def is_name_qualified(self, channel: Channel | str) -> bool:
-        if isinstance(channel, Channel):
-            name = channel.name
-        else:
-            name = channel
-        if len(name.split("::")) != 3:
-            return False
-        last_name = name.split("::")[-1]
-        if "XIX" not in last_name:
-            return False
-        return True
+        name = channel.name if isinstance(channel, Channel) else channel
+        return parse_channel_name(name).qualified
 
     def get_signal_name(self, channel: Channel | str) -> str:
-        if isinstance(channel, Channel):
-            name = channel.name
-        else:
-            name = channel
-        last = name.split("::")[-1]
-        return last.split("_XIX")[0]
+        name = channel.name if isinstance(channel, Channel) else channel
+        return parse_channel_name(name).signal
 
     def get_bus_name(self, channel: Channel | str) -> str:
-        if isinstance(channel, Channel):
-            name = channel.name
-        else:
-            name = channel
-        last = name.split("::")[-1]
-        return last.split("XIX_")[-1]
-
-    def get_pdu_name(self, channel: Channel | str) -> str:
-        if isinstance(channel, Channel):
-            name = channel.name
-        else:
-            name = channel
-        last = name.split("::")[-1]
-        return last.split("_XIX_")[1]
+        name = channel.name if isinstance(channel, Channel) else channel
+        return parse_channel_name(name).bus
+
+    def get_pdu_name(self, channel: Channel | str) -> str | None:
+        name = channel.name if isinstance(channel, Channel) else channel
+        return parse_channel_name(name).pdu
+
+    def find_channels(self, signal: str | None = None, bus: str | None = None, pdu: str | None = None,
+                      prefix: str | None = None, contains: str | None = None,
+                      group_ids: list[str] | None = None) -> list[Channel]:
+        """
+        Finds all stored channels matching all given criteria, using the parts of their names stored in the catalog.
+        Args:
+            signal (str | None): The signal name, see get_signal_name.
+            bus (str | None): The bus name, see get_bus_name.
+            pdu (str | None): The PDU name, see get_pdu_name.
+            prefix (str | None): The start of the channel name.
+            contains (str | None): A part of the channel name, case insensitive.
+            group_ids (list[str] | None): Only channels of these groups.
+        Returns:
+            list[Channel]: The matching channels, ordered by name.
+        """
+        return self.catalog.query(signal, bus, pdu, prefix, contains, group_ids)
 
     def get_channel_description(self, channel: Channel | str) -> str | None:
-        bus_name = self.get_bus_name(channel)
-        signal_name = self.get_signal_name(channel)
-
-        file = os.getcwd() + "/kmatrix/kmatrix.csv"
-
-        if not os.path.exists(file):
+        """
+        Returns the description of the channel from the K-matrix, see KMatrixService.
+        """
+        service = KMatrixService()
+        if not service.available():
             self.logger.error("Kmatrix file not found.")
             return None
-
-        kmatrix = pd.read_csv(os.getcwd() + "/kmatrix/kmatrix.csv", sep=';')
-        kmatrix = kmatrix.applymap(
-            lambda x: x.strip() if isinstance(x, str) else x)
-
-        entry = kmatrix[(kmatrix['Bus'] == bus_name) &
-                        (kmatrix['Signal'] == signal_name)]
-        if not entry.empty:
-            description = entry.iloc[0]['Description']
-            return description
-        else:
-            return None
+        return service.describe_channel(channel)
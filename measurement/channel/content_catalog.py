@@ -0,0 +1,153 @@
+from contextlib import closing
+import sqlite3
+
+# Version of the content tables, a catalog of another version is recreated.
+CONTENT_CATALOG_VERSION = 1
+
+# Maximum number of values bound in a single query, below the limit of older SQLite versions.
+QUERY_CHUNK_SIZE = 900
+
+
+class ContentCatalog():
+    """
+    Keeps track of content stored once and shared between measurements, in a SQLite database:
+    - Channel data arrays by their content hash, with the id under which they are stored (see
+      ChannelDataRepository.store_group) and the number of channels referencing them.
+    - Imported measurement files by their fingerprint and import options, such that importing the same file
+      with the same options again is detected.
+    Groups of channel data are only removed once they are deleted and none of their arrays is referenced anymore.
+    Every call opens its own connection, therefore the catalog can be used from the import processes.
+    Args:
+        filename (str): The database file, created if it does not exist.
+    Example usage:
+        catalog = ContentCatalog(f"{storage_folder}/content.sqlite")
+        data_ids = catalog.acquire_many([(content_hash, data_id)])
+        removable_groups = catalog.release_many([content_hash], deleted_group=group_id)
+    Data is only acquired once it is stored, such that the catalog never references data that does not exist.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        with closing(self._connect()) as connection, connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == CONTENT_CATALOG_VERSION:
+                return
+            for table in ["channel_data", "deleted_groups", "imports"]:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute(
+                "CREATE TABLE channel_data (hash TEXT PRIMARY KEY, data_id TEXT NOT NULL, group_id TEXT NOT NULL, "
+                "refs INTEGER NOT NULL)")
+            connection.execute(
+                "CREATE INDEX channel_data_group ON channel_data (group_id)")
+            connection.execute(
+                "CREATE TABLE deleted_groups (group_id TEXT PRIMARY KEY)")
+            connection.execute(
+                "CREATE TABLE imports (measurement_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                "options TEXT NOT NULL)")
+            connection.execute(
+                "CREATE INDEX imports_fingerprint ON imports (fingerprint)")
+            connection.execute(
+                f"PRAGMA user_version = {CONTENT_CATALOG_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.filename, timeout=30)
+
+    def acquire_many(self, candidates: list[tuple[str, str]]) -> dict[str, str]:
+        """
+        Adds a reference to the stored data of each content hash, in a single transaction. Hashes that are not
+        registered yet are registered with the given data id, which the caller must have stored before.
+        Args:
+            candidates (list[tuple[str, str]]): The content hash of each channel and the data id it would be stored as.
+        Returns:
+            dict[str, str]: The data id each hash is stored as.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT INTO channel_data (hash, data_id, group_id, refs) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (hash) DO UPDATE SET refs = refs + 1",
+                [(content_hash, data_id, data_id.split(".")[0]) for content_hash, data_id in candidates])
+            return self._data_ids(connection, list({content_hash for content_hash, _ in candidates}))
+
+    def find_many(self, hashes: list[str]) -> dict[str, str]:
+        """
+        Returns the data id of each content hash that is already stored, without adding references.
+        """
+        with closing(self._connect()) as connection:
+            return self._data_ids(connection, list(set(hashes)))
+
+    @staticmethod
+    def _data_ids(connection: sqlite3.Connection, hashes: list[str]) -> dict[str, str]:
+        data_ids = {}
+        for start in range(0, len(hashes), QUERY_CHUNK_SIZE):
+            chunk = hashes[start:start + QUERY_CHUNK_SIZE]
+            rows = connection.execute(
+                f"SELECT hash, data_id FROM channel_data WHERE hash IN ({', '.join('?' * len(chunk))})", chunk)
+            data_ids.update(rows)
+        return data_ids
+
+    def release_many(self, hashes: list[str], deleted_group: str | None = None) -> list[str]:
+        """
+        Removes a reference from the stored data of each content hash, in a single transaction, and optionally
+        marks a group as deleted.
+        Args:
+            hashes (list[str]): The content hash of each released channel, repeated for each reference.
+            deleted_group (str | None): The group whose channels are released, because it is deleted.
+        Returns:
+            list[str]: The deleted groups none of whose data is referenced anymore, their files can be removed.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("UPDATE channel_data SET refs = refs - 1 WHERE hash = ? AND refs > 0",
+                                   [(content_hash,) for content_hash in hashes])
+            groups = set()
+            unique_hashes = list(set(hashes))
+            for start in range(0, len(unique_hashes), QUERY_CHUNK_SIZE):
+                chunk = unique_hashes[start:start + QUERY_CHUNK_SIZE]
+                groups.update(group_id for group_id, in connection.execute(
+                    f"SELECT DISTINCT group_id FROM channel_data WHERE hash IN ({', '.join('?' * len(chunk))})",
+                    chunk))
+            if deleted_group is not None:
+                connection.execute(
+                    "INSERT OR IGNORE INTO deleted_groups (group_id) VALUES (?)", (deleted_group,))
+                groups.add(deleted_group)
+
+            removable_groups = []
+            for group_id in sorted(groups):
+                deleted = connection.execute(
+                    "SELECT 1 FROM deleted_groups WHERE group_id = ?", (group_id,)).fetchone() is not None
+                referenced = connection.execute(
+                    "SELECT 1 FROM channel_data WHERE group_id = ? AND refs > 0 LIMIT 1", (group_id,)).fetchone() is not None
+                if deleted and not referenced:
+                    connection.execute(
+                        "DELETE FROM channel_data WHERE group_id = ?", (group_id,))
+                    connection.execute(
+                        "DELETE FROM deleted_groups WHERE group_id = ?", (group_id,))
+                    removable_groups.append(group_id)
+            return removable_groups
+
+    def references(self, content_hash: str) -> int:
+        """
+        Returns the number of channels referencing the data with the content hash, 0 if it is not stored.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT refs FROM channel_data WHERE hash = ?", (content_hash,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def find_import(self, fingerprint: str, options: str) -> str | None:
+        """
+        Returns the id of a measurement imported from a file with the fingerprint and the same import options.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT measurement_id FROM imports WHERE fingerprint = ? AND options = ?",
+                                     (fingerprint, options)).fetchone()
+        return row[0] if row is not None else None
+
+    def put_import(self, fingerprint: str, options: str, measurement_id: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("INSERT OR REPLACE INTO imports (measurement_id, fingerprint, options) VALUES (?, ?, ?)",
+                               (measurement_id, fingerprint, options))
+
+    def remove_imports(self, measurement_id: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM imports WHERE measurement_id = ?", (measurement_id,))
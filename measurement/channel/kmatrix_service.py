@@ -0,0 +1,93 @@
+from logging import getLogger
+import os
+from threading import Lock
+from typing import Self
+
+import pandas as pd
+
+from .channel import Channel
+from .channel_name import parse_channel_name
+
+
+class KMatrixService():
+    """
+    Looks up the descriptions of signals in the K-matrix (kmatrix/kmatrix.csv), by bus and signal name.
+    The K-matrix is read once into a dict indexed by (bus, signal), and read again only when the file changed,
+    based on its modification time and size. For signals listed more than once, the first entry is used.
+    Example usage:
+        service = KMatrixService()
+        description = service.describe_channel(channel)
+        descriptions = service.describe_many(measurement.channels)
+    """
+
+    initialized = False
+
+    def __new__(cls) -> Self:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(KMatrixService, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self) -> None:
+        if not self.initialized:
+            self.initialized = True
+            self.logger = getLogger(__name__)
+            self.filename = os.getcwd() + "/kmatrix/kmatrix.csv"
+            self.lock = Lock()
+            self.version: tuple[int, int] | None = None
+            self.descriptions: dict[tuple[str, str], str] = {}
+
+    def available(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def _index(self) -> dict[tuple[str, str], str]:
+        """
+        Returns the index of the descriptions, reading the K-matrix if it changed since it was read last.
+        """
+        with self.lock:
+            if not os.path.exists(self.filename):
+                self.version = None
+                self.descriptions = {}
+                return self.descriptions
+            stat = os.stat(self.filename)
+            version = (stat.st_mtime_ns, stat.st_size)
+            if version != self.version:
+                self.logger.info(f"Reading K-matrix {self.filename}")
+                kmatrix = pd.read_csv(self.filename, sep=';', usecols=[
+                                      "Bus", "Signal", "Description"], dtype=str)
+                for column in ["Bus", "Signal", "Description"]:
+                    kmatrix[column] = kmatrix[column].str.strip()
+                kmatrix = kmatrix.dropna(subset=["Bus", "Signal"]).drop_duplicates(
+                    ["Bus", "Signal"])
+                kmatrix = kmatrix[kmatrix["Description"].notna()]
+                self.descriptions = dict(zip(zip(kmatrix["Bus"].tolist(), kmatrix["Signal"].tolist()),
+                                             kmatrix["Description"].tolist()))
+                self.version = version
+                self.logger.info(
+                    f"Indexed {len(self.descriptions)} K-matrix descriptions")
+            return self.descriptions
+
+    def describe(self, bus: str, signal: str) -> str | None:
+        """
+        Returns the description of a signal on a bus, or None if it is not in the K-matrix.
+        """
+        return self._index().get((bus, signal))
+
+    def describe_channel(self, channel: Channel | str) -> str | None:
+        """
+        Returns the description of a channel, given by the bus and signal parts of its name.
+        """
+        name = channel.name if isinstance(channel, Channel) else channel
+        parts = parse_channel_name(name)
+        return self.describe(parts.bus, parts.signal)
+
+    def describe_many(self, channels: list[Channel | str]) -> list[str | None]:
+        """
+        Returns the descriptions of many channels at once, in the given order, see describe_channel.
+        """
+        descriptions = self._index()
+        result = []
+        for channel in channels:
+            parts = parse_channel_name(channel.name if isinstance(
+                channel, Channel) else channel)
+            result.append(descriptions.get((parts.bus, parts.signal)))
+        return result
@@ -0,0 +1,231 @@
+from dataclasses import dataclass
+from logging import getLogger
+import multiprocessing as mp
+from multiprocessing.connection import Connection, wait
+import time
+import uuid
+
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+from .measurement import Measurement
+from .measurement_import import MeasurementImportInfo, MeasurementImporter
+
+DEFAULT_CONCURRENT_IMPORTS = 2
+
+# Interval in milliseconds in which the messages of the import processes are read.
+POLL_INTERVAL = 200
+
+
+@dataclass
+class ImportJob():
+    """
+    An import of a single measurement file in the ImportQueue.
+    Attributes:
+        id (str): Unique id of the job.
+        info (MeasurementImportInfo): The file and the options of the import.
+        state (str): "queued", "running", "done", "skipped" or "failed".
+        duplicate_of (str | None): The id of the measurement imported from the same file, if the job was skipped.
+        progress (float): The fraction of the import that is done, between 0 and 1.
+        started (float | None): time.perf_counter() when the job was started, None while it is queued.
+        error (str | None): Why the import failed.
+    """
+    id: str
+    info: MeasurementImportInfo
+    state: str = "queued"
+    progress: float = 0.0
+    started: float | None = None
+    error: str | None = None
+    duplicate_of: str | None = None
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Estimated remaining seconds of the job, extrapolated from its progress so far. None if it is unknown.
+        """
+        if self.state != "running" or self.started is None or self.progress <= 0:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed * (1 - self.progress) / self.progress
+
+
+def _import_main(info: MeasurementImportInfo, messages: Connection):
+    """
+    Main function of an import process. Sends ("progress", fraction) messages while importing, and finally
+    ("done", measurement), ("skipped", id of the existing measurement) or ("failed", reason).
+    """
+    last_progress = [-1.0]
+
+    def on_progress(fraction: float):
+        # the importer reports every 100 signals, only noticeable steps are sent
+        if fraction - last_progress[0] >= 0.01 or fraction >= 1:
+            last_progress[0] = fraction
+            messages.send(("progress", fraction))
+
+    try:
+        importer = MeasurementImporter(info, on_progress)
+        measurement = importer.import_measurement()
+        if measurement is None:
+            messages.send(("skipped", importer.duplicate_of))
+        else:
+            messages.send(("done", measurement))
+    except Exception as error:
+        messages.send(("failed", f"{type(error).__name__}: {error}"))
+    finally:
+        messages.close()
+
+
+class _RunningImport():
+    def __init__(self, context, job: ImportJob) -> None:
+        self.job = job
+        self.messages, message_sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_import_main, args=(
+            job.info, message_sender), daemon=True)
+        self.process.start()
+        message_sender.close()
+
+
+class ImportQueue(QObject):
+    """
+    Imports measurement files in separate processes, such that decoding the files is not limited by the GIL
+    and does not block the GUI. Up to max_concurrent files are imported at the same time, further files wait
+    in the queue. The progress of the running jobs is read by a timer in the thread of the queue.
+    The channels are stored by the import processes, the imported Measurements are emitted with jobDone.
+    Args:
+        max_concurrent (int): Maximum number of imports running at the same time.
+    Example usage:
+        queue = ImportQueue(2)
+        queue.jobDone.connect(handle_measurement)
+        queue.enqueue(info)
+    """
+
+    jobQueued = Signal(ImportJob)
+    jobProgress = Signal(ImportJob)
+    jobDone = Signal(ImportJob, Measurement)
+    jobSkipped = Signal(ImportJob, str)
+    jobFailed = Signal(ImportJob, str)
+
+    def __init__(self, max_concurrent: int = DEFAULT_CONCURRENT_IMPORTS) -> None:
+        super().__init__()
+        self.logger = getLogger(__name__)
+        self.max_concurrent = max(1, max_concurrent)
+        # forking the multithreaded GUI process can deadlock on locks held by other threads, the import processes
+        # are therefore started fresh, which _import_main supports as a module level function
+        self.context = mp.get_context("spawn")
+        self.queued: list[ImportJob] = []
+        self.running: list[_RunningImport] = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL)
+        self.timer.timeout.connect(self.process_messages)
+
+    @property
+    def jobs(self) -> list[ImportJob]:
+        """
+        The running jobs followed by the queued jobs.
+        """
+        return [running.job for running in self.running] + self.queued
+
+    @property
+    def busy(self) -> bool:
+        return len(self.queued) > 0 or len(self.running) > 0
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self._start_jobs()
+
+    def enqueue(self, info: MeasurementImportInfo) -> ImportJob:
+        """
+        Adds a file to the queue, it is imported as soon as fewer than max_concurrent imports are running.
+        """
+        job = ImportJob(str(uuid.uuid4()), info)
+        self.logger.info(f"Queued import of {info.filename}")
+        self.queued.append(job)
+        self.jobQueued.emit(job)
+        self._start_jobs()
+        return job
+
+    def _start_jobs(self) -> None:
+        while len(self.queued) > 0 and len(self.running) < self.max_concurrent:
+            job = self.queued.pop(0)
+            job.state = "running"
+            job.started = time.perf_counter()
+            self.logger.info(f"Starting import of {job.info.filename}")
+            self.running.append(_RunningImport(self.context, job))
+        # without an application there is no event loop running the timer, wait is used instead
+        if len(self.running) > 0 and not self.timer.isActive() and QCoreApplication.instance() is not None:
+            self.timer.start()
+        elif len(self.running) == 0:
+            self.timer.stop()
+
+    def process_messages(self, timeout: float = 0) -> None:
+        """
+        Reads the messages of the running imports, emits the signals of the jobs and starts queued jobs.
+        Args:
+            timeout (float): Seconds to wait for a message if there is none yet.
+        """
+        ready = wait([running.messages for running in self.running], timeout=timeout)
+        for running in list(self.running):
+            job = running.job
+            failure = None
+            while running.messages in ready and running.messages.poll():
+                try:
+                    message = running.messages.recv()
+                except (EOFError, OSError):
+                    # the process died without reporting, e.g. killed by the operating system
+                    running.process.join()
+                    failure = f"Import process terminated unexpectedly (exit code {running.process.exitcode})"
+                    break
+                if message[0] == "progress":
+                    job.progress = message[1]
+                    self.jobProgress.emit(job)
+                elif message[0] == "done":
+                    self._finish(running)
+                    job.state = "done"
+                    job.progress = 1.0
+                    self.logger.info(
+                        f"Imported {job.info.filename} in {time.perf_counter() - job.started:.1f}s")
+                    self.jobDone.emit(job, message[1])
+                    break
+                elif message[0] == "skipped":
+                    self._finish(running)
+                    job.state = "skipped"
+                    job.progress = 1.0
+                    job.duplicate_of = message[1]
+                    self.jobSkipped.emit(job, message[1])
+                    break
+                elif message[0] == "failed":
+                    failure = message[1]
+                    break
+            if failure is not None:
+                self._finish(running)
+                job.state = "failed"
+                job.error = failure
+                self.logger.error(
+                    f"Could not import {job.info.filename}: {failure}")
+                self.jobFailed.emit(job, failure)
+        self._start_jobs()
+
+    def _finish(self, running: _RunningImport) -> None:
+        self.running.remove(running)
+        running.process.join()
+        running.messages.close()
+        # the next job is started before the end of this one is reported
+        self._start_jobs()
+
+    def wait(self) -> None:
+        """
+        Blocks until all queued jobs are done, e.g. in the command line interface without an event loop.
+        """
+        while self.busy:
+            self.process_messages(timeout=0.5)
+
+    def close(self) -> None:
+        """
+        Cancels the queued jobs and terminates the running imports.
+        """
+        self.queued = []
+        for running in self.running:
+            running.process.terminate()
+            running.process.join()
+            running.messages.close()
+        self.running = []
+        self.timer.stop()
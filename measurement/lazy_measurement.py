@@ -0,0 +1,44 @@
+import json
+from logging import getLogger
+
+from measurement.channel.channel import Channel
+from measurement.measurement import Measurement
+
+
+class LazyMeasurement(Measurement):
+    """
+    A saved Measurement created from its summary in the measurement index, whose channels are read from its
+    measurement file on first access, e.g. when the measurement is opened or compared.
+    The id, name, length, sample rate and number of channels are available without reading the file.
+    Args:
+        filename (str): The measurement file.
+        summary (dict): The summary of the measurement, see MeasurementRegistry.
+    """
+
+    def __init__(self, filename: str, summary: dict) -> None:
+        self.filename = filename
+        self.id = summary["id"]
+        self.name = summary["name"]
+        self.length = summary["length"]
+        self.sample_rate = summary["sample_rate"]
+        self.summary_channel_count = summary["channel_count"]
+        self.loaded_channels: list[Channel] | None = None
+        self.logger = getLogger(__name__)
+
+    @property
+    def channels(self) -> list[Channel]:
+        if self.loaded_channels is None:
+            self.logger.info(f"Loading channels of measurement {self.name}")
+            data = json.load(open(self.filename, "r"))
+            self.loaded_channels = Measurement.channels_from_dict(data)
+        return self.loaded_channels
+
+    @channels.setter
+    def channels(self, channels: list[Channel]) -> None:
+        self.loaded_channels = channels
+
+    @property
+    def channel_count(self) -> int:
+        if self.loaded_channels is None:
+            return self.summary_channel_count
+        return len(self.loaded_channels)
@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import uuid
 
 from measurement.channel.channel import Channel
+from measurement.channel.channel_name import parse_channel_name
+from measurement.channel.channel_repository import ChannelRepository
 
 
 @dataclass
@@ -21,6 +23,9 @@ class Measurement:
         Sample rate of the measurement.
     channels : list[Channel]
         List of channels associated with the measurement.
+
+    Channels are looked up by id, name, alias, signal, bus and PDU through dict indexes. The indexes are kept up to
+    date by add_channel, remove_channel and rename_channel, and are rebuilt if the channel list was changed directly.
     """
 
     id: str
@@ -28,6 +33,14 @@ class Measurement:
     length: float
     sample_rate: float
     channels: list[Channel]
+    channel_index: '_ChannelIndex | None' = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def _index(self) -> '_ChannelIndex':
+        channels = self.channels
+        if self.channel_index is None or not self.channel_index.is_valid(channels):
+            self.channel_index = _ChannelIndex(channels)
+        return self.channel_index
 
     def add_channel(self, channel: Channel) -> None:
         """
@@ -38,7 +51,43 @@ class Measurement:
         channel : Channel
             Channel to add to the measurement.
         """
+        index = self._index()
         self.channels.append(channel)
+        index.add(channel)
+
+    def remove_channel(self, channel: Channel) -> None:
+        """
+        Remove a channel from the measurement.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel to remove from the measurement.
+        """
+        self.channels.remove(channel)
+        # another channel with the same name or alias may take its place, therefore the index is rebuilt
+        self.channel_index = None
+
+    def rename_channel(self, channel: Channel, name: str) -> None:
+        """
+        Rename a channel of the measurement.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel to rename.
+        name : str
+            New name of the channel.
+        """
+        channel.name = name
+        self.channel_index = None
+
+    @property
+    def channel_count(self) -> int:
+        """
+        Number of channels of the measurement.
+        """
+        return len(self.channels)
 
     def get_channel_by_name(self, name: str) -> Channel:
         """
@@ -54,11 +103,105 @@ class Measurement:
         Channel
             Channel with the specified name. (First found)
         """
-        return next((channel for channel in self.channels if channel.name == name), None)
+        channel = self._index().names.get(name)
+        if channel is not None and channel.name != name:
+            # the channel was renamed without rename_channel
+            self.channel_index = None
+            channel = self._index().names.get(name)
+        return channel
+
+    def get_channel_by_id(self, id: str) -> Channel:
+        """
+        Get a channel by its id.
+
+        Parameters
+        ----------
+        id : str
+            Id of the channel to retrieve.
+
+        Returns
+        -------
+        Channel
+            Channel with the specified id, or None if there is none.
+        """
+        return self._index().ids.get(id)
+
+    def get_channel_by_alias(self, alias: str) -> Channel:
+        """
+        Get a channel by one of its aliases.
+
+        Parameters
+        ----------
+        alias : str
+            Alias of the channel to retrieve.
+
+        Returns
+        -------
+        Channel
+            Channel with the specified alias, or None if there is none. (First found)
+        """
+        return self._index().aliases.get(alias)
+
+    def find_channels(self, signal: str | None = None, bus: str | None = None, pdu: str | None = None,
+                      prefix: str | None = None, contains: str | None = None) -> list[Channel]:
+        """
+        Find the channels matching all given criteria. Signal, bus and PDU are looked up in the index, the
+        name criteria are only checked for the channels matching those.
+
+        Parameters
+        ----------
+        signal : str | None
+            Signal name of the channels, see ChannelRepository.get_signal_name.
+        bus : str | None
+            Bus name of the channels, see ChannelRepository.get_bus_name.
+        pdu : str | None
+            PDU name of the channels, see ChannelRepository.get_pdu_name.
+        prefix : str | None
+            Start of the channel names.
+        contains : str | None
+            Part of the channel names, case insensitive.
+
+        Returns
+        -------
+        list[Channel]
+            The matching channels, in the order of the measurement.
+        """
+        index = self._index()
+        candidates = None
+        for lookup, value in [(index.signals, signal), (index.buses, bus), (index.pdus, pdu)]:
+            if value is None:
+                continue
+            matches = lookup.get(value, [])
+            if candidates is None:
+                candidates = matches
+            else:
+                matching = {id(channel) for channel in matches}
+                candidates = [channel for channel in candidates if id(channel) in matching]
+        if candidates is None:
+            candidates = self.channels
+        if prefix is not None:
+            candidates = [channel for channel in candidates if channel.name.startswith(prefix)]
+        if contains is not None:
+            contains = contains.lower()
+            candidates = [channel for channel in candidates if contains in channel.name.lower()]
+        return list(candidates)
+
+    def channels_by_bus(self) -> dict[str, list[Channel]]:
+        """
+        Group the channels by their bus name, see ChannelRepository.get_bus_name. Channels with unqualified
+        names are not grouped.
+
+        Returns
+        -------
+        dict[str, list[Channel]]
+            The channels of each bus, in the order of the measurement.
+        """
+        return {bus: list(channels) for bus, channels in self._index().buses.items()}
 
     def to_dict(self) -> dict:
         """
-        Convert the measurement to a dictionary.
+        Convert the measurement to a dictionary. The channels are referenced by their ids, their metadata is
+        stored in the ChannelRepository, see MeasurementRegistry.save_measurement.
 
         Returns
         -------
@@ -70,7 +213,7 @@ class Measurement:
             "name": self.name,
             "length": float(self.length),
             "sample_rate": float(self.sample_rate),
-            "channels": [channel.to_dict() for channel in self.channels]
+            "channel_ids": [channel.id for channel in self.channels]
         }
 
     @staticmethod
@@ -88,4 +231,62 @@ class Measurement:
         Measurement
             Measurement created from the dictionary.
         """
-        return Measurement(data["id"], data["name"], data["length"], data["sample_rate"], [Channel.from_dict(channel) for channel in data["channels"]])
+        return Measurement(data["id"], data["name"], data["length"], data["sample_rate"], Measurement.channels_from_dict(data))
+
+    @staticmethod
+    def channels_from_dict(data: dict) -> list[Channel]:
+        """
+        Create the channels of a measurement dictionary, loading them from the ChannelRepository by their ids.
+        Dictionaries of earlier versions contain the channels themselves.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary with measurement data.
+
+        Returns
+        -------
+        list[Channel]
+            The channels of the measurement.
+        """
+        if "channel_ids" in data:
+            return ChannelRepository().load_many(data["channel_ids"])
+        return [Channel.from_dict(channel) for channel in data["channels"]]
+
+
+class _ChannelIndex():
+    """
+    Dict indexes of the channels of a measurement by id, name and alias, and by the signal, bus and PDU parts of
+    qualified names. Names and aliases map to the first channel with them, as a linear search would find.
+    """
+
+    def __init__(self, channels: list[Channel]) -> None:
+        self.channels = channels
+        self.length = 0
+        self.ids: dict[str, Channel] = {}
+        self.names: dict[str, Channel] = {}
+        self.aliases: dict[str, Channel] = {}
+        self.signals: dict[str, list[Channel]] = {}
+        self.buses: dict[str, list[Channel]] = {}
+        self.pdus: dict[str, list[Channel]] = {}
+        for channel in channels:
+            self.add(channel)
+
+    def is_valid(self, channels: list[Channel]) -> bool:
+        """
+        Checks that the index belongs to the channel list, and that no channels were added to it directly.
+        """
+        return self.channels is channels and self.length == len(channels)
+
+    def add(self, channel: Channel) -> None:
+        self.length += 1
+        self.ids.setdefault(channel.id, channel)
+        self.names.setdefault(channel.name, channel)
+        for alias in channel.aliases:
+            self.aliases.setdefault(alias, channel)
+        name = parse_channel_name(channel.name)
+        if name.qualified:
+            self.signals.setdefault(name.signal, []).append(channel)
+            self.buses.setdefault(name.bus, []).append(channel)
+            if name.pdu is not None:
+                self.pdus.setdefault(name.pdu, []).append(channel)
@@ -1,8 +1,11 @@
 
 
 from dataclasses import dataclass
+import hashlib
+import json
 from logging import getLogger
 import os
+from typing import Callable
 from PySide6.QtCore import QObject, Slot, QThreadPool, QRunnable, QSemaphore, QMetaType
 from PySide6.QtCore import Signal as QSignal
 from asammdf import MDF, Signal
@@ -31,16 +34,52 @@ class MeasurementImportInfo():
     merge_signals: bool
     name_mapping: dict[str, str]
     sample_rate: float
+    # whether a file imported before with the same options is skipped, see MeasurementImporter
+    skip_duplicates: bool = True
+    # whether only the channels and a reference to the file are recorded, the samples are read from the file when
+    # a channel is first loaded, see MeasurementImporter.link_signals
+    link: bool = False
+
+
+def file_fingerprint(filename: str, quick: bool = False) -> str:
+    """
+    Returns a hash of the content of a file, which identifies the file independently of its name and location.
+    A quick fingerprint only identifies the file by its location, size and modification time, without reading it.
+    """
+    if quick:
+        stat = os.stat(filename)
+        return f"{stat.st_size}-{stat.st_mtime_ns}-{os.path.abspath(filename)}"
+    fingerprint = hashlib.blake2b(digest_size=16)
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            fingerprint.update(block)
+    return f"{os.path.getsize(filename)}-{fingerprint.hexdigest()}"
+
+
+def import_options_key(info: MeasurementImportInfo) -> str:
+    """
+    Returns the options of an import that determine the imported measurement, as a string that can be compared.
+    """
+    return json.dumps([info.remove_constant_channels, info.merge_signals, float(info.sample_rate),
+                       sorted(info.name_mapping.items()), info.link])
 
 
 class MeasurementImporter(QObject):
+    """
+    Imports a measurement file. If on_progress is set, it is called with the fraction of the import that is done.
+    Each imported file is recorded in the ContentCatalog by its fingerprint and import options. If the same file
+    was imported with the same options before, and that measurement still exists, the import is skipped:
+    import_measurement returns None and duplicate_of is the id of the existing measurement.
+    """
     measurementImported = QSignal(Measurement)
 
-    def __init__(self, info: MeasurementImportInfo):
+    def __init__(self, info: MeasurementImportInfo, on_progress: Callable[[float], None] | None = None):
         super().__init__()
         self.logger = getLogger(__name__)
         self.info = info
+        self.on_progress = on_progress
         self.measurement = None
+        self.duplicate_of: str | None = None
         self.chunks_to_process = 0
         self.channel_processor = ChannelProcessor()
         self.channel_repo = ChannelRepository()
@@ -54,12 +93,41 @@ class MeasurementImporter(QObject):
             self.logger.error(f"File {info.filename} does not exist")
             raise OSError(f"File {info.filename} does not exist")
 
+        content_catalog = self.data_repo.content_catalog
+        # linked measurements depend on the file at its location, which is therefore part of the fingerprint
+        fingerprint = file_fingerprint(info.filename, quick=info.link)
+        options = import_options_key(info)
+        existing_id = content_catalog.find_import(fingerprint, options)
+        if existing_id is not None and not os.path.exists(f"{os.getcwd()}/measurements/measurements/{existing_id}.json"):
+            content_catalog.remove_imports(existing_id)
+            existing_id = None
+        if existing_id is not None and info.skip_duplicates:
+            self.logger.info(
+                f"{info.filename} was already imported as measurement {existing_id}, skipping it")
+            self.duplicate_of = existing_id
+            self.report_progress(1.0)
+            return None
+
         measurement_id = str(uuid.uuid4())
         self.measurement = Measurement(
             measurement_id, os.path.basename(info.filename), 0, self.info.sample_rate, [])
 
         mdf = MDF(info.filename)
+        if info.link:
+            self.link_signals(mdf)
+        else:
+            self.import_signals(mdf)
 
+        self.report_progress(1.0)
+        self.logger.info("Everything done")
+        content_catalog.put_import(fingerprint, options, measurement_id)
+        self.measurementImported.emit(self.measurement)
+        return self.measurement
+
+    def import_signals(self, mdf: MDF):
+        """
+        Reads, resamples and stores all signals of the file.
+        """
         last_timestamps = [signal.timestamps[-1]
                            for signal in mdf.iter_channels()]
         self.measurement.length = max(last_timestamps)
@@ -73,12 +141,14 @@ class MeasurementImporter(QObject):
             if i % 100 == 0:
                 self.logger.info(
                     f"Imported {(i / signal_count)*100:.1f}% of the signals ({i+1})")
+                self.report_progress(0.8 * i / signal_count)
             result_tuple = self.process_signal_tuple(signal_tuple)
             if result_tuple is not None:
                 result_tuples.append(result_tuple)
 
         if self.info.merge_signals:
             self.logger.info("Done importing signals, combining duplicates")
+            self.report_progress(0.8)
             result_tuples = self.combine_duplicates(result_tuples)
             self.logger.info("Done combining duplicates")
         else:
@@ -90,11 +160,55 @@ class MeasurementImporter(QObject):
         for i, chunk in enumerate(chunked(result_tuples, chunk_size)):
             self.logger.info(
                 f"Processing, {((i+1) / (len(result_tuples)/chunk_size))*100:.1f}% of the chunks ({i+1})")
+            self.report_progress(
+                0.85 + 0.15 * i * chunk_size / max(1, len(result_tuples)))
             self.save_chunk(chunk)
 
-        self.logger.info("Everything done")
-        self.measurementImported.emit(self.measurement)
-        return self.measurement
+    def link_signals(self, mdf: MDF):
+        """
+        Records the channels of the file without reading their samples, only the time channels are read to
+        determine the length of the measurement. The samples of a channel are read from the file, and resampled,
+        when it is first loaded, see ChannelDataRepository.store_links.
+        Constant signals are not removed and repeated signals are not merged, as this requires their samples.
+        """
+        stat = os.stat(self.info.filename)
+        source = {"file": os.path.abspath(self.info.filename),
+                  "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        groups = [(group_index, channel_indexes) for virtual_group in mdf.virtual_groups
+                  for group_index, channel_indexes in mdf.included_channels(virtual_group)[virtual_group].items()]
+
+        signals = []
+        for i, (group_index, channel_indexes) in enumerate(groups):
+            self.report_progress(0.8 * i / len(groups))
+            master = mdf.get_master(group_index)
+            if len(master) == 0:
+                # signals without values are skipped by the import as well
+                continue
+            self.measurement.length = max(
+                self.measurement.length, float(master[-1]))
+            for channel_index in channel_indexes:
+                name = self.map_name(
+                    mdf.groups[group_index].channels[channel_index].name)
+                if name is not None:
+                    signals.append((name, group_index, channel_index))
+        self.logger.info(
+            f"Linking {len(signals)} signals, measurement length: {self.measurement.length}")
+
+        chunk_size = 500
+        for i, chunk in enumerate(chunked(signals, chunk_size)):
+            self.report_progress(0.8 + 0.2 * i * chunk_size / len(signals))
+            group_id = self.channel_repo.generate_group_id()
+            channels = [Channel(self.channel_repo.generate_channel_id(group_id), name, [name], {})
+                        for name, _, _ in chunk]
+            links = [{**source, "group": group_index, "index": channel_index, "length": self.measurement.length,
+                      "sample_rate": self.info.sample_rate} for _, group_index, channel_index in chunk]
+            self.measurement.channels += channels
+            self.channel_repo.store_group(group_id, channels)
+            self.data_repo.store_links(group_id, channels, links)
+
+    def report_progress(self, fraction: float):
+        if self.on_progress is not None:
+            self.on_progress(fraction)
 
     def combine_duplicates(self, result_tuples: list[tuple[Channel, ChannelData]]):
         new_result_tuples: list[tuple[Channel, ChannelData]] = []
@@ -111,6 +225,8 @@ class MeasurementImporter(QObject):
 
         result_tuples = new_result_tuples
         new_result_tuples = []
+        # positions in new_result_tuples of the channels with each signal name, the only duplicate candidates
+        positions_by_signal: dict[str, list[int]] = {}
 
         for i, (channel, channel_data) in enumerate(result_tuples):
             if i % 100 == 0:
@@ -118,21 +234,22 @@ class MeasurementImporter(QObject):
                     f"Processing {(i / len(result_tuples))*100:.1f}% of the channels ({i+1})")
             found_duplicate = False
             signal_name = self.channel_repo.get_signal_name(channel)
-            for i, (other, other_data) in enumerate(new_result_tuples):
-                other_signal_name = self.channel_repo.get_signal_name(other)
-                if signal_name == other_signal_name:
-                    result = metric(SignalData.from_channel_data(
-                        channel_data), SignalData.from_channel_data(other_data))
-                    if result.result.mean() > threshold:
-                        self.logger.debug(
-                            f"Duplicate channel {channel.name} merged")
-                        new_result_tuples[i][0].aliases.append(channel.name)
-                        found_duplicate = True
-                        break
-                    else:
-                        self.logger.info(
-                            f"Duplicate candidate {signal_name} not merged")
+            for i in positions_by_signal.get(signal_name, []):
+                other, other_data = new_result_tuples[i]
+                result = metric(SignalData.from_channel_data(
+                    channel_data), SignalData.from_channel_data(other_data))
+                if result.result.mean() > threshold:
+                    self.logger.debug(
+                        f"Duplicate channel {channel.name} merged")
+                    other.aliases.append(channel.name)
+                    found_duplicate = True
+                    break
+                else:
+                    self.logger.info(
+                        f"Duplicate candidate {signal_name} not merged")
             if not found_duplicate:
+                positions_by_signal.setdefault(
+                    signal_name, []).append(len(new_result_tuples))
                 new_result_tuples.append((channel, channel_data))
 
         return new_result_tuples
@@ -151,13 +268,27 @@ class MeasurementImporter(QObject):
         self.data_repo.store_group(
             group_id, [channel_data for _, channel_data in chunk])
 
+    def map_name(self, name: str) -> str | None:
+        """
+        Returns the name of a signal after applying the name mapping, or None if the signal is not in the mapping.
+        """
+        if len(self.info.name_mapping.items()) != 0:
+            if name in self.info.name_mapping:
+                return self.info.name_mapping[name]
+            elif name in self.info.name_mapping.values():
+                return name
+            else:
+                # self.logger.warning(
+                #    f"Channel {name} not in name mapping, skipping")
+                return None
+        return name
+
     def process_signal_tuple(self, signal_tuple: tuple[Signal, Signal]) -> tuple[Channel, ChannelData]:
         signal = signal_tuple[0]
         raw_signal = signal_tuple[1]
-        values = signal.samples
         timestamps = signal.timestamps
-        raw_values = raw_signal.samples
-        raw_values = raw_values.astype(np.float64)
+        values, raw_values = self.channel_processor.decode_signal(
+            signal.samples, raw_signal.samples)
         name = signal.name
         id = "TEMPORARY ID"
 
@@ -170,10 +301,6 @@ class MeasurementImporter(QObject):
                 f"Signal {signal.name} has different number of values and timestamps")
             return None
 
-        if values.dtype in [np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64, np.float16, np.float32, np.float64]:
-            values = values.astype(np.float64)
-            raw_values = values
-
         unique_value_names, indices = np.unique(values, return_index=True)
 
         if len(unique_value_names) == 1:
@@ -184,21 +311,12 @@ class MeasurementImporter(QObject):
                     f"Skipping constant channel {name}")
                 return None
 
-        value_mapping = {}
-        if len(unique_value_names) <= 20:
-            unique_values = raw_values[indices]
-            unique_values = [float(value) for value in unique_values]
-            value_mapping = dict(zip(unique_values, unique_value_names))
+        value_mapping = self.channel_processor.value_name_mapping(
+            unique_value_names, indices, raw_values)
 
-        if len(self.info.name_mapping.items()) != 0:
-            if name in self.info.name_mapping:
-                name = self.info.name_mapping[name]
-            elif name in self.info.name_mapping.values():
-                name = name
-            else:
-                # self.logger.warning(
-                #    f"Channel {name} not in name mapping, skipping")
-                return None
+        name = self.map_name(name)
+        if name is None:
+            return None
 
         channel_data = ChannelData(timestamps, raw_values, name, id)
         channel_data = self.channel_processor.normalize_channel(
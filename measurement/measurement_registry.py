@@ -1,3 +1,4 @@
+from dataclasses import replace
 import json
 from logging import getLogger
 import os
@@ -5,24 +6,35 @@ from typing import Self
 from measurement.channel.channel_data_repository import ChannelDataRepository
 from measurement.channel.channel_repository import ChannelRepository
 
+from .import_queue import ImportJob, ImportQueue
+from .lazy_measurement import LazyMeasurement
 from .measurement import Measurement
-from .measurement_import import MeasurementImportInfo, MeasurementImporter
+from .measurement_import import MeasurementImportInfo
 
-from PySide6.QtCore import QObject, Signal, QThread, Slot, QMetaType
-import PySide6.QtCore as core
+from PySide6.QtCore import QObject, Signal, Slot
+
+# Version of the measurement index, an index of another version is rebuilt from the measurement files.
+MEASUREMENT_INDEX_VERSION = 1
 
 
 class MeasurementRegistry(QObject):
     """
     MeasurementRegistry class manages the registry of measurements.
+    A summary of each saved measurement (id, name, length, sample rate and number of channels) is kept in a
+    measurement index next to the measurement files. At startup the registry creates LazyMeasurements from it,
+    which read their channels only when they are accessed. Measurement files that changed since they were
+    indexed are read completely, and the index is updated.
     Attributes:
         initialized (bool): Indicates whether the MeasurementRegistry has been initialized.
         measurements_updated (Signal): Signal emitted when measurements are updated.
         measurements (list[Measurement]): List of measurements.
+        import_queue (ImportQueue): The queue of the running and waiting imports.
     Methods:
-        _load(self) -> list[LazyMeasurement]: Loads measurements from files.
+        _load(self) -> None: Loads the measurements from the measurement index and the files changed since.
         load_measurement(self, filename: str) -> None: Loads a measurement from a file.
-        import_file(self, info: MeasurementImportInfo) -> None: Imports a measurement file.
+        import_file(self, info: MeasurementImportInfo) -> ImportJob: Queues the import of a measurement file.
+        import_folder(self, folder: str, info: MeasurementImportInfo) -> list[ImportJob]: Queues the import of all
+            measurement files in a folder.
         handle_measurement_imported(self, measurement: Measurement) -> None: Handles the imported measurement.
         get_measurement(self, id: str) -> Measurement: Retrieves a measurement by its ID.
     """
@@ -31,7 +43,7 @@ class MeasurementRegistry(QObject):
     measurements_updated = Signal()
 
     measurements: list[Measurement]
-    measurement_importer: MeasurementImporter
+    import_queue: ImportQueue
 
     def __new__(cls) -> Self:
         if not hasattr(cls, 'instance'):
@@ -42,13 +54,18 @@ class MeasurementRegistry(QObject):
         if not self.initialized:
             super().__init__()
             self.initialized = True
-            self.measurement_importer = None
-            self.importer_thread = QThread()
+            self.import_queue = ImportQueue()
+            self.import_queue.jobDone.connect(self.handle_job_done)
+            self.import_queue.jobSkipped.connect(self.handle_job_skipped)
 
             self.imported_files_location = os.getcwd() + "/measurements/measurements"
+            self.index_filename = os.getcwd() + "/measurements/measurement_index.json"
+            self.index: dict[str, dict] = {}
             self.measurements: list[Measurement] = []
-            self._load()
+            self.measurements_by_id: dict[str, Measurement] = {}
+            self.measurements_by_name: dict[str, Measurement] = {}
             self.logger = getLogger(__name__)
+            self._load()
 
     def _load(self):
         if not os.path.exists(self.imported_files_location):
@@ -56,14 +73,90 @@ class MeasurementRegistry(QObject):
                 f"Imported Files Location ({self.imported_files_location}) does not exist yet. Creating it now")
             os.makedirs(self.imported_files_location)
 
+        index = self._read_index()
+        self.index = {}
         for _, _, files in os.walk(self.imported_files_location):
             for filename in files:
                 if not filename.endswith(".json"):
                     self.logger.warning(
                         f"Found {filename}, which is not a valid measurement file")
                     continue
-                self.load_measurement(os.path.join(
-                    self.imported_files_location, filename))
+                path = os.path.join(self.imported_files_location, filename)
+                stat = os.stat(path)
+                summary = index.get(filename)
+                if summary is not None and summary["mtime"] == stat.st_mtime_ns and summary["size"] == stat.st_size:
+                    self.measurements.append(LazyMeasurement(path, summary))
+                    self.index[filename] = summary
+                    continue
+                measurement = Measurement.from_dict(json.load(open(path, "r")))
+                self.measurements.append(measurement)
+                self.index[filename] = self._summarize(measurement, path)
+
+        if self.index != index:
+            self.logger.info(
+                f"Updating measurement index with {len(self.index)} measurements")
+            self._write_index()
+        self._update_indexes()
+        self.logger.info(f"Found {len(self.measurements)} measurements")
+        self.measurements_updated.emit()
+
+    def _update_indexes(self) -> None:
+        """
+        Rebuilds the dicts of the measurements by id and by name, after measurements were removed or renamed.
+        Each id and name maps to the first measurement with it, as a linear search would find.
+        """
+        self.measurements_by_id = {}
+        self.measurements_by_name = {}
+        for measurement in self.measurements:
+            self.measurements_by_id.setdefault(measurement.id, measurement)
+            self.measurements_by_name.setdefault(measurement.name, measurement)
+
+    def _add(self, measurement: Measurement) -> None:
+        self.measurements.append(measurement)
+        self.measurements_by_id.setdefault(measurement.id, measurement)
+        self.measurements_by_name.setdefault(measurement.name, measurement)
+
+    def _remove(self, measurement: Measurement) -> None:
+        # compared by identity, comparing measurements would compare (and load) all their channels
+        position = next(position for position, other in enumerate(self.measurements)
+                        if other is measurement)
+        del self.measurements[position]
+        self._update_indexes()
+
+    def _read_index(self) -> dict[str, dict]:
+        if not os.path.exists(self.index_filename):
+            return {}
+        try:
+            data = json.load(open(self.index_filename, "r"))
+        except ValueError:
+            self.logger.warning(
+                f"Could not read measurement index {self.index_filename}, rebuilding it")
+            return {}
+        if data.get("version") != MEASUREMENT_INDEX_VERSION:
+            return {}
+        return data["measurements"]
+
+    def _write_index(self) -> None:
+        temporary_filename = f"{self.index_filename}.tmp"
+        with open(temporary_filename, "w") as file:
+            json.dump({"version": MEASUREMENT_INDEX_VERSION,
+                      "measurements": self.index}, file)
+        os.replace(temporary_filename, self.index_filename)
+
+    def _summarize(self, measurement: Measurement, filename: str) -> dict:
+        """
+        Creates the index entry of a measurement file. The modification time and size identify the version of the file.
+        """
+        stat = os.stat(filename)
+        return {
+            "id": measurement.id,
+            "name": measurement.name,
+            "length": float(measurement.length),
+            "sample_rate": float(measurement.sample_rate),
+            "channel_count": measurement.channel_count,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size
+        }
 
     def load_measurement(self, filename: str) -> None:
         """
@@ -78,7 +171,7 @@ class MeasurementRegistry(QObject):
         file = json.load(open(filename, "r"))
         measurement = Measurement.from_dict(file)
 
-        self.measurements.append(measurement)
+        self._add(measurement)
         self.measurements_updated.emit()
 
     def save_measurement(self, measurement: Measurement) -> None:
@@ -94,56 +187,75 @@ class MeasurementRegistry(QObject):
         """
 
         filename = f"{self.imported_files_location}/{measurement.id}.json"
+        # the measurement file only references its channels, they are stored in the channel catalog
+        ChannelRepository().store_many(measurement.channels)
         with open(filename, "w") as file:
-            json.dump(measurement.to_dict(), file, indent=4)
+            json.dump(measurement.to_dict(), file)
+        self.index[f"{measurement.id}.json"] = self._summarize(
+            measurement, filename)
+        self._write_index()
+        # the measurement may have been renamed
+        self._update_indexes()
 
         self.measurements_updated.emit()
 
-    def import_file(self, info: MeasurementImportInfo) -> None:
+    def import_file(self, info: MeasurementImportInfo) -> ImportJob:
         """
-        Import a measurement file using a separate thread.
-        This method initiates the import process for a measurement file. It creates a
-        MeasurementImporter instance and moves it to a dedicated thread to prevent blocking
-        the main thread during import.
+        Import a measurement file in a separate process.
+        The file is added to the import queue, which imports up to import_queue.max_concurrent files at the same
+        time. The progress of the import is reported by the signals of the import queue.
         Args:
             info (MeasurementImportInfo): Contains the information needed for importing the
                 measurement file, including the filename and other import parameters.
+        Returns:
+            ImportJob: The job of the import.
         Notes:
-            - If an import is already running, the method will log a warning and return without
-              starting another import
             - The import process is asynchronous and the results are handled through the
-              handle_measurement_imported slot when complete
+              handle_job_done slot when complete
             - Does **not** return the measurement object, but emits the measurements_updated signal
         """
-
         self.logger.info(f"Importing file {info.filename}")
+        return self.import_queue.enqueue(info)
 
-        if self.importer_thread.isRunning():
-            self.logger.warning(
-                "Importer thread is still running. Wait for it to finish before importing another file")
-            return
-        self.measurement_importer = MeasurementImporter(info)
-        self.measurement_importer.moveToThread(self.importer_thread)
-        self.measurement_importer.measurementImported.connect(
-            self.handle_measurement_imported)
-        self.importer_thread.start()
-
-        core.QMetaObject.invokeMethod(
-            self.measurement_importer,
-            "import_measurement",
-            core.Qt.QueuedConnection)
+    def import_folder(self, folder: str, info: MeasurementImportInfo) -> list[ImportJob]:
+        """
+        Imports every measurement file (.mf4) in a folder, not including its subfolders, with the same options.
+        Args:
+            folder (str): The folder containing the measurement files.
+            info (MeasurementImportInfo): The options of the imports, its filename is replaced by each file.
+        Returns:
+            list[ImportJob]: The jobs of the imports, in the order of the filenames.
+        """
+        if not os.path.isdir(folder):
+            self.logger.error(f"Folder {folder} does not exist")
+            return []
+        filenames = sorted(filename for filename in os.listdir(folder)
+                           if filename.lower().endswith(".mf4") and os.path.isfile(os.path.join(folder, filename)))
+        if len(filenames) == 0:
+            self.logger.warning(f"Found no measurement files in {folder}")
+        self.logger.info(
+            f"Importing {len(filenames)} measurement files from {folder}")
+        return [self.import_file(replace(info, filename=os.path.join(folder, filename)))
+                for filename in filenames]
+
+    @Slot(ImportJob, Measurement)
+    def handle_job_done(self, job: ImportJob, measurement: Measurement) -> None:
+        """Not for external use. Handles the imported measurement and saves it to the registry."""
+        self.handle_measurement_imported(measurement)
+
+    @Slot(ImportJob, str)
+    def handle_job_skipped(self, job: ImportJob, measurement_id: str) -> None:
+        """Not for external use. Logs the measurement a skipped file was imported as before."""
+        name = self.get(measurement_id).name if self.has(
+            measurement_id) else measurement_id
+        self.logger.info(
+            f"Skipped {job.info.filename}, it was already imported as {name}")
 
     @Slot(Measurement)
     def handle_measurement_imported(self, measurement: Measurement) -> None:
         """Not for external use. Handles the imported measurement and saves it to the registry."""
-        self.measurements.append(measurement)
+        self._add(measurement)
         self.measurements_updated.emit()
-        if self.importer_thread.isRunning():
-            self.importer_thread.quit()
-            self.measurement_importer.deleteLater()
-
-        self.measurement_importer = None
-
         self.save_measurement(measurement)
 
     def add_measurement(self, measurement: Measurement) -> None:
@@ -158,49 +270,51 @@ class MeasurementRegistry(QObject):
         if self.has(measurement.id):
             self.logger.warning(
                 f"Measurement with id:{measurement.id} already exists, overwriting it")
-            self.measurements.remove(self.get(measurement.id))
+            self._remove(self.get(measurement.id))
 
-        self.measurements.append(measurement)
+        self._add(measurement)
         self.measurements_updated.emit()
         self.save_measurement(measurement)
 
     def get(self, id: str) -> Measurement:
-        for measurement in self.measurements:
-            if measurement.id == id:
-                return measurement
+        if id in self.measurements_by_id:
+            return self.measurements_by_id[id]
         raise ValueError(f"Measurement with id:{id} does not exist")
 
     def get_by_name(self, name: str) -> Measurement:
-        for measurement in self.measurements:
-            if measurement.name == name:
-                return measurement
+        measurement = self.measurements_by_name.get(name)
+        if measurement is not None and measurement.name != name:
+            # renamed without being saved
+            self._update_indexes()
+            measurement = self.measurements_by_name.get(name)
+        if measurement is not None:
+            return measurement
         raise ValueError(f"Measurement with name:{name} does not exist")
 
     def has(self, id: str) -> bool:
-        for measurement in self.measurements:
-            if measurement.id == id:
-                return True
-        return False
+        return id in self.measurements_by_id
 
     def has_by_name(self, name: str) -> bool:
-        for measurement in self.measurements:
-            if measurement.name == name:
-                return True
-        return False
+        try:
+            self.get_by_name(name)
+            return True
+        except ValueError:
+            return False
 
     def delete(self, id: str) -> None:
-        for measurement in self.measurements:
-            if measurement.id == id:
-                repo = ChannelRepository()
-                data_repo = ChannelDataRepository()
-                channels = map(lambda x: x.id, measurement.channels)
-                channels = set(map(repo.parse_group_id, channels))
-                for channel in channels:
-                    repo.delete_group(channel)
-                    data_repo.delete_group(channel)
-
-                self.measurements.remove(measurement)
-                os.remove(f"{self.imported_files_location}/{id}.json")
-                self.measurements_updated.emit()
-                return
-        raise ValueError(f"Measurement with id:{id} does not exist")
+        measurement = self.get(id)
+        repo = ChannelRepository()
+        data_repo = ChannelDataRepository()
+        channels = map(lambda x: x.id, measurement.channels)
+        channels = set(map(repo.parse_group_id, channels))
+        for channel in channels:
+            repo.delete_group(channel)
+            data_repo.delete_group(channel)
+
+        data_repo.content_catalog.remove_imports(id)
+
+        self._remove(measurement)
+        os.remove(f"{self.imported_files_location}/{id}.json")
+        self.index.pop(f"{id}.json", None)
+        self._write_index()
+        self.measurements_updated.emit()